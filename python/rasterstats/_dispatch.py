@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import functools
+import inspect
+import itertools
 import json
 import logging
 import os
-import tempfile
 from os import PathLike
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator
 
 import numpy as np
+import shapely
+from affine import Affine
 from shapely.geometry import shape
 
 from rasterstats.io import read_features
@@ -38,6 +42,30 @@ _SUPPORTED_STATS = {
     "nan",
 }
 
+# Features per batch_stats call, matching the Rust stream chunk.
+_BATCH_CHUNK = 256
+
+# Features per Rust call when GeoParquet is read with pyarrow.
+_PARQUET_BATCH = 65536
+
+_PARQUET_SUFFIXES = (".parquet", ".geoparquet")
+
+_MINI_RASTER_KEYS = ("mini_raster_array", "mini_raster_affine", "mini_raster_nodata")
+
+# Pixel types the Rust engine reads natively (see src/pixel.rs).
+_NATIVE_DTYPES = {
+    np.dtype(name)
+    for name in ("uint8", "uint16", "int16", "uint32", "int32", "float32", "float64")
+}
+
+# Lossless widenings for array dtypes Rust has no pixel type for; other
+# numeric dtypes are read as float64, like upstream's masked arithmetic.
+_ARRAY_CASTS = {"b1": np.uint8, "i1": np.int16, "f2": np.float32}
+
+# 64-bit integer arrays are narrowed to the first of these that holds every
+# value, keeping integer categories and exact sums; otherwise they fall back.
+_WIDE_INT_CASTS = (np.dtype("int32"), np.dtype("uint32"))
+
 
 def _rust_globally_disabled() -> bool:
     return os.environ.get("OXRS_DISABLE_RUST", "").lower() in {
@@ -56,6 +84,198 @@ def _is_pathlike(value: Any) -> bool:
     return isinstance(value, (str, PathLike))
 
 
+def _array_raster(raster: Any, affine: Any) -> np.ndarray | None:
+    """A 2-D ndarray the Rust engine can read in place, or None to fall back.
+
+    The array is handed over through the buffer protocol, so C- and
+    Fortran-ordered arrays (and positive-strided views) are not copied; only
+    dtypes Rust has no pixel type for are converted.
+    """
+    if type(raster) is not np.ndarray or raster.ndim != 2:
+        return None
+    if not isinstance(affine, Affine):
+        return None
+    if 0 in raster.shape:
+        return None
+    if raster.dtype.kind in "iu" and raster.dtype.itemsize == 8:
+        return _narrow_wide_ints(raster)
+    if raster.dtype not in _NATIVE_DTYPES:
+        target = _ARRAY_CASTS.get(raster.dtype.kind + str(raster.dtype.itemsize))
+        if target is None and raster.dtype.kind not in "iuf":
+            return None
+        raster = raster.astype(target or np.float64)
+    if any(step <= 0 for step in raster.strides):
+        raster = np.ascontiguousarray(raster)
+    return raster
+
+
+def _narrow_wide_ints(raster: np.ndarray) -> np.ndarray | None:
+    """An int64/uint64 array as int32 or uint32 if every value fits, else None."""
+    low, high = int(raster.min()), int(raster.max())
+    for dtype in _WIDE_INT_CASTS:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return raster.astype(dtype)
+    return None
+
+
+def _raster_arg(raster: Any, affine: Any) -> tuple[Any, dict[str, Any]] | None:
+    """Rust `raster` argument and extra kwargs for a path or ndarray raster."""
+    array = _array_raster(raster, affine)
+    if array is not None:
+        return array, {"geo_transform": affine.to_gdal()}
+    if not _is_pathlike(raster) or not os.path.exists(str(raster)):
+        return None
+    return str(raster), {}
+
+
+def _is_wkb(value: Any) -> bool:
+    # WKB opens with a byte-order flag; upstream also accepts WKT as bytes.
+    return isinstance(value, bytes) and value[:1] in (b"\x00", b"\x01")
+
+
+def finite_values(masked: Any) -> np.ndarray:
+    """The unmasked, finite cells of a zone, as batch stats receive them.
+
+    Non-finite cells count as ``nan`` and are left out of the built-in
+    stats, so batch callables never see them either, whichever path ran.
+    """
+    values = np.ma.compressed(masked)
+    if np.issubdtype(values.dtype, np.floating):
+        values = values[np.isfinite(values)]
+    return values
+
+
+def layer_where(where: str | None, fids: Iterable[int] | None) -> str | None:
+    """One OGR SQL attribute filter for a `where` expression and FID list."""
+    clauses = []
+    if where:
+        clauses.append(f"({where})")
+    if fids is not None:
+        clauses.append(f"FID IN ({', '.join(str(int(fid)) for fid in fids)})")
+    return " AND ".join(clauses) or None
+
+
+def read_layer_features(
+    path: str,
+    layer: int | str,
+    *,
+    bbox: tuple[float, float, float, float] | None,
+    where_clause: str | None,
+) -> Iterator[dict[str, Any]]:
+    """Fiona feature dicts of a layer under the OGR filters the Rust path uses."""
+    import fiona
+    import fiona.model
+
+    with fiona.open(path, "r", layer=layer) as src:
+        for feat in src.filter(bbox=bbox, where=where_clause):
+            yield fiona.model.to_dict(feat)
+
+
+def _arrow_wkb(vectors: Any) -> Any:
+    """An `__arrow_c_array__` WKB column for `vectors`, or None.
+
+    GeoDataFrames and GeoSeries (geopandas >= 1.0) export their geometry
+    column as GeoArrow WKB; Arrow arrays are passed through as they are.
+    """
+    geometry = getattr(vectors, "geometry", None)
+    if geometry is not None and hasattr(geometry, "to_arrow"):
+        return geometry.to_arrow(geometry_encoding="WKB")
+    if hasattr(vectors, "__arrow_c_array__"):
+        return vectors
+    if hasattr(vectors, "__arrow_c_stream__") and hasattr(vectors, "combine_chunks"):
+        # pyarrow.ChunkedArray
+        return vectors.combine_chunks()
+    return None
+
+
+def _arrow_features(vectors: Any, column: Any) -> Iterable[dict[str, Any]]:
+    if hasattr(vectors, "__geo_interface__"):
+        return read_features(vectors)
+    import pyarrow as pa
+
+    wkbs = pa.array(column).to_numpy(zero_copy_only=False)
+    return read_features(shapely.from_wkb(wkbs))
+
+
+def _vector_wkb(
+    vectors: Any, *, need_features: bool
+) -> tuple[Any, Iterable[dict[str, Any]] | None]:
+    """WKB per feature of in-memory `vectors`, plus feature dicts if needed.
+
+    GeoPandas and Arrow inputs stay a single Arrow WKB column that Rust
+    copies in bulk. Shapely geometries (single, lists or arrays) and WKB
+    bytes are encoded in bulk; any other input goes through `read_features`,
+    like upstream.
+    """
+    column = _arrow_wkb(vectors)
+    if column is not None:
+        return column, _arrow_features(vectors, column) if need_features else None
+
+    items = [vectors] if isinstance(vectors, (bytes, shapely.Geometry)) else vectors
+    if isinstance(items, (list, tuple, np.ndarray)):
+        if all(_is_wkb(item) for item in items):
+            wkbs = list(items)
+        elif all(isinstance(item, shapely.Geometry) for item in items):
+            wkbs = shapely.to_wkb(items).tolist()
+        else:
+            wkbs = None
+        if wkbs is not None:
+            return wkbs, read_features(vectors) if need_features else None
+
+    features = list(read_features(vectors))
+    geoms = [
+        None if feat["geometry"] is None else shape(feat["geometry"])
+        for feat in features
+    ]
+    return shapely.to_wkb(geoms).tolist(), features
+
+
+def _geoparquet_wkb_batches(path: str) -> Iterator[Any]:
+    """The WKB geometry column of a GeoParquet file, a record batch at a time.
+
+    Only the primary geometry column is read, so attribute columns are never
+    decoded.
+    """
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(path)
+    geo = json.loads((parquet.schema_arrow.metadata or {})[b"geo"])
+    column = geo["primary_column"]
+    encoding = geo["columns"][column].get("encoding", "WKB")
+    if encoding.upper() != "WKB":
+        raise ValueError(f"unsupported GeoParquet geometry encoding {encoding!r}")
+    for batch in parquet.iter_batches(batch_size=_PARQUET_BATCH, columns=[column]):
+        yield batch.column(0)
+
+
+def _zonal_geoparquet(
+    vectors: Any, raster: Any, rust_kwargs: dict[str, Any]
+) -> Iterator[dict[str, Any]] | list[dict[str, Any]] | None:
+    """Rust records for a GeoParquet file GDAL cannot open, or None.
+
+    GDAL builds without the Parquet driver fail to open the path; the
+    geometry column is then read with pyarrow (when installed) and streamed
+    to Rust as Arrow WKB batches.
+    """
+    if not isinstance(vectors, str) or not vectors.lower().endswith(_PARQUET_SUFFIXES):
+        return None
+    if rust_kwargs.get("bbox") is not None or rust_kwargs.get("where_clause"):
+        # Layer filters are applied by OGR, which cannot open this file.
+        return None
+    try:
+        batches = _geoparquet_wkb_batches(vectors)
+        first = next(batches, None)
+        if first is None:
+            return []
+        head = _rs_mod.zonal_stats_path(first, raster, **rust_kwargs)
+    except Exception as exc:
+        _LOG.debug("pyarrow GeoParquet read failed for %s: %s", vectors, exc)
+        return None
+    rest = (_rs_mod.zonal_stats_path(batch, raster, **rust_kwargs) for batch in batches)
+    return itertools.chain(head, itertools.chain.from_iterable(rest))
+
+
 def _sanitize_inf(record: dict[str, Any]) -> dict[str, Any]:
     cleaned = {}
     for key, value in record.items():
@@ -76,12 +296,54 @@ def _warn_fallback(api: str, stage: str, err: Exception) -> None:
     )
 
 
+def _vector_input(
+    api: str,
+    vectors: Any,
+    layer: Any,
+    *,
+    bbox: tuple[float, float, float, float] | None,
+    where_clause: str | None,
+    need_features: bool,
+) -> tuple[Any, Iterable[dict[str, Any]] | None] | None:
+    # The ``vector_path`` argument for Rust and, with ``need_features``, the
+    # feature dicts its records pair with. ``None`` means fall back; a
+    # ``None`` input means there are no features.
+    features: Iterable[dict[str, Any]] | None = None
+    if _is_pathlike(vectors):
+        vector_input: Any = str(vectors)
+        if not os.path.exists(vector_input):
+            return None
+        if need_features:
+            # Fiona's feature dicts are the upstream output format (and what
+            # add_stats sees); Rust records are paired with them in layer order.
+            try:
+                if bbox is None and where_clause is None:
+                    features = read_features(vector_input, layer=layer)
+                else:
+                    features = read_layer_features(
+                        vector_input, layer, bbox=bbox, where_clause=where_clause
+                    )
+            except Exception as exc:
+                _warn_fallback(api, "feature_read", exc)
+                return None
+        return vector_input, features
+
+    # In-memory features go to Rust as WKB, with no file or GeoJSON round
+    # trip.
+    try:
+        vector_input, features = _vector_wkb(vectors, need_features=need_features)
+    except Exception as exc:
+        _warn_fallback(api, "feature_normalization", exc)
+        return None
+    return (vector_input if vector_input else None), features
+
+
 def dispatch_zonal_stats(
     vectors: Any,
     raster: Any,
     *,
     layer: Any,
-    band: int,
+    band: int | list[int] | str,
     nodata: float | None,
     stats: Any,
     all_touched: bool,
@@ -93,95 +355,344 @@ def dispatch_zonal_stats(
     prefix: str | None,
     geojson_out: bool,
     boundless: bool,
-) -> list[dict[str, Any]] | None:
+    n_jobs: int | None = None,
+    rasterizer: str | None = None,
+    cache_bytes: int | None = None,
+    spatial_order: str | None = None,
+    batch_stats: dict | None = None,
+    affine: Any = None,
+    bbox: tuple[float, float, float, float] | None = None,
+    where_clause: str | None = None,
+    mask_cache: str | PathLike | None = None,
+    mask_cache_bytes: int | None = None,
+    sweep: bool = False,
+) -> Iterator[dict[str, Any]] | list[dict[str, Any]] | None:
     if not _rust_available_default_on():
         return None
 
-    if not _is_pathlike(raster):
+    raster_arg = _raster_arg(raster, affine)
+    if raster_arg is None:
         return None
+    raster_input, raster_kwargs = raster_arg
+    if raster_kwargs:
+        # Upstream reads 2-D arrays whatever band is asked for.
+        band = 1
 
-    if categorical or category_map is not None:
+    if not isinstance(layer, (int, str)):
         return None
 
-    if add_stats is not None or zone_func is not None or raster_out or geojson_out:
+    norm_stats, _ = check_stats(stats, categorical)
+    if not all(s in _SUPPORTED_STATS or s.startswith("percentile_") for s in norm_stats):
         return None
 
-    if not isinstance(layer, int):
-        return None
+    callbacks = None
+    if add_stats is not None or zone_func is not None:
+        # Rust still reads, masks and computes the built-in stats; only the
+        # Python callables run per zone, on the wrapped Rust buffers.
+        callbacks = functools.partial(
+            _apply_zone_callbacks,
+            zone_func=zone_func,
+            add_stats=add_stats,
+            stats=norm_stats,
+            categorical=categorical,
+            category_map=category_map,
+            raster_out=raster_out,
+            keep_values=bool(batch_stats),
+        )
 
-    norm_stats, _ = check_stats(stats, categorical)
-    if not all(s in _SUPPORTED_STATS or s.startswith("percentile_") for s in norm_stats):
+    need_features = geojson_out or add_stats is not None
+    vector_arg = _vector_input(
+        "zonal_stats",
+        vectors,
+        layer,
+        bbox=bbox,
+        where_clause=where_clause,
+        need_features=need_features,
+    )
+    if vector_arg is None:
         return None
+    vector_input, features = vector_arg
+    if vector_input is None:
+        return []
+
+    rust_kwargs = dict(
+        layer=layer,
+        bbox=bbox,
+        where_clause=where_clause,
+        band=band,
+        nodata=nodata,
+        all_touched=all_touched,
+        boundless=boundless,
+        stats=list(norm_stats),
+        n_jobs=1 if n_jobs is None else int(n_jobs),
+        rasterizer=rasterizer or "native",
+        cache_bytes=None if cache_bytes is None else int(cache_bytes),
+        spatial_order=spatial_order,
+        categorical=bool(categorical),
+        category_map=category_map if categorical else None,
+        raster_out=bool(raster_out or callbacks is not None),
+        # With a zone_func the batch values come from its output instead.
+        zone_values=bool(batch_stats) and zone_func is None,
+        mask_cache=None if mask_cache is None else os.fspath(mask_cache),
+        mask_cache_bytes=None if mask_cache_bytes is None else int(mask_cache_bytes),
+        sweep=bool(sweep),
+        **raster_kwargs,
+    )
+    try:
+        result = _rs_mod.zonal_stats_path(vector_input, raster_input, **rust_kwargs)
+    except Exception as exc:
+        result = _zonal_geoparquet(vector_input, raster_input, rust_kwargs)
+        if result is None:
+            _warn_fallback("zonal_stats", "rust_call", exc)
+            return None
 
-    raster_path = str(raster)
-    if not os.path.exists(raster_path):
+    return _stream_zonal_records(
+        result,
+        prefix,
+        features if need_features else None,
+        geojson_out=geojson_out,
+        callbacks=callbacks,
+        batch_stats=batch_stats or None,
+    )
+
+
+def dispatch_zonal_stats_rasters(
+    vectors: Any,
+    rasters: list[tuple[str, Any, Any]],
+    *,
+    layer: Any,
+    band: int,
+    nodata: float | None,
+    all_touched: bool,
+    prefix: str | None,
+    geojson_out: bool,
+    boundless: bool,
+    n_jobs: int | None = None,
+    rasterizer: str | None = None,
+    cache_bytes: int | None = None,
+    spatial_order: str | None = None,
+    bbox: tuple[float, float, float, float] | None = None,
+    where_clause: str | None = None,
+    mask_cache: str | PathLike | None = None,
+    mask_cache_bytes: int | None = None,
+) -> Iterator[dict[str, Any]] | list[dict[str, Any]] | None:
+    # ``rasters`` holds ``(name, raster, stats)``; raster paths only.
+    if not _rust_available_default_on():
+        return None
+    if not isinstance(layer, (int, str)):
         return None
 
-    temp_vector_path: str | None = None
-    if _is_pathlike(vectors):
-        vector_path = str(vectors)
-        if not os.path.exists(vector_path):
+    rust_rasters = []
+    for name, raster, stats in rasters:
+        if not _is_pathlike(raster):
             return None
-        vector_layer = layer
-    else:
-        # Normalize in-memory/iterable features through a temporary GeoJSON so
-        # Rust and Python input forms produce identical semantics.
-        try:
-            features = list(read_features(vectors, layer=layer))
-            if not features:
-                return []
-            payload = {"type": "FeatureCollection", "features": features}
-            tmp_path: str | None = None
-            try:
-                with tempfile.NamedTemporaryFile(
-                    "w", suffix=".geojson", delete=False
-                ) as tmp:
-                    tmp_path = tmp.name
-                    json.dump(payload, tmp)
-                temp_vector_path = tmp_path
-            except Exception as exc:
-                if tmp_path:
-                    try:
-                        os.unlink(tmp_path)
-                    except OSError:
-                        pass
-                _warn_fallback("zonal_stats", "feature_serialization", exc)
-                return None
-        except Exception as exc:
-            _warn_fallback("zonal_stats", "feature_normalization", exc)
+        norm_stats, _ = check_stats(stats, False)
+        if not all(s in _SUPPORTED_STATS or s.startswith("percentile_") for s in norm_stats):
             return None
-        vector_path = temp_vector_path
-        vector_layer = 0
+        rust_rasters.append((str(name), str(raster), list(norm_stats), band, nodata))
+
+    vector_arg = _vector_input(
+        "zonal_stats_rasters",
+        vectors,
+        layer,
+        bbox=bbox,
+        where_clause=where_clause,
+        need_features=geojson_out,
+    )
+    if vector_arg is None:
+        return None
+    vector_input, features = vector_arg
+    if vector_input is None:
+        return []
 
     try:
-        result = _rs_mod.zonal_stats_path(
-            vector_path,
-            raster_path,
-            layer=vector_layer,
-            band=band,
-            nodata=nodata,
+        result = _rs_mod.zonal_stats_rasters(
+            vector_input,
+            rust_rasters,
+            layer=layer,
             all_touched=all_touched,
             boundless=boundless,
-            stats=list(norm_stats),
+            n_jobs=1 if n_jobs is None else int(n_jobs),
+            rasterizer=rasterizer or "native",
+            cache_bytes=None if cache_bytes is None else int(cache_bytes),
+            spatial_order=spatial_order,
+            bbox=bbox,
+            where_clause=where_clause,
+            mask_cache=None if mask_cache is None else os.fspath(mask_cache),
+            mask_cache_bytes=None if mask_cache_bytes is None else int(mask_cache_bytes),
         )
     except Exception as exc:
-        _warn_fallback("zonal_stats", "rust_call", exc)
+        _warn_fallback("zonal_stats_rasters", "rust_call", exc)
         return None
-    finally:
-        if temp_vector_path:
-            try:
-                os.unlink(temp_vector_path)
-            except OSError:
-                pass
-
-    prefixed = []
-    for item in result:
-        rec = dict(item)
-        rec = _sanitize_inf(rec)
+
+    return _stream_zonal_records(result, prefix, features, geojson_out=geojson_out)
+
+
+def _wrap_mini_raster(record: dict[str, Any]) -> np.ndarray | None:
+    # Rust hands over the window, mask and zone buffers; np.asarray wraps
+    # them through the buffer protocol without copying. Returns the zone
+    # (upstream's rasterized ``rv_array``).
+    if "mini_raster_array" not in record:
+        return None
+    data, mask, zone = record["mini_raster_array"]
+    record["mini_raster_array"] = np.ma.MaskedArray(
+        np.asarray(data), mask=np.asarray(mask)
+    )
+    record["mini_raster_affine"] = Affine.from_gdal(*record["mini_raster_affine"])
+    return np.asarray(zone)
+
+
+def _restat_zone(
+    record: dict[str, Any],
+    masked: Any,
+    stats: list[str],
+    categorical: bool,
+    category_map: dict | None,
+) -> dict[str, Any]:
+    # zone_func may rewrite the zone, so the built-in stats are recomputed in
+    # Rust from its values. nodata/nan describe the unmodified window, as
+    # upstream computes them from the source array.
+    values = np.ma.compressed(masked)
+    if values.dtype not in _NATIVE_DTYPES:
+        values = values.astype(np.float64)
+    restat = _sanitize_inf(
+        dict(
+            _rs_mod.masked_stats(
+                np.ascontiguousarray(values),
+                stats=[s for s in stats if s not in ("nodata", "nan")],
+                categorical=categorical,
+                category_map=category_map if categorical else None,
+            )
+        )
+    )
+    for key in ("nodata", "nan", *_MINI_RASTER_KEYS):
+        if key in record:
+            restat[key] = record[key]
+    return restat
+
+
+def _apply_zone_callbacks(
+    record: dict[str, Any],
+    zone: np.ndarray | None,
+    feat: dict[str, Any] | None,
+    *,
+    zone_func: Any,
+    add_stats: dict | None,
+    stats: list[str],
+    categorical: bool,
+    category_map: dict | None,
+    raster_out: bool,
+    keep_values: bool = False,
+) -> dict[str, Any]:
+    masked = record["mini_raster_array"]
+    if zone_func is not None:
+        if not callable(zone_func):
+            raise TypeError(
+                "zone_func must be a callable function "
+                "which accepts a single `zone_array` arg."
+            )
+        value = zone_func(masked)
+        if value is not None:
+            masked = value
+        record = _restat_zone(record, masked, stats, categorical, category_map)
+        if keep_values:
+            record["_zone_values"] = finite_values(masked)
+
+    if add_stats is not None:
+        for stat_name, stat_func in add_stats.items():
+            n_params = len(inspect.signature(stat_func).parameters.keys())
+            if n_params == 3:
+                record[stat_name] = stat_func(masked, feat["properties"], zone)
+            elif n_params == 2:
+                record[stat_name] = stat_func(masked, feat["properties"])
+            else:
+                record[stat_name] = stat_func(masked)
+
+    if raster_out:
+        record["mini_raster_array"] = masked
+    else:
+        for key in _MINI_RASTER_KEYS:
+            record.pop(key, None)
+    return record
+
+
+def _attach_properties(feat: dict[str, Any], values: dict[str, Any]) -> dict[str, Any]:
+    # Mirrors upstream: "properties" is only created when there is a value.
+    for key, val in values.items():
+        if "properties" not in feat:
+            feat["properties"] = {}
+        feat["properties"][key] = val
+    return feat
+
+
+def _apply_batch_stats(
+    pending: list[tuple[dict[str, Any], Any, np.ndarray]],
+    batch_stats: dict,
+) -> None:
+    # One flat array plus CSR offsets per chunk, so callables vectorize across
+    # zones instead of being called once per feature.
+    chunks = [values for _, _, values in pending]
+    values = np.concatenate(chunks)
+    offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+    np.cumsum([chunk.size for chunk in chunks], out=offsets[1:])
+    for name, func in batch_stats.items():
+        results = func(values, offsets)
+        if len(results) != len(pending):
+            raise ValueError(
+                f"batch_stats[{name!r}] returned {len(results)} results "
+                f"for {len(pending)} features"
+            )
+        for (rec, _, _), result in zip(pending, results):
+            rec[name] = result.item() if isinstance(result, np.generic) else result
+
+
+def _stream_zonal_records(
+    result: Iterable[dict[str, Any]],
+    prefix: str | None,
+    features: Iterable[dict[str, Any]] | None = None,
+    *,
+    geojson_out: bool = False,
+    callbacks: Callable[..., dict[str, Any]] | None = None,
+    batch_stats: dict | None = None,
+) -> Iterator[dict[str, Any]]:
+    feature_iter = iter(features) if features is not None else None
+    pending: list[tuple[dict[str, Any], Any, np.ndarray]] = []
+
+    def finish(rec: dict[str, Any], feat: Any) -> dict[str, Any]:
         if prefix:
             rec = {f"{prefix}{k}": v for k, v in rec.items()}
-        prefixed.append(rec)
-    return prefixed
+        return _attach_properties(feat, rec) if geojson_out else rec
+
+    try:
+        for item in result:
+            rec = _sanitize_inf(dict(item))
+            zone = _wrap_mini_raster(rec)
+            feat = None
+            if feature_iter is not None:
+                feat = next(feature_iter, None)
+                if feat is None:
+                    raise RuntimeError(
+                        "Rust zonal stats returned more records than features"
+                    )
+            if callbacks is not None:
+                rec = callbacks(rec, zone, feat)
+            if batch_stats is None:
+                yield finish(rec, feat)
+                continue
+            pending.append((rec, feat, np.asarray(rec.pop("_zone_values"))))
+            if len(pending) >= _BATCH_CHUNK:
+                _apply_batch_stats(pending, batch_stats)
+                yield from (finish(rec, feat) for rec, feat, _ in pending)
+                pending = []
+        if feature_iter is not None and next(feature_iter, None) is not None:
+            raise RuntimeError("Rust zonal stats returned fewer records than features")
+        if pending:
+            _apply_batch_stats(pending, batch_stats)
+            yield from (finish(rec, feat) for rec, feat, _ in pending)
+    finally:
+        cache_info = getattr(result, "cache_info", None)
+        if cache_info is not None:
+            _LOG.debug("zonal_stats block cache: %s", cache_info())
 
 
 def dispatch_point_query(
@@ -194,15 +705,21 @@ def dispatch_point_query(
     interpolate: str,
     geojson_out: bool,
     boundless: bool,
+    property_name: str = "value",
+    affine: Any = None,
 ) -> list[Any] | None:
     if not _rust_available_default_on():
         return None
 
-    if not _is_pathlike(vectors) or not _is_pathlike(raster):
+    if not _is_pathlike(vectors):
         return None
 
-    if geojson_out:
+    raster_arg = _raster_arg(raster, affine)
+    if raster_arg is None:
         return None
+    raster_input, raster_kwargs = raster_arg
+    if raster_kwargs:
+        band = 1
 
     if not boundless:
         return None
@@ -210,10 +727,6 @@ def dispatch_point_query(
     if not isinstance(layer, int):
         return None
 
-    raster_path = str(raster)
-    if not os.path.exists(raster_path):
-        return None
-
     features = list(read_features(vectors, layer))
     if not features:
         return []
@@ -228,12 +741,13 @@ def dispatch_point_query(
 
     try:
         raw = _rs_mod.point_query_path(
-            raster_path,
+            raster_input,
             coords,
             band=band,
             nodata=nodata,
             interpolate=interpolate,
             boundless=boundless,
+            **raster_kwargs,
         )
     except Exception as exc:
         _warn_fallback("point_query", "rust_call", exc)
@@ -241,11 +755,12 @@ def dispatch_point_query(
 
     out: list[Any] = []
     idx = 0
-    for count in counts:
+    for feat, count in zip(features, counts):
         vals = raw[idx : idx + count]
         idx += count
-        if count == 1:
-            out.append(vals[0])
+        value = vals[0] if count == 1 else vals
+        if geojson_out:
+            out.append(_attach_properties(feat, {property_name: value}))
         else:
-            out.append(vals)
+            out.append(value)
     return out
@@ -2,11 +2,21 @@ from __future__ import annotations
 
 import math
 import warnings
+from collections.abc import Mapping
+from os import PathLike
 
+import numpy as np
 from affine import Affine
 
-from rasterstats._dispatch import dispatch_zonal_stats
+from rasterstats._dispatch import (
+    dispatch_zonal_stats,
+    dispatch_zonal_stats_rasters,
+    finite_values,
+    layer_where,
+    read_layer_features,
+)
 from rasterstats._fallback_py import fallback_gen_zonal_stats
+from rasterstats.io import read_features
 
 try:
     from tqdm import tqdm
@@ -22,6 +32,62 @@ def _clean_inf(value):
     return value
 
 
+def _batch_as_add_stats(batch_stats):
+    def single_zone(func):
+        def stat(masked):
+            values = finite_values(masked)
+            offsets = np.array([0, values.size], dtype=np.int64)
+            return _scalar(func(values, offsets)[0])
+
+        return stat
+
+    return {name: single_zone(func) for name, func in batch_stats.items()}
+
+
+def _scalar(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _vector_filters(vectors, kwargs):
+    # ``(bbox, where_clause)`` from the bbox/fids/where options, or None when
+    # an empty ``fids`` selects no features.
+    bbox, fids, where = kwargs.get("bbox"), kwargs.get("fids"), kwargs.get("where")
+    filtered = bbox is not None or fids is not None or bool(where)
+    if filtered and not isinstance(vectors, (str, PathLike)):
+        raise ValueError("bbox, fids and where only apply to vector paths")
+    if bbox is not None:
+        bbox = tuple(float(v) for v in bbox)
+    if fids is not None:
+        fids = list(fids)
+        if not fids:
+            return None
+    return bbox, layer_where(where, fids)
+
+
+def _fallback_merged(vectors, layer, passes, *, prefix, geojson_out):
+    # Upstream covers one raster band per call. The features are read once,
+    # each ``(head, tail, raster, kwargs)`` pass runs over them, and its stats
+    # are merged under ``{prefix}{head}{stat}{tail}`` keys, as Rust names them.
+    features = list(read_features(vectors, layer))
+    runs = [
+        fallback_gen_zonal_stats(features, raster, **kwargs)
+        for _, _, raster, kwargs in passes
+    ]
+    for feat, records in zip(features, zip(*runs)):
+        feature_stats = {
+            f"{prefix or ''}{head}{key}{tail}": val
+            for (head, tail, _, _), record in zip(passes, records)
+            for key, val in record.items()
+        }
+        if geojson_out:
+            if "properties" not in feat:
+                feat["properties"] = {}
+            feat["properties"].update(feature_stats)
+            yield feat
+        else:
+            yield feature_stats
+
+
 def raster_stats(*args, **kwargs):
     """Deprecated. Use zonal_stats instead."""
     warnings.warn(
@@ -72,7 +138,93 @@ def gen_zonal_stats(
     boundless=True,
     **kwargs,
 ):
-    """Generator zonal stats API compatible with upstream rasterstats."""
+    """Generator zonal stats API compatible with upstream rasterstats.
+
+    Extra keyword arguments understood by the Rust fast path (ignored by the
+    Python fallback):
+
+    n_jobs: int, optional
+        Number of worker threads for the per-feature loop. ``1`` (default)
+        runs serially; ``-1`` (or any value below 1) uses all cores. Output
+        order is identical to the serial path.
+
+    rasterizer: {"native", "gdal"}, optional
+        Zone mask engine for polygons. ``"native"`` (default) uses the
+        in-process scanline rasterizer; ``"gdal"`` burns each feature into a
+        GDAL MEM dataset. Both follow GDAL's pixel-centre and ``all_touched``
+        rules.
+
+    cache_bytes: int, optional
+        Byte budget of the decoded raster block cache shared by the workers
+        (default 64 MiB; ``0`` disables it). Hit/miss counters are logged at
+        DEBUG level on ``rasterstats._dispatch`` when the stream finishes.
+
+    spatial_order: {"hilbert", "morton"}, optional
+        Process features along a Hilbert or Morton (Z-order) curve of their
+        envelope centroids so consecutive windows share raster blocks.
+        Results are still yielded in layer order, but only once every earlier
+        feature is done, so streaming is coarser.
+
+    batch_stats: dict, optional
+        Vectorized custom stats, ``{name: func(values, offsets)}``. ``values``
+        is one flat array of the valid (unmasked, finite) zone values of a
+        chunk of features and ``offsets`` the int64 CSR offsets into it, so
+        feature ``i`` owns ``values[offsets[i]:offsets[i + 1]]``; ``func`` returns one
+        result per feature (e.g. ``np.add.reduceat``-style reductions). Unlike
+        the options above it is honoured by the Python fallback too, one
+        feature per call. Values reflect ``zone_func`` when one is given.
+
+    band: int, list of int or "all"
+        Besides a single band number, a list of bands (or ``"all"``) returns
+        every stat once per band with a ``_b{band}`` suffix (``mean_b1``,
+        ``mean_b2``, ...). The Rust path reads each window for all bands at
+        once and rasterizes each feature once. Band lists need a raster path
+        and do not combine with ``categorical``, ``raster_out``,
+        ``add_stats``, ``zone_func`` or ``batch_stats``.
+
+    mask_cache: str or path, optional
+        Directory of a persistent zone-mask cache. Each feature's rasterized
+        mask is stored there, keyed by its geometry, the raster grid
+        (geotransform, size and CRS), ``all_touched`` and ``rasterizer``, and
+        later runs over any raster on that grid load it instead of
+        rasterizing again. Several processes may share the directory.
+
+    mask_cache_bytes: int, optional
+        Size bound of the ``mask_cache`` directory (default 256 MiB); least
+        recently used masks are deleted beyond it. Cache hits, misses and
+        evictions are logged with the block cache counters.
+
+    sweep: bool, optional
+        For zones that do not overlap (subcatchments, administrative units).
+        The raster is read once, in strips of whole block rows; the zones
+        in each strip are burned into a raster of feature labels over that
+        strip and each cell is added to its zone's stats, instead of
+        reading and rasterizing a window per feature. Strips hold about
+        16 MiB of labels and a feature is burned once per strip it spans.
+        Where zones do overlap, the later feature takes the shared cells.
+        ``n_jobs``, ``rasterizer`` and ``mask_cache`` do not apply, and
+        records arrive once the sweep is done. Does not combine with
+        ``raster_out``, ``add_stats``, ``zone_func``, ``batch_stats`` or
+        band lists. Ignored by the Python fallback.
+
+    bbox: tuple, optional
+        ``(min_x, min_y, max_x, max_y)``; only features whose envelope
+        intersects it are read. ``layer`` may also be a layer name.
+
+    fids: sequence of int, optional
+        Only the features with these OGR FIDs are read.
+
+    where: str, optional
+        OGR SQL attribute filter, e.g. ``"landuse = 'forest'"``.
+
+    ``bbox``, ``fids`` and ``where`` apply to vector paths only. They are set
+    as OGR spatial and attribute filters, so other features are never read,
+    and are honoured by the Python fallback as well. Results follow layer
+    order, not the order of ``fids``.
+
+    On the Rust path records are yielded as features are processed rather
+    than after the whole layer has been read.
+    """
 
     transform = kwargs.get("transform")
     if transform:
@@ -93,6 +245,33 @@ def gen_zonal_stats(
         warnings.warn("Use `band` to specify band number", DeprecationWarning)
         band = band_num
 
+    multi_band = isinstance(band, (str, list, tuple))
+    if multi_band:
+        if isinstance(band, str) and band != "all":
+            raise ValueError(f"band must be a band number, a list of them or 'all', not {band!r}")
+        if band != "all":
+            band = [int(b) for b in band]
+        if categorical or raster_out or add_stats or zone_func or kwargs.get("batch_stats"):
+            raise ValueError(
+                "band lists do not support categorical, raster_out, add_stats, "
+                "zone_func or batch_stats"
+            )
+        if not isinstance(raster, (str, PathLike)):
+            raise ValueError("band lists need a raster path")
+
+    sweep = bool(kwargs.get("sweep"))
+    per_zone = raster_out or add_stats or zone_func or kwargs.get("batch_stats")
+    if sweep and (per_zone or multi_band):
+        raise ValueError(
+            "sweep does not support raster_out, add_stats, zone_func, "
+            "batch_stats or band lists"
+        )
+
+    filters = _vector_filters(vectors, kwargs)
+    if filters is None:
+        return
+    bbox, where_clause = filters
+
     fast = dispatch_zonal_stats(
         vectors,
         raster,
@@ -109,6 +288,17 @@ def gen_zonal_stats(
         prefix=prefix,
         geojson_out=geojson_out,
         boundless=boundless,
+        n_jobs=kwargs.get("n_jobs"),
+        rasterizer=kwargs.get("rasterizer"),
+        cache_bytes=kwargs.get("cache_bytes"),
+        spatial_order=kwargs.get("spatial_order"),
+        batch_stats=kwargs.get("batch_stats"),
+        affine=affine,
+        bbox=bbox,
+        where_clause=where_clause,
+        mask_cache=kwargs.get("mask_cache"),
+        mask_cache_bytes=kwargs.get("mask_cache_bytes"),
+        sweep=sweep,
     )
 
     if fast is not None:
@@ -116,6 +306,44 @@ def gen_zonal_stats(
             yield _clean_inf(item)
         return
 
+    batch_stats = kwargs.get("batch_stats")
+    if batch_stats:
+        # The fallback runs batch callables one feature at a time.
+        add_stats = {**(add_stats or {}), **_batch_as_add_stats(batch_stats)}
+    if bbox is not None or where_clause is not None:
+        vectors = list(
+            read_layer_features(
+                str(vectors), layer, bbox=bbox, where_clause=where_clause
+            )
+        )
+    if multi_band:
+        import rasterio
+
+        with rasterio.open(raster) as src:
+            if band == "all":
+                band = list(range(1, src.count + 1))
+            # Upstream reads band 1's nodata whatever band it summarises;
+            # Rust uses each band's own, and so do these passes.
+            band_nodata = {
+                b: src.nodatavals[b - 1] if nodata is None else nodata for b in band
+            }
+        options = dict(
+            affine=affine,
+            stats=stats,
+            all_touched=all_touched,
+            boundless=boundless,
+            **kwargs,
+        )
+        passes = [
+            ("", f"_b{b}", raster, dict(options, band=b, nodata=band_nodata[b]))
+            for b in band
+        ]
+        for item in _fallback_merged(
+            vectors, layer, passes, prefix=prefix, geojson_out=geojson_out
+        ):
+            yield _clean_inf(item)
+        return
+
     fallback_records = list(
         fallback_gen_zonal_stats(
             vectors,
@@ -140,3 +368,105 @@ def gen_zonal_stats(
 
     for item in fallback_records:
         yield _clean_inf(item)
+
+
+def zonal_stats_rasters(*args, **kwargs):
+    """List-returning form of ``gen_zonal_stats_rasters``."""
+    return list(gen_zonal_stats_rasters(*args, **kwargs))
+
+
+def gen_zonal_stats_rasters(
+    vectors,
+    rasters,
+    layer=0,
+    band=1,
+    nodata=None,
+    stats=None,
+    all_touched=False,
+    prefix=None,
+    geojson_out=False,
+    boundless=True,
+    **kwargs,
+):
+    """Zonal statistics of one set of features over several rasters.
+
+    Yields one record per feature holding every raster's stats, keyed
+    ``{name}_{stat}`` (e.g. ``relief_mean``, ``nlcd_majority``). On the Rust
+    path each feature is read once and, for rasters on the same grid,
+    rasterized once; its mask is shared by all of them.
+
+    Parameters
+    ----------
+    vectors: path to a vector source or geo-like python objects
+
+    rasters: mapping
+        ``{name: raster_path}``, in output key order.
+
+    stats: list of str, str or mapping, optional
+        Stats for every raster, or ``{name: stats}`` for per-raster lists
+        (rasters left out get the defaults).
+
+    ``layer``, ``band``, ``nodata``, ``all_touched``, ``prefix``,
+    ``geojson_out`` and ``boundless`` are as for ``gen_zonal_stats``, and so
+    are its Rust options (``n_jobs``, ``rasterizer``, ``cache_bytes``,
+    ``spatial_order``, ``mask_cache``, ``mask_cache_bytes``) and the
+    ``bbox``, ``fids`` and ``where`` filters.
+
+    Returns
+    -------
+    generator of dicts (or of geojson features with ``geojson_out``)
+    """
+    if not rasters:
+        raise ValueError("rasters must name at least one raster")
+    if isinstance(stats, Mapping):
+        unknown = set(stats) - set(rasters)
+        if unknown:
+            raise ValueError(f"stats given for unknown rasters: {sorted(unknown)}")
+        per_raster = [(name, path, stats.get(name)) for name, path in rasters.items()]
+    else:
+        per_raster = [(name, path, stats) for name, path in rasters.items()]
+
+    filters = _vector_filters(vectors, kwargs)
+    if filters is None:
+        return
+    bbox, where_clause = filters
+
+    fast = dispatch_zonal_stats_rasters(
+        vectors,
+        per_raster,
+        layer=layer,
+        band=band,
+        nodata=nodata,
+        all_touched=all_touched,
+        prefix=prefix,
+        geojson_out=geojson_out,
+        boundless=boundless,
+        n_jobs=kwargs.get("n_jobs"),
+        rasterizer=kwargs.get("rasterizer"),
+        cache_bytes=kwargs.get("cache_bytes"),
+        spatial_order=kwargs.get("spatial_order"),
+        bbox=bbox,
+        where_clause=where_clause,
+        mask_cache=kwargs.get("mask_cache"),
+        mask_cache_bytes=kwargs.get("mask_cache_bytes"),
+    )
+    if fast is not None:
+        for item in fast:
+            yield _clean_inf(item)
+        return
+
+    if bbox is not None or where_clause is not None:
+        vectors = list(
+            read_layer_features(
+                str(vectors), layer, bbox=bbox, where_clause=where_clause
+            )
+        )
+    options = dict(band=band, nodata=nodata, all_touched=all_touched, boundless=boundless)
+    passes = [
+        (f"{name}_", "", path, dict(options, stats=wanted))
+        for name, path, wanted in per_raster
+    ]
+    for item in _fallback_merged(
+        vectors, layer, passes, prefix=prefix, geojson_out=geojson_out
+    ):
+        yield _clean_inf(item)
@@ -33,6 +33,8 @@ def gen_point_query(
         interpolate=interpolate,
         geojson_out=geojson_out,
         boundless=boundless,
+        property_name=property_name,
+        affine=affine,
     )
     if fast is not None:
         for item in fast:
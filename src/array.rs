@@ -0,0 +1,71 @@
+use crate::raster::{MemoryRaster, RasterSource};
+use pyo3::buffer::{Element, PyBuffer};
+use pyo3::exceptions::{PyTypeError, PyValueError};
+use pyo3::prelude::*;
+use std::sync::Arc;
+
+/// Wraps a 2-D buffer of `T` as a raster over the same memory, or `None`
+/// when its format is not `T`. The buffer export is held (so numpy keeps the
+/// array alive and refuses to resize it) until the last reader is done.
+fn memory_raster<T: Element>(
+    array: &Bound<'_, PyAny>,
+    data_type: &'static str,
+    geo_transform: [f64; 6],
+) -> PyResult<Option<RasterSource>> {
+    let Ok(buffer) = PyBuffer::<T>::get_bound(array) else {
+        return Ok(None);
+    };
+    if buffer.dimensions() != 2 {
+        return Err(PyValueError::new_err("raster arrays must be 2-D"));
+    }
+    let (shape, strides) = (buffer.shape(), buffer.strides());
+    if strides.iter().any(|&stride| stride <= 0) {
+        return Err(PyValueError::new_err(
+            "raster arrays must have positive strides",
+        ));
+    }
+    Ok(Some(RasterSource::Memory(MemoryRaster {
+        data: buffer.buf_ptr() as usize,
+        width: shape[1],
+        height: shape[0],
+        pixel_offset: strides[1] as usize,
+        line_offset: strides[0] as usize,
+        data_type,
+        geo_transform,
+        owner: Arc::new(buffer),
+    })))
+}
+
+/// Resolves the `raster` argument of the path entry points: a string is
+/// opened by GDAL, anything else must be a 2-D pixel buffer that comes with
+/// its GDAL-ordered `geo_transform`.
+pub fn raster_source(
+    raster: &Bound<'_, PyAny>,
+    geo_transform: Option<[f64; 6]>,
+) -> PyResult<RasterSource> {
+    if let Ok(path) = raster.extract::<String>() {
+        return Ok(RasterSource::Path(path));
+    }
+    let geo_transform = geo_transform.ok_or_else(|| {
+        PyValueError::new_err("geo_transform is required for array rasters")
+    })?;
+    macro_rules! try_type {
+        ($($ty:ty => $name:literal),*) => {$(
+            if let Some(source) = memory_raster::<$ty>(raster, $name, geo_transform)? {
+                return Ok(source);
+            }
+        )*};
+    }
+    try_type!(
+        u8 => "Byte",
+        u16 => "UInt16",
+        i16 => "Int16",
+        u32 => "UInt32",
+        i32 => "Int32",
+        f32 => "Float32",
+        f64 => "Float64"
+    );
+    Err(PyTypeError::new_err(
+        "raster must be a path or a 2-D buffer of uint8, uint16, int16, uint32, int32, float32 or float64",
+    ))
+}
@@ -0,0 +1,148 @@
+//! Reads WKB columns exported through the Arrow C data interface
+//! (`__arrow_c_array__`), e.g. GeoArrow from GeoPandas or pyarrow binary
+//! arrays, copying the buffers in bulk rather than one object per feature.
+
+use crate::vector::WkbColumn;
+use pyo3::exceptions::PyTypeError;
+use pyo3::prelude::*;
+use pyo3::types::PyCapsule;
+use std::ffi::{c_char, c_void, CStr};
+
+// Field layouts from the Arrow C data interface spec; not all are read.
+#[allow(dead_code)]
+#[repr(C)]
+struct ArrowSchema {
+    format: *const c_char,
+    name: *const c_char,
+    metadata: *const c_char,
+    flags: i64,
+    n_children: i64,
+    children: *mut *mut ArrowSchema,
+    dictionary: *mut ArrowSchema,
+    release: Option<unsafe extern "C" fn(*mut ArrowSchema)>,
+    private_data: *mut c_void,
+}
+
+#[allow(dead_code)]
+#[repr(C)]
+struct ArrowArray {
+    length: i64,
+    null_count: i64,
+    offset: i64,
+    n_buffers: i64,
+    n_children: i64,
+    buffers: *mut *const c_void,
+    children: *mut *mut ArrowArray,
+    dictionary: *mut ArrowArray,
+    release: Option<unsafe extern "C" fn(*mut ArrowArray)>,
+    private_data: *mut c_void,
+}
+
+/// Borrows the struct a PyCapsule of the given name points to. The capsule
+/// stays the owner and releases it when collected.
+fn capsule_struct<'a, T>(capsule: &'a Bound<'_, PyCapsule>, name: &CStr) -> PyResult<&'a T> {
+    if capsule.name()? != Some(name) {
+        return Err(PyTypeError::new_err(format!(
+            "expected a {} capsule from __arrow_c_array__",
+            name.to_string_lossy()
+        )));
+    }
+    let ptr = capsule.pointer() as *const T;
+    // SAFETY: the capsule is named per the Arrow PyCapsule interface, so it
+    // holds a live struct of this type for as long as it is referenced.
+    Ok(unsafe { &*ptr })
+}
+
+/// Copies a binary array with `O`-sized offsets (`z` or `Z` format).
+///
+/// # Safety
+/// `array` must be a valid, unreleased Arrow binary array of that format.
+unsafe fn binary_column<O: Copy + Into<i64>>(array: &ArrowArray) -> WkbColumn {
+    let len = array.length as usize;
+    let first = array.offset as usize;
+    let buffers = std::slice::from_raw_parts(array.buffers, 3);
+    let offsets = std::slice::from_raw_parts(buffers[1] as *const O, first + len + 1);
+    let offsets = &offsets[first..];
+    let start = offsets[0].into() as usize;
+    let end = offsets[len].into() as usize;
+    let data = if end > start {
+        std::slice::from_raw_parts((buffers[2] as *const u8).add(start), end - start).to_vec()
+    } else {
+        Vec::new()
+    };
+    let validity = buffers[0] as *const u8;
+    let valid = (0..len)
+        .map(|i| {
+            let bit = first + i;
+            array.null_count == 0 || validity.is_null() || (*validity.add(bit / 8) >> (bit % 8)) & 1 == 1
+        })
+        .collect();
+    let offsets = offsets.iter().map(|&o| o.into() as usize - start).collect();
+    WkbColumn::from_parts(data, offsets, valid)
+}
+
+/// The WKB column behind `obj`'s `__arrow_c_array__`, or `None` when it
+/// does not export one.
+pub fn wkb_column(obj: &Bound<'_, PyAny>) -> PyResult<Option<WkbColumn>> {
+    if !obj.hasattr("__arrow_c_array__")? {
+        return Ok(None);
+    }
+    let (schema, array): (Bound<'_, PyCapsule>, Bound<'_, PyCapsule>) =
+        obj.call_method0("__arrow_c_array__")?.extract()?;
+    let schema: &ArrowSchema = capsule_struct(&schema, c"arrow_schema")?;
+    let array: &ArrowArray = capsule_struct(&array, c"arrow_array")?;
+    if array.release.is_none() {
+        return Err(PyTypeError::new_err("arrow array was already released"));
+    }
+    // SAFETY: the format string is required and NUL-terminated; the array
+    // layout matches the format checked below.
+    let format = unsafe { CStr::from_ptr(schema.format) };
+    let column = match format.to_bytes() {
+        b"z" => unsafe { binary_column::<i32>(array) },
+        b"Z" => unsafe { binary_column::<i64>(array) },
+        other => {
+            return Err(PyTypeError::new_err(format!(
+                "arrow geometries must be WKB (binary or large_binary), got format {:?}",
+                String::from_utf8_lossy(other)
+            )))
+        }
+    };
+    Ok(Some(column))
+}
+
+#[cfg(test)]
+mod tests {
+    use super::{binary_column, ArrowArray};
+    use std::ffi::c_void;
+
+    #[test]
+    fn binary_columns_honour_offset_and_validity() {
+        // Four values ["ab", null, "", "cde"] sliced to the last three.
+        let offsets: [i32; 5] = [0, 2, 2, 2, 5];
+        let data = *b"abcde";
+        let validity = [0b1101u8];
+        let mut buffers = [
+            validity.as_ptr() as *const c_void,
+            offsets.as_ptr() as *const c_void,
+            data.as_ptr() as *const c_void,
+        ];
+        let array = ArrowArray {
+            length: 3,
+            null_count: 1,
+            offset: 1,
+            n_buffers: 3,
+            n_children: 0,
+            buffers: buffers.as_mut_ptr(),
+            children: std::ptr::null_mut(),
+            dictionary: std::ptr::null_mut(),
+            release: None,
+            private_data: std::ptr::null_mut(),
+        };
+
+        let column = unsafe { binary_column::<i32>(&array) };
+        assert_eq!(column.len(), 3);
+        assert_eq!(column.get(0), None);
+        assert_eq!(column.get(1), Some(&b""[..]));
+        assert_eq!(column.get(2), Some(&b"cde"[..]));
+    }
+}
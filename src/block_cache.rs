@@ -0,0 +1,220 @@
+//! Decoded-block LRU cache for raster window reads.
+//!
+//! Neighbouring features have overlapping windows, so without a cache the same
+//! compressed GeoTIFF blocks are decoded once per feature. Blocks here are
+//! aligned to the band's native block grid (several native blocks stacked for
+//! strip-organised files) and stored decoded in the band's native type.
+
+use crate::errors::OxrsResult;
+use crate::pixel::Pixel;
+use gdal_sys::GDALDataType;
+use std::collections::{BTreeMap, HashMap};
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::Arc;
+
+/// Default total budget when callers do not pass `cache_bytes`.
+pub const DEFAULT_CACHE_BYTES: usize = 64 << 20;
+
+/// Minimum pixels per cache block; smaller native blocks are stacked.
+const MIN_BLOCK_PIXELS: usize = 16 * 1024;
+
+/// Counters shared by every worker's cache so one call reports one total.
+#[derive(Debug, Default)]
+pub struct CacheCounters {
+    pub hits: AtomicU64,
+    pub misses: AtomicU64,
+    pub evictions: AtomicU64,
+}
+
+impl CacheCounters {
+    pub fn snapshot(&self) -> (u64, u64, u64) {
+        (
+            self.hits.load(Ordering::Relaxed),
+            self.misses.load(Ordering::Relaxed),
+            self.evictions.load(Ordering::Relaxed),
+        )
+    }
+}
+
+/// Block storage is `u64` words so any `Pixel` slice can be viewed in place.
+struct CachedBlock {
+    words: Vec<u64>,
+    len: usize,
+    last_used: u64,
+}
+
+impl CachedBlock {
+    fn bytes(&self) -> usize {
+        self.words.len() * std::mem::size_of::<u64>()
+    }
+}
+
+fn words_for<T: Pixel>(len: usize) -> usize {
+    (len * std::mem::size_of::<T>()).div_ceil(std::mem::size_of::<u64>())
+}
+
+fn as_pixels<T: Pixel>(words: &[u64], len: usize) -> &[T] {
+    debug_assert!(words_for::<T>(len) <= words.len());
+    // SAFETY: `Pixel` types are primitive numbers (any bit pattern is valid,
+    // alignment <= 8) and `words` holds at least `len` of them.
+    unsafe { std::slice::from_raw_parts(words.as_ptr().cast::<T>(), len) }
+}
+
+fn as_pixels_mut<T: Pixel>(words: &mut [u64], len: usize) -> &mut [T] {
+    debug_assert!(words_for::<T>(len) <= words.len());
+    // SAFETY: as in `as_pixels`.
+    unsafe { std::slice::from_raw_parts_mut(words.as_mut_ptr().cast::<T>(), len) }
+}
+
+pub struct BlockCache {
+    pixel_type: GDALDataType::Type,
+    block_width: usize,
+    block_height: usize,
+    budget_bytes: usize,
+    used_bytes: usize,
+    tick: u64,
+    blocks: HashMap<(usize, usize), CachedBlock>,
+    lru: BTreeMap<u64, (usize, usize)>,
+    counters: Arc<CacheCounters>,
+}
+
+impl BlockCache {
+    /// A cache of `T` blocks; `None` when not even one block fits in
+    /// `budget_bytes`.
+    pub fn new<T: Pixel>(
+        native_block: (usize, usize),
+        budget_bytes: usize,
+        counters: Arc<CacheCounters>,
+    ) -> Option<Self> {
+        let block_width = native_block.0.max(1);
+        let native_height = native_block.1.max(1);
+        let stack = MIN_BLOCK_PIXELS.div_ceil(block_width * native_height).max(1);
+        let block_height = native_height * stack;
+        if block_width * block_height * std::mem::size_of::<T>() > budget_bytes {
+            return None;
+        }
+        Some(Self {
+            pixel_type: T::GDAL_TYPE,
+            block_width,
+            block_height,
+            budget_bytes,
+            used_bytes: 0,
+            tick: 0,
+            blocks: HashMap::new(),
+            lru: BTreeMap::new(),
+            counters,
+        })
+    }
+
+    pub fn block_size(&self) -> (usize, usize) {
+        (self.block_width, self.block_height)
+    }
+
+    pub fn pixel_type(&self) -> GDALDataType::Type {
+        self.pixel_type
+    }
+
+    /// Returns block `key` (`len` values), decoding it with `load` on a miss
+    /// and evicting least recently used blocks to stay within budget. `T` must
+    /// be the type the cache was created for.
+    pub fn get_or_load<T, F>(&mut self, key: (usize, usize), len: usize, load: F) -> OxrsResult<&[T]>
+    where
+        T: Pixel,
+        F: FnOnce(&mut [T]) -> OxrsResult<()>,
+    {
+        assert_eq!(T::GDAL_TYPE, self.pixel_type, "block cache pixel type mismatch");
+        self.tick += 1;
+        let tick = self.tick;
+
+        if self.blocks.contains_key(&key) {
+            self.counters.hits.fetch_add(1, Ordering::Relaxed);
+            let block = self.blocks.get_mut(&key).expect("checked above");
+            self.lru.remove(&block.last_used);
+            self.lru.insert(tick, key);
+            block.last_used = tick;
+            return Ok(as_pixels(&block.words, block.len));
+        }
+
+        self.counters.misses.fetch_add(1, Ordering::Relaxed);
+        let word_count = words_for::<T>(len);
+        let bytes = word_count * std::mem::size_of::<u64>();
+        let mut words = Vec::new();
+        while self.used_bytes + bytes > self.budget_bytes {
+            let Some((_, victim)) = self.lru.pop_first() else {
+                break;
+            };
+            if let Some(evicted) = self.blocks.remove(&victim) {
+                self.used_bytes -= evicted.bytes();
+                self.counters.evictions.fetch_add(1, Ordering::Relaxed);
+                // Recycle the allocation; blocks are mostly the same size.
+                words = evicted.words;
+            }
+        }
+
+        words.clear();
+        words.resize(word_count, 0);
+        load(as_pixels_mut(&mut words, len))?;
+        self.used_bytes += bytes;
+        self.lru.insert(tick, key);
+        let block = self.blocks.entry(key).or_insert(CachedBlock {
+            words,
+            len,
+            last_used: tick,
+        });
+        Ok(as_pixels(&block.words, block.len))
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::{BlockCache, CacheCounters};
+    use std::sync::Arc;
+
+    fn fill(value: f64) -> impl FnOnce(&mut [f64]) -> crate::errors::OxrsResult<()> {
+        move |buf| {
+            buf.fill(value);
+            Ok(())
+        }
+    }
+
+    #[test]
+    fn strips_are_stacked_to_a_minimum_block() {
+        let cache = BlockCache::new::<f64>((512, 1), 1 << 20, Arc::default()).unwrap();
+        assert_eq!(cache.block_size(), (512, 32));
+        assert!(BlockCache::new::<f64>((256, 256), 1024, Arc::default()).is_none());
+        assert!(BlockCache::new::<u8>((256, 256), 1 << 16, Arc::default()).is_some());
+    }
+
+    #[test]
+    fn evicts_least_recently_used_within_budget() {
+        let counters = Arc::new(CacheCounters::default());
+        let block_bytes = 128 * 128 * 8;
+        let mut cache = BlockCache::new::<f64>((128, 128), 2 * block_bytes, counters.clone()).unwrap();
+        let len = 128 * 128;
+
+        assert_eq!(cache.get_or_load((0, 0), len, fill(1.0)).unwrap()[0], 1.0);
+        cache.get_or_load((1, 0), len, fill(2.0)).unwrap();
+        // Touch (0, 0) so (1, 0) becomes the eviction victim.
+        assert_eq!(cache.get_or_load((0, 0), len, fill(9.0)).unwrap()[0], 1.0);
+        cache.get_or_load((2, 0), len, fill(3.0)).unwrap();
+        assert_eq!(cache.get_or_load((0, 0), len, fill(9.0)).unwrap()[0], 1.0);
+        assert_eq!(cache.get_or_load((1, 0), len, fill(4.0)).unwrap()[0], 4.0);
+
+        assert_eq!(counters.snapshot(), (2, 4, 2));
+    }
+
+    #[test]
+    fn narrow_pixels_round_trip_through_word_storage() {
+        let mut cache = BlockCache::new::<u8>((3, 3), 1 << 16, Arc::default()).unwrap();
+        let block: &[u8] = cache
+            .get_or_load((0, 0), 9, |buf: &mut [u8]| {
+                for (i, v) in buf.iter_mut().enumerate() {
+                    *v = (i as u8).wrapping_add(250);
+                }
+                Ok(())
+            })
+            .unwrap();
+        assert_eq!(block.len(), 9);
+        assert_eq!(block[8], 2);
+    }
+}
@@ -1,4 +1,7 @@
 use crate::errors::{OxrsError, OxrsResult};
+use crate::rasterize::Ring;
+use gdal::vector::Geometry;
+use gdal_sys::OGRwkbGeometryType;
 
 pub fn require_finite(value: f64, name: &str) -> OxrsResult<f64> {
     if value.is_finite() {
@@ -9,3 +12,36 @@ pub fn require_finite(value: f64, name: &str) -> OxrsResult<f64> {
         )))
     }
 }
+
+/// Collects every ring of a (multi)polygon mapped through `to_pixel`.
+///
+/// Returns `None` for any other geometry type; those keep GDAL rasterization.
+pub fn polygon_rings(geom: &Geometry, to_pixel: impl Fn(f64, f64) -> (f64, f64)) -> Option<Vec<Ring>> {
+    let mut rings = Vec::new();
+    match unsafe { gdal_sys::OGR_GT_Flatten(geom.geometry_type()) } {
+        OGRwkbGeometryType::wkbPolygon => push_polygon_rings(geom, &to_pixel, &mut rings),
+        OGRwkbGeometryType::wkbMultiPolygon => {
+            for i in 0..geom.geometry_count() {
+                push_polygon_rings(&geom.get_geometry(i), &to_pixel, &mut rings);
+            }
+        }
+        _ => return None,
+    }
+    Some(rings)
+}
+
+fn push_polygon_rings(
+    polygon: &Geometry,
+    to_pixel: &impl Fn(f64, f64) -> (f64, f64),
+    rings: &mut Vec<Ring>,
+) {
+    for i in 0..polygon.geometry_count() {
+        let ring = polygon.get_geometry(i);
+        rings.push(
+            ring.get_point_vec()
+                .into_iter()
+                .map(|(x, y, _)| to_pixel(x, y))
+                .collect(),
+        );
+    }
+}
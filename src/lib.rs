@@ -1,12 +1,34 @@
+mod array;
+mod arrow;
+mod block_cache;
 mod errors;
 mod geom;
+mod mask_cache;
+mod multi;
+mod order;
+mod pixel;
 mod point;
 mod raster;
+mod rasterize;
 mod stats;
+mod stream;
+mod sweep;
+mod vector;
 mod zonal;
 
+use mask_cache::MaskCache;
+use pixel::{Pixel, PixelVec};
+use raster::BandRef;
+use pyo3::buffer::{Element, PyBuffer};
+use pyo3::exceptions::{PyBufferError, PyTypeError};
 use pyo3::prelude::*;
-use pyo3::types::PyDict;
+use pyo3::types::{PyBytes, PyDict};
+use stats::{CategoryKey, MiniRaster, StatPlan, StatRecord};
+use std::ffi::{c_int, c_void, CStr};
+use std::path::PathBuf;
+use std::sync::Arc;
+use stream::ZonalStream;
+use vector::{LayerFilter, LayerRef, VectorSource, WkbColumn};
 
 fn default_stats() -> Vec<String> {
     vec![
@@ -22,56 +44,435 @@ fn healthcheck() -> PyResult<&'static str> {
     Ok("ok")
 }
 
+/// A 1-D or 2-D pixel buffer exposed through the buffer protocol, so
+/// `np.asarray` wraps the Rust allocation instead of copying it.
+#[pyclass(module = "rasterstats._rs")]
+struct PixelBuffer {
+    data: PixelVec,
+    format: &'static CStr,
+    ndim: usize,
+    shape: [isize; 2],
+    strides: [isize; 2],
+}
+
+impl PixelBuffer {
+    fn new(data: PixelVec, format: &'static CStr, width: usize, height: usize) -> Self {
+        let item_size = data.item_size() as isize;
+        Self {
+            data,
+            format,
+            ndim: 2,
+            shape: [height as isize, width as isize],
+            strides: [width as isize * item_size, item_size],
+        }
+    }
+
+    fn vector(data: PixelVec) -> Self {
+        let item_size = data.item_size() as isize;
+        Self {
+            format: data.format(),
+            ndim: 1,
+            shape: [data.len() as isize, 1],
+            strides: [item_size, item_size],
+            data,
+        }
+    }
+}
+
+#[pymethods]
+impl PixelBuffer {
+    unsafe fn __getbuffer__(
+        slf: Bound<'_, Self>,
+        view: *mut pyo3::ffi::Py_buffer,
+        flags: c_int,
+    ) -> PyResult<()> {
+        use pyo3::ffi;
+        if view.is_null() {
+            return Err(PyBufferError::new_err("View is null"));
+        }
+        let mut this = slf.borrow_mut();
+        (*view).buf = this.data.as_mut_ptr().cast::<c_void>();
+        (*view).len = (this.data.len() * this.data.item_size()) as isize;
+        (*view).readonly = 0;
+        (*view).itemsize = this.data.item_size() as isize;
+        (*view).format = if flags & ffi::PyBUF_FORMAT == ffi::PyBUF_FORMAT {
+            this.format.as_ptr().cast_mut()
+        } else {
+            std::ptr::null_mut()
+        };
+        (*view).ndim = this.ndim as c_int;
+        (*view).shape = if flags & ffi::PyBUF_ND == ffi::PyBUF_ND {
+            this.shape.as_mut_ptr()
+        } else {
+            std::ptr::null_mut()
+        };
+        (*view).strides = if flags & ffi::PyBUF_STRIDES == ffi::PyBUF_STRIDES {
+            this.strides.as_mut_ptr()
+        } else {
+            std::ptr::null_mut()
+        };
+        (*view).suboffsets = std::ptr::null_mut();
+        (*view).internal = std::ptr::null_mut();
+        drop(this);
+        // The view keeps this object, and so the allocation, alive.
+        (*view).obj = slf.into_any().into_ptr();
+        Ok(())
+    }
+
+    unsafe fn __releasebuffer__(&self, _view: *mut pyo3::ffi::Py_buffer) {}
+}
+
+/// `mini_raster_*` entries: the array as `(data, mask, zone)` buffers for the
+/// dispatcher to wrap in a masked array, and the GDAL geotransform.
+fn insert_mini_raster(py: Python<'_>, result: &Bound<'_, PyDict>, raster: MiniRaster) -> PyResult<()> {
+    let MiniRaster {
+        data,
+        mask,
+        zone,
+        width,
+        height,
+        geo_transform,
+        nodata,
+    } = raster;
+    let format = data.format();
+    let data = Py::new(py, PixelBuffer::new(data, format, width, height))?;
+    let mask = Py::new(py, PixelBuffer::new(PixelVec::U8(mask), c"?", width, height))?;
+    let zone = Py::new(py, PixelBuffer::new(PixelVec::U8(zone), c"?", width, height))?;
+    result.set_item("mini_raster_array", (data, mask, zone))?;
+    result.set_item("mini_raster_affine", geo_transform)?;
+    result.set_item("mini_raster_nodata", nodata)?;
+    Ok(())
+}
+
+/// Builds the feature dict in upstream's layout: category counts first (keys
+/// renamed through `category_map`, unmapped keys kept), then the stats.
+fn record_to_dict(
+    py: Python<'_>,
+    record: StatRecord,
+    category_map: Option<&Bound<'_, PyDict>>,
+) -> PyResult<PyObject> {
+    let result = PyDict::new_bound(py);
+    for (key, count) in record.categories {
+        let key = match key {
+            CategoryKey::Int(v) => v.into_py(py),
+            CategoryKey::Float(v) => v.into_py(py),
+        };
+        let key = match category_map {
+            Some(map) => map.get_item(&key)?.map_or(key, Bound::unbind),
+            None => key,
+        };
+        result.set_item(key, count)?;
+    }
+    for (k, v) in record.ints {
+        result.set_item(k, v)?;
+    }
+    for (k, v) in record.floats {
+        match v {
+            Some(x) => result.set_item(k, x)?,
+            None => result.set_item(k, py.None())?,
+        }
+    }
+    if let Some(raster) = record.mini_raster {
+        insert_mini_raster(py, &result, raster)?;
+    }
+    if let Some(values) = record.zone_values {
+        // Internal key; the dispatcher pops it to build batch_stats chunks.
+        result.set_item("_zone_values", Py::new(py, PixelBuffer::vector(values))?)?;
+    }
+    Ok(result.into_py(py))
+}
+
+/// Iterator over zonal records, one dict per feature in layer order.
+///
+/// Features are processed on a background thread; `__next__` only blocks
+/// (with the GIL released) when the next chunk is not ready yet.
+#[pyclass(module = "rasterstats._rs")]
+struct ZonalStatsIter {
+    stream: ZonalStream,
+    pending: std::vec::IntoIter<StatRecord>,
+    category_map: Option<Py<PyDict>>,
+    mask_cache: Option<Arc<MaskCache>>,
+}
+
+#[pymethods]
+impl ZonalStatsIter {
+    fn __iter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
+        slf
+    }
+
+    fn __next__(mut slf: PyRefMut<'_, Self>, py: Python<'_>) -> PyResult<Option<PyObject>> {
+        let this = &mut *slf;
+        loop {
+            if let Some(record) = this.pending.next() {
+                let category_map = this.category_map.as_ref().map(|m| m.bind(py));
+                return record_to_dict(py, record, category_map).map(Some);
+            }
+            match py.allow_threads(|| this.stream.next_chunk())? {
+                Some(chunk) => this.pending = chunk.into_iter(),
+                None => return Ok(None),
+            }
+        }
+    }
+
+    /// Decoded-block cache counters for this call, summed over workers.
+    fn cache_info<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        let (hits, misses, evictions) = self.stream.cache_counters();
+        let info = PyDict::new_bound(py);
+        info.set_item("hits", hits)?;
+        info.set_item("misses", misses)?;
+        info.set_item("evictions", evictions)?;
+        if let Some(cache) = &self.mask_cache {
+            let (hits, misses, evictions) = cache.counters();
+            info.set_item("mask_hits", hits)?;
+            info.set_item("mask_misses", misses)?;
+            info.set_item("mask_evictions", evictions)?;
+        }
+        Ok(info)
+    }
+}
+
 #[pyfunction]
 #[pyo3(signature = (
     vector_path,
     raster_path,
-    layer=0,
-    band=1,
+    layer=LayerRef::Index(0),
+    band=BandRef::One(1),
     nodata=None,
     all_touched=false,
     boundless=true,
     stats=None,
+    n_jobs=1,
+    rasterizer="native",
+    cache_bytes=None,
+    spatial_order=None,
+    categorical=false,
+    category_map=None,
+    raster_out=false,
+    zone_values=false,
+    geo_transform=None,
+    bbox=None,
+    where_clause=None,
+    mask_cache=None,
+    mask_cache_bytes=None,
+    sweep=false,
 ))]
 fn zonal_stats_path(
     py: Python<'_>,
-    vector_path: &str,
-    raster_path: &str,
-    layer: usize,
-    band: isize,
+    vector_path: &Bound<'_, PyAny>,
+    raster_path: &Bound<'_, PyAny>,
+    layer: LayerRef,
+    band: BandRef,
     nodata: Option<f64>,
     all_touched: bool,
     boundless: bool,
     stats: Option<Vec<String>>,
-) -> PyResult<Vec<PyObject>> {
-    let stat_list = stats.unwrap_or_else(default_stats);
-    let records = zonal::zonal_stats_path(
-        vector_path,
-        raster_path,
-        layer,
-        band,
+    n_jobs: isize,
+    rasterizer: &str,
+    cache_bytes: Option<usize>,
+    spatial_order: Option<&str>,
+    categorical: bool,
+    category_map: Option<Bound<'_, PyDict>>,
+    raster_out: bool,
+    zone_values: bool,
+    geo_transform: Option<[f64; 6]>,
+    bbox: Option<[f64; 4]>,
+    where_clause: Option<String>,
+    mask_cache: Option<PathBuf>,
+    mask_cache_bytes: Option<u64>,
+    sweep: bool,
+) -> PyResult<ZonalStatsIter> {
+    let filter = LayerFilter { bbox, where_clause };
+    let vectors = vector_source(vector_path, layer, filter)?;
+    let raster = array::raster_source(raster_path, geo_transform)?;
+    let mask_cache = open_mask_cache(mask_cache, mask_cache_bytes)?;
+    let (bands, per_band) = band.resolve(&raster)?;
+    let opts = zonal::ZonalOptions {
+        bands,
+        per_band,
         nodata,
         all_touched,
         boundless,
-        &stat_list,
-    )?;
-
-    let mut out = Vec::with_capacity(records.len());
-    for record in records {
-        let result = PyDict::new_bound(py);
-        for (k, v) in record.ints {
-            result.set_item(k, v)?;
-        }
-        for (k, v) in record.floats {
-            match v {
-                Some(x) => result.set_item(k, x)?,
-                None => result.set_item(k, py.None())?,
-            }
+        plan: StatPlan::new(stats.unwrap_or_else(default_stats), categorical),
+        n_jobs,
+        rasterizer: zonal::Rasterizer::parse(rasterizer)?,
+        cache_bytes: cache_bytes.unwrap_or(block_cache::DEFAULT_CACHE_BYTES),
+        order: order::SpatialOrder::parse(spatial_order)?,
+        raster_out,
+        zone_values,
+        mask_cache: mask_cache.clone(),
+        sweep,
+    };
+    let mut stream = ZonalStream::spawn(vectors, raster, opts)?;
+    // Waiting for the first chunk here surfaces open/option errors from this
+    // call, where the dispatcher can still fall back, rather than mid-stream.
+    // GDAL I/O, rasterization and stats never touch Python objects, so the
+    // core runs with the GIL released; only dict building holds it.
+    let first = py.allow_threads(|| stream.next_chunk())?;
+    Ok(ZonalStatsIter {
+        stream,
+        pending: first.unwrap_or_default().into_iter(),
+        category_map: category_map.filter(|_| categorical).map(Bound::unbind),
+        mask_cache,
+    })
+}
+
+/// Zonal stats of one set of zones over several rasters in one pass.
+/// `rasters` holds `(name, path, stats, band, nodata)` entries; each
+/// feature's record carries every raster's stats as `{name}_{stat}`.
+/// Rasters sharing a grid share each feature's zone mask.
+#[pyfunction]
+#[pyo3(signature = (
+    vector_path,
+    rasters,
+    layer=LayerRef::Index(0),
+    all_touched=false,
+    boundless=true,
+    n_jobs=1,
+    rasterizer="native",
+    cache_bytes=None,
+    spatial_order=None,
+    bbox=None,
+    where_clause=None,
+    mask_cache=None,
+    mask_cache_bytes=None,
+))]
+fn zonal_stats_rasters(
+    py: Python<'_>,
+    vector_path: &Bound<'_, PyAny>,
+    rasters: Vec<(String, String, Option<Vec<String>>, isize, Option<f64>)>,
+    layer: LayerRef,
+    all_touched: bool,
+    boundless: bool,
+    n_jobs: isize,
+    rasterizer: &str,
+    cache_bytes: Option<usize>,
+    spatial_order: Option<&str>,
+    bbox: Option<[f64; 4]>,
+    where_clause: Option<String>,
+    mask_cache: Option<PathBuf>,
+    mask_cache_bytes: Option<u64>,
+) -> PyResult<ZonalStatsIter> {
+    let filter = LayerFilter { bbox, where_clause };
+    let vectors = vector_source(vector_path, layer, filter)?;
+    let mask_cache = open_mask_cache(mask_cache, mask_cache_bytes)?;
+    let rasterizer = zonal::Rasterizer::parse(rasterizer)?;
+    let opts = multi::MultiOptions {
+        n_jobs,
+        order: order::SpatialOrder::parse(spatial_order)?,
+        cache_bytes: cache_bytes.unwrap_or(block_cache::DEFAULT_CACHE_BYTES),
+    };
+    let rasters: Vec<multi::NamedRaster> = rasters
+        .into_iter()
+        .map(|(name, path, stats, band, nodata)| multi::NamedRaster {
+            name,
+            source: raster::RasterSource::Path(path),
+            opts: zonal::ZonalOptions {
+                bands: vec![band],
+                per_band: false,
+                nodata,
+                all_touched,
+                boundless,
+                plan: StatPlan::new(stats.unwrap_or_else(default_stats), false),
+                n_jobs,
+                rasterizer,
+                cache_bytes: 0,
+                order: opts.order,
+                raster_out: false,
+                zone_values: false,
+                mask_cache: mask_cache.clone(),
+                sweep: false,
+            },
+        })
+        .collect();
+    let mut stream = ZonalStream::spawn_with(move |counters, emit| {
+        multi::zonal_stats_multi_stream(&vectors, &rasters, &opts, counters, emit)
+    })?;
+    let first = py.allow_threads(|| stream.next_chunk())?;
+    Ok(ZonalStatsIter {
+        stream,
+        pending: first.unwrap_or_default().into_iter(),
+        category_map: None,
+        mask_cache,
+    })
+}
+
+/// The `mask_cache` directory, if one was given, bounded to
+/// `mask_cache_bytes` on disk.
+fn open_mask_cache(
+    dir: Option<PathBuf>,
+    budget_bytes: Option<u64>,
+) -> PyResult<Option<Arc<MaskCache>>> {
+    let Some(dir) = dir else {
+        return Ok(None);
+    };
+    let budget_bytes = budget_bytes.unwrap_or(mask_cache::DEFAULT_MASK_CACHE_BYTES);
+    Ok(Some(Arc::new(MaskCache::open(dir, budget_bytes)?)))
+}
+
+/// Resolves the `vector_path` argument: a string names an OGR dataset (whose
+/// `layer` is an index or a name, read through `filter`), an
+/// `__arrow_c_array__` exporter is a WKB column, and any other iterable
+/// yields one WKB `bytes` (or `None`) per feature. Geometries are packed into
+/// a single column here so the engine thread never needs the GIL.
+fn vector_source(
+    vectors: &Bound<'_, PyAny>,
+    layer: LayerRef,
+    filter: LayerFilter,
+) -> PyResult<VectorSource> {
+    if let Ok(path) = vectors.extract::<String>() {
+        return Ok(VectorSource::Layer { path, layer, filter });
+    }
+    if let Some(column) = arrow::wkb_column(vectors)? {
+        return Ok(VectorSource::Wkb(Arc::new(column)));
+    }
+    let items = vectors.iter().map_err(|_| {
+        PyTypeError::new_err("vectors must be a path, an Arrow WKB array or an iterable of WKB bytes")
+    })?;
+    let mut column = WkbColumn::with_capacity(vectors.len().unwrap_or(0), 0);
+    for item in items {
+        let item = item?;
+        if item.is_none() {
+            column.push(None);
+        } else {
+            column.push(Some(item.downcast::<PyBytes>()?.as_bytes()));
         }
-        out.push(result.into_py(py));
     }
+    Ok(VectorSource::Wkb(Arc::new(column)))
+}
 
-    Ok(out)
+/// Copies a 1-D buffer of `T` (e.g. a compressed numpy array), or `None` when
+/// its format is not `T`.
+fn buffer_values<T: Pixel + Element>(values: &Bound<'_, PyAny>) -> PyResult<Option<Vec<T>>> {
+    match PyBuffer::<T>::get_bound(values) {
+        Ok(buffer) => buffer.to_vec(values.py()).map(Some),
+        Err(_) => Ok(None),
+    }
+}
+
+/// Built-in stats over already-masked values, for zones rewritten by a
+/// Python `zone_func`. `values` must expose a native pixel type buffer.
+#[pyfunction]
+#[pyo3(signature = (values, stats=None, categorical=false, category_map=None))]
+fn masked_stats(
+    py: Python<'_>,
+    values: &Bound<'_, PyAny>,
+    stats: Option<Vec<String>>,
+    categorical: bool,
+    category_map: Option<Bound<'_, PyDict>>,
+) -> PyResult<PyObject> {
+    let plan = StatPlan::new(stats.unwrap_or_else(default_stats), categorical);
+    macro_rules! try_type {
+        ($($ty:ty),*) => {$(
+            if let Some(values) = buffer_values::<$ty>(values)? {
+                let record = py.allow_threads(|| plan.compute(values, 0, 0));
+                return record_to_dict(py, record, category_map.as_ref().filter(|_| categorical));
+            }
+        )*};
+    }
+    try_type!(u8, u16, i16, u32, i32, f32, f64);
+    Err(PyTypeError::new_err(
+        "values must be a 1-D buffer of uint8, uint16, int16, uint32, int32, float32 or float64",
+    ))
 }
 
 #[pyfunction]
@@ -82,23 +483,33 @@ fn zonal_stats_path(
     nodata=None,
     interpolate="bilinear",
     boundless=true,
+    geo_transform=None,
 ))]
 fn point_query_path(
-    raster_path: &str,
+    py: Python<'_>,
+    raster_path: &Bound<'_, PyAny>,
     coords: Vec<(f64, f64)>,
     band: isize,
     nodata: Option<f64>,
     interpolate: &str,
     boundless: bool,
+    geo_transform: Option<[f64; 6]>,
 ) -> PyResult<Vec<Option<f64>>> {
-    point::point_query_path(raster_path, &coords, band, nodata, interpolate, boundless)
-        .map_err(Into::into)
+    let raster = array::raster_source(raster_path, geo_transform)?;
+    py.allow_threads(|| {
+        point::point_query(&raster, &coords, band, nodata, interpolate, boundless)
+    })
+    .map_err(Into::into)
 }
 
 #[pymodule]
 fn _rs(m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(healthcheck, m)?)?;
     m.add_function(wrap_pyfunction!(zonal_stats_path, m)?)?;
+    m.add_function(wrap_pyfunction!(zonal_stats_rasters, m)?)?;
     m.add_function(wrap_pyfunction!(point_query_path, m)?)?;
+    m.add_function(wrap_pyfunction!(masked_stats, m)?)?;
+    m.add_class::<ZonalStatsIter>()?;
+    m.add_class::<PixelBuffer>()?;
     Ok(())
 }
@@ -0,0 +1,329 @@
+//! Persistent cache of rasterized zone masks.
+//!
+//! A feature's mask depends only on its geometry, the raster grid
+//! (geotransform, size and CRS) and the rasterization options, so runs over
+//! the same zones can load masks instead of burning them again, whichever
+//! raster on that grid they read. Masks are stored one file per feature as
+//! run lengths and evicted least recently used once the directory exceeds
+//! its byte budget. Recency is the file modification time, so it carries
+//! over between processes.
+//!
+//! The cache is best effort: unreadable or foreign entries are misses, and
+//! failed writes are dropped.
+
+use crate::block_cache::CacheCounters;
+use crate::errors::{OxrsError, OxrsResult};
+use std::collections::{BTreeMap, HashMap};
+use std::fs::{self, File};
+use std::path::PathBuf;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::{Arc, Mutex};
+use std::time::SystemTime;
+
+/// Default directory budget when callers do not pass `mask_cache_bytes`.
+pub const DEFAULT_MASK_CACHE_BYTES: u64 = 256 << 20;
+
+/// Bumped whenever the key inputs or the file layout change.
+const FORMAT: &[u8; 4] = b"OXM1";
+const SUFFIX: &str = "mask";
+
+/// 128-bit FNV-1a: stable across processes and Rust releases, unlike
+/// `std`'s hashers, and wide enough that colliding keys are not a concern.
+#[derive(Clone, Copy)]
+pub struct KeyHasher(u128);
+
+impl KeyHasher {
+    pub fn new() -> Self {
+        Self(0x6c62272e07bb014262b821756295c58d)
+    }
+
+    pub fn write(&mut self, bytes: &[u8]) -> &mut Self {
+        for &byte in bytes {
+            self.0 ^= u128::from(byte);
+            self.0 = self.0.wrapping_mul(0x0000000001000000000000000000013B);
+        }
+        self
+    }
+
+    pub fn finish(&self) -> u128 {
+        self.0
+    }
+}
+
+/// Run lengths of alternating 0 and 1 cells (starting with 0s) over the
+/// row-major mask, as LEB128 varints after the format tag and the size.
+fn encode(mask: &[u8], width: usize, height: usize) -> Vec<u8> {
+    let mut out = Vec::with_capacity(16 + mask.len() / 32);
+    out.extend_from_slice(FORMAT);
+    out.extend_from_slice(&(width as u32).to_le_bytes());
+    out.extend_from_slice(&(height as u32).to_le_bytes());
+    let mut push = |mut run: u64| loop {
+        let byte = (run & 0x7f) as u8;
+        run >>= 7;
+        if run == 0 {
+            out.push(byte);
+            break;
+        }
+        out.push(byte | 0x80);
+    };
+    let mut inside = false;
+    let mut run = 0u64;
+    for &cell in mask {
+        if (cell != 0) != inside {
+            push(run);
+            inside = !inside;
+            run = 0;
+        }
+        run += 1;
+    }
+    push(run);
+    out
+}
+
+/// Fills `mask` from `bytes` when they encode a `width * height` mask.
+fn decode(bytes: &[u8], width: usize, height: usize, mask: &mut Vec<u8>) -> bool {
+    let Some((header, mut runs)) = bytes.split_at_checked(12) else {
+        return false;
+    };
+    let size = |at: usize| u32::from_le_bytes(header[at..at + 4].try_into().unwrap()) as usize;
+    if &header[..4] != FORMAT || size(4) != width || size(8) != height {
+        return false;
+    }
+    let cells = width * height;
+    mask.clear();
+    let mut value = 0u8;
+    while !runs.is_empty() {
+        let mut run = 0u64;
+        let mut shift = 0;
+        loop {
+            let Some((&byte, rest)) = runs.split_first() else {
+                return false;
+            };
+            runs = rest;
+            if shift > 63 {
+                return false;
+            }
+            run |= u64::from(byte & 0x7f) << shift;
+            shift += 7;
+            if byte & 0x80 == 0 {
+                break;
+            }
+        }
+        let Some(end) = usize::try_from(run).ok().and_then(|run| run.checked_add(mask.len())) else {
+            return false;
+        };
+        if end > cells {
+            return false;
+        }
+        mask.resize(end, value);
+        value ^= 1;
+    }
+    mask.len() == cells
+}
+
+struct Entry {
+    bytes: u64,
+    last_used: u64,
+}
+
+#[derive(Default)]
+struct Index {
+    tick: u64,
+    used_bytes: u64,
+    entries: HashMap<u128, Entry>,
+    lru: BTreeMap<u64, u128>,
+}
+
+impl Index {
+    fn touch(&mut self, key: u128) {
+        self.tick += 1;
+        if let Some(entry) = self.entries.get_mut(&key) {
+            self.lru.remove(&entry.last_used);
+            entry.last_used = self.tick;
+            self.lru.insert(self.tick, key);
+        }
+    }
+
+    fn insert(&mut self, key: u128, bytes: u64) {
+        self.remove(key);
+        self.tick += 1;
+        self.used_bytes += bytes;
+        self.entries.insert(key, Entry { bytes, last_used: self.tick });
+        self.lru.insert(self.tick, key);
+    }
+
+    fn remove(&mut self, key: u128) {
+        if let Some(entry) = self.entries.remove(&key) {
+            self.lru.remove(&entry.last_used);
+            self.used_bytes -= entry.bytes;
+        }
+    }
+}
+
+/// A mask cache directory shared by every worker of a call.
+pub struct MaskCache {
+    dir: PathBuf,
+    budget_bytes: u64,
+    index: Mutex<Index>,
+    counters: Arc<CacheCounters>,
+    /// Distinguishes temporary files of concurrent writers.
+    writes: AtomicU64,
+}
+
+impl MaskCache {
+    /// Opens (creating if needed) the cache in `dir`, indexing existing
+    /// entries oldest first by modification time.
+    pub fn open(dir: impl Into<PathBuf>, budget_bytes: u64) -> OxrsResult<Self> {
+        let dir = dir.into();
+        let io_error = |e: std::io::Error| {
+            OxrsError::InvalidArgument(format!("mask cache {}: {e}", dir.display()))
+        };
+        fs::create_dir_all(&dir).map_err(io_error)?;
+        let mut found = Vec::new();
+        for item in fs::read_dir(&dir).map_err(io_error)? {
+            let Ok(item) = item else { continue };
+            let path = item.path();
+            if path.extension().and_then(|ext| ext.to_str()) != Some(SUFFIX) {
+                continue;
+            }
+            let key = path
+                .file_stem()
+                .and_then(|stem| stem.to_str())
+                .and_then(|stem| u128::from_str_radix(stem, 16).ok());
+            let (Some(key), Ok(meta)) = (key, item.metadata()) else {
+                continue;
+            };
+            found.push((meta.modified().unwrap_or(SystemTime::UNIX_EPOCH), key, meta.len()));
+        }
+        found.sort_unstable();
+        let mut index = Index::default();
+        for (_, key, bytes) in found {
+            index.insert(key, bytes);
+        }
+        let cache = Self {
+            dir,
+            budget_bytes,
+            index: Mutex::new(index),
+            counters: Arc::new(CacheCounters::default()),
+            writes: AtomicU64::new(0),
+        };
+        cache.evict();
+        Ok(cache)
+    }
+
+    /// `(hits, misses, evictions)` since this cache was opened.
+    pub fn counters(&self) -> (u64, u64, u64) {
+        self.counters.snapshot()
+    }
+
+    fn path(&self, key: u128) -> PathBuf {
+        self.dir.join(format!("{key:032x}.{SUFFIX}"))
+    }
+
+    fn index(&self) -> std::sync::MutexGuard<'_, Index> {
+        // The index holds no invariants a panicking holder could break.
+        self.index.lock().unwrap_or_else(|poisoned| poisoned.into_inner())
+    }
+
+    /// Loads the `width * height` mask stored under `key` into `mask`.
+    pub fn load(&self, key: u128, width: usize, height: usize, mask: &mut Vec<u8>) -> bool {
+        let path = self.path(key);
+        let hit = fs::read(&path).is_ok_and(|bytes| decode(&bytes, width, height, mask));
+        if hit {
+            self.counters.hits.fetch_add(1, Ordering::Relaxed);
+            self.index().touch(key);
+            // Recency for later processes; failing to record it is harmless.
+            let _ = File::options()
+                .append(true)
+                .open(&path)
+                .and_then(|file| file.set_modified(SystemTime::now()));
+        } else {
+            self.counters.misses.fetch_add(1, Ordering::Relaxed);
+        }
+        hit
+    }
+
+    /// Stores `mask` under `key`, then evicts down to the budget.
+    pub fn store(&self, key: u128, mask: &[u8], width: usize, height: usize) {
+        let bytes = encode(mask, width, height);
+        if bytes.len() as u64 > self.budget_bytes {
+            return;
+        }
+        // Written aside and renamed into place, so readers never see a
+        // partial file.
+        let write = self.writes.fetch_add(1, Ordering::Relaxed);
+        let tmp = self
+            .dir
+            .join(format!("{key:032x}.{}-{write}.tmp", std::process::id()));
+        let path = self.path(key);
+        if fs::write(&tmp, &bytes).and_then(|()| fs::rename(&tmp, &path)).is_err() {
+            let _ = fs::remove_file(&tmp);
+            return;
+        }
+        self.index().insert(key, bytes.len() as u64);
+        self.evict();
+    }
+
+    fn evict(&self) {
+        let mut index = self.index();
+        while index.used_bytes > self.budget_bytes {
+            let Some((_, victim)) = index.lru.pop_first() else {
+                break;
+            };
+            if let Some(entry) = index.entries.remove(&victim) {
+                index.used_bytes -= entry.bytes;
+                self.counters.evictions.fetch_add(1, Ordering::Relaxed);
+                let _ = fs::remove_file(self.path(victim));
+            }
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::{decode, encode, KeyHasher, MaskCache};
+
+    #[test]
+    fn masks_round_trip_through_run_lengths() {
+        let (width, height) = (7, 5);
+        let masks = [
+            vec![0u8; width * height],
+            vec![1u8; width * height],
+            (0..width * height).map(|i| u8::from(i % 3 == 0 || i > 20)).collect(),
+        ];
+        for mask in masks {
+            let bytes = encode(&mask, width, height);
+            let mut got = Vec::new();
+            assert!(decode(&bytes, width, height, &mut got));
+            assert_eq!(got, mask);
+            assert!(!decode(&bytes, height, width, &mut got));
+            assert!(!decode(&bytes[..bytes.len() - 1], width, height, &mut got));
+        }
+    }
+
+    #[test]
+    fn stored_masks_survive_reopening_and_are_evicted_oldest_first() {
+        let dir = std::env::temp_dir().join(format!("oxrs-mask-cache-{}", std::process::id()));
+        let _ = std::fs::remove_dir_all(&dir);
+        let mask: Vec<u8> = (0..64).map(|i| u8::from(i % 2 == 0)).collect();
+        let key = |n: u8| KeyHasher::new().write(&[n]).finish();
+        // Room for two entries of this mask, not three.
+        let entry_bytes = encode(&mask, 8, 8).len() as u64;
+        let cache = MaskCache::open(&dir, 2 * entry_bytes + 1).unwrap();
+        cache.store(key(1), &mask, 8, 8);
+        cache.store(key(2), &mask, 8, 8);
+        let mut got = Vec::new();
+        assert!(cache.load(key(1), 8, 8, &mut got));
+        assert_eq!(got, mask);
+        cache.store(key(3), &mask, 8, 8);
+
+        let reopened = MaskCache::open(&dir, 2 * entry_bytes + 1).unwrap();
+        assert!(reopened.load(key(1), 8, 8, &mut got));
+        assert!(!reopened.load(key(2), 8, 8, &mut got));
+        assert!(reopened.load(key(3), 8, 8, &mut got));
+        assert!(!reopened.load(key(1), 4, 16, &mut got));
+        assert_eq!(cache.counters(), (1, 0, 1));
+        assert_eq!(reopened.counters(), (2, 2, 0));
+        std::fs::remove_dir_all(&dir).unwrap();
+    }
+}
@@ -0,0 +1,219 @@
+//! Zonal stats of one set of zones over several rasters in a single pass:
+//! each feature is read once, and rasterized once per distinct raster grid.
+
+use crate::block_cache::CacheCounters;
+use crate::errors::{OxrsError, OxrsResult};
+use crate::order::SpatialOrder;
+use crate::raster::RasterSource;
+use crate::stats::StatRecord;
+use crate::vector::VectorSource;
+use crate::zonal::{open_grid_zones, stream_features, GridZones, ZonalOptions};
+use gdal::vector::Geometry;
+use std::sync::Arc;
+
+/// One raster of a many-raster run; its stats are keyed `{name}_{stat}`.
+pub struct NamedRaster {
+    pub name: String,
+    pub source: RasterSource,
+    /// Per-raster band, nodata and stats. Rasterization options
+    /// (`all_touched`, `rasterizer`) must agree across rasters for masks to
+    /// be shared; threading, ordering and caching come from `MultiOptions`.
+    pub opts: ZonalOptions,
+}
+
+pub struct MultiOptions {
+    pub n_jobs: isize,
+    pub order: SpatialOrder,
+    /// Decoded-block cache budget, split evenly across rasters and workers.
+    pub cache_bytes: usize,
+}
+
+/// Per-thread state: one zone worker per raster, in `rasters` order.
+struct MultiWorker {
+    workers: Vec<Box<dyn GridZones>>,
+    /// For each raster, the first raster on the same grid; that one burns
+    /// the zone mask and the others reuse it.
+    leads: Vec<usize>,
+}
+
+impl MultiWorker {
+    fn open(
+        rasters: &[NamedRaster],
+        cache_bytes: usize,
+        counters: &Arc<CacheCounters>,
+    ) -> OxrsResult<Self> {
+        let per_raster = cache_bytes / rasters.len().max(1);
+        let workers = rasters
+            .iter()
+            .map(|raster| open_grid_zones(&raster.source, &raster.opts, per_raster, counters))
+            .collect::<OxrsResult<Vec<_>>>()?;
+        let grids: Vec<_> = workers.iter().map(|worker| worker.grid()).collect();
+        let leads = grids
+            .iter()
+            .map(|grid| grids.iter().position(|other| other == grid).expect("grid is listed"))
+            .collect();
+        Ok(Self { workers, leads })
+    }
+
+    fn zone_stats(&mut self, geom: Option<&Geometry>, rasters: &[NamedRaster]) -> OxrsResult<StatRecord> {
+        let mut record = StatRecord::new();
+        for (index, raster) in rasters.iter().enumerate() {
+            let lead = self.leads[index];
+            let stats = if lead == index {
+                self.workers[index].zone_stats(geom, &raster.opts, None)?
+            } else {
+                let (earlier, rest) = self.workers.split_at_mut(index);
+                rest[0].zone_stats(geom, &raster.opts, Some(earlier[lead].mask()))?
+            };
+            record.merge_prefixed(stats, &format!("{}_", raster.name));
+        }
+        Ok(record)
+    }
+}
+
+/// Runs zonal stats of every feature over every raster, emitting one
+/// combined record per feature as `zonal::zonal_stats_stream` does.
+pub fn zonal_stats_multi_stream<F>(
+    vectors: &VectorSource,
+    rasters: &[NamedRaster],
+    opts: &MultiOptions,
+    counters: &Arc<CacheCounters>,
+    emit: F,
+) -> OxrsResult<()>
+where
+    F: FnMut(Vec<StatRecord>) -> bool,
+{
+    if rasters.is_empty() {
+        return Err(OxrsError::InvalidArgument("rasters must not be empty".to_string()));
+    }
+    for raster in rasters {
+        let raster_opts = &raster.opts;
+        if raster_opts.raster_out || raster_opts.zone_values || raster_opts.plan.categorical() {
+            return Err(OxrsError::InvalidArgument(
+                "categorical, raster_out and zone_values need a single raster".to_string(),
+            ));
+        }
+        if raster_opts.all_touched != rasters[0].opts.all_touched
+            || raster_opts.rasterizer != rasters[0].opts.rasterizer
+        {
+            return Err(OxrsError::InvalidArgument(
+                "all_touched and rasterizer must match across rasters".to_string(),
+            ));
+        }
+    }
+    stream_features(
+        vectors,
+        opts.n_jobs,
+        opts.order,
+        opts.cache_bytes,
+        |cache_bytes| MultiWorker::open(rasters, cache_bytes, counters),
+        |worker, geom| worker.zone_stats(geom, rasters),
+        emit,
+    )
+}
+
+#[cfg(test)]
+mod tests {
+    use super::{zonal_stats_multi_stream, MultiOptions, NamedRaster};
+    use crate::block_cache::CacheCounters;
+    use crate::order::SpatialOrder;
+    use crate::raster::{band_io, RasterSource};
+    use crate::stats::{StatPlan, StatRecord};
+    use crate::vector::{VectorSource, WkbColumn};
+    use crate::zonal::{self, Rasterizer, ZonalOptions};
+    use gdal::vector::Geometry;
+    use gdal::DriverManager;
+    use gdal_sys::GDALRWFlag;
+    use std::sync::Arc;
+
+    fn records(run: impl FnOnce(&mut dyn FnMut(Vec<StatRecord>) -> bool)) -> Vec<StatRecord> {
+        let mut records = Vec::new();
+        run(&mut |chunk| {
+            records.extend(chunk);
+            true
+        });
+        records
+    }
+
+    fn options(stats: &[&str]) -> ZonalOptions {
+        ZonalOptions {
+            bands: vec![1],
+            per_band: false,
+            nodata: None,
+            all_touched: false,
+            boundless: true,
+            plan: StatPlan::new(stats.iter().map(|s| s.to_string()).collect(), false),
+            n_jobs: 1,
+            rasterizer: Rasterizer::Native,
+            cache_bytes: 0,
+            order: SpatialOrder::Input,
+            raster_out: false,
+            zone_values: false,
+            mask_cache: None,
+            sweep: false,
+        }
+    }
+
+    #[test]
+    fn combined_records_match_single_raster_runs() {
+        // Two rasters on one grid and a third on a coarser one.
+        let specs = [
+            ("/vsimem/oxrs_multi_a.tif", 20usize, 1.0, 1i16),
+            ("/vsimem/oxrs_multi_b.tif", 20, 1.0, 3),
+            ("/vsimem/oxrs_multi_c.tif", 10, 2.0, 5),
+        ];
+        let driver = DriverManager::get_driver_by_name("GTiff").unwrap();
+        for (path, size, res, k) in specs {
+            let mut ds = driver.create_with_band_type::<i16, _>(path, size, size, 1).unwrap();
+            ds.set_geo_transform(&[0.0, res, 0.0, 20.0, 0.0, -res]).unwrap();
+            let band = ds.rasterband(1).unwrap();
+            let mut values: Vec<i16> = (0..size * size).map(|i| i as i16 * k).collect();
+            band_io(&band, GDALRWFlag::GF_Write, (0, 0), (size, size), &mut values, size).unwrap();
+        }
+        let mut column = WkbColumn::with_capacity(3, 0);
+        for wkt in [
+            Some("POLYGON ((1 1, 9 2, 7 11, 1 1))"),
+            None,
+            Some("POLYGON ((12.5 3, 25 3, 25 17, 12.5 3))"),
+        ] {
+            let wkb = wkt.map(|w| Geometry::from_wkt(w).unwrap().wkb().unwrap());
+            column.push(wkb.as_deref());
+        }
+        let vectors = VectorSource::Wkb(Arc::new(column));
+        let counters = Arc::new(CacheCounters::default());
+        let stats = ["count", "sum", "max"];
+        let rasters: Vec<NamedRaster> = specs
+            .iter()
+            .zip(["a", "b", "c"])
+            .map(|((path, ..), name)| NamedRaster {
+                name: name.to_string(),
+                source: RasterSource::Path(path.to_string()),
+                opts: options(&stats),
+            })
+            .collect();
+
+        for n_jobs in [1, 2] {
+            let opts = MultiOptions { n_jobs, order: SpatialOrder::Input, cache_bytes: 1 << 20 };
+            let combined = records(|emit| {
+                zonal_stats_multi_stream(&vectors, &rasters, &opts, &counters, emit).unwrap()
+            });
+            assert_eq!(combined.len(), 3);
+            for raster in &rasters {
+                let single = records(|emit| {
+                    zonal::zonal_stats_stream(&vectors, &raster.source, &raster.opts, &counters, emit)
+                        .unwrap()
+                });
+                for (got, expected) in combined.iter().zip(&single) {
+                    for stat in stats {
+                        let key = format!("{}_{stat}", raster.name);
+                        assert_eq!(got.floats.get(&key), expected.floats.get(stat), "{key}");
+                        assert_eq!(got.ints.get(&key), expected.ints.get(stat), "{key}");
+                    }
+                }
+            }
+        }
+        for (path, ..) in specs {
+            gdal::vsi::unlink_mem_file(path).unwrap();
+        }
+    }
+}
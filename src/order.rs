@@ -0,0 +1,166 @@
+//! Space-filling-curve ordering of features by envelope centroid.
+//!
+//! Processing features along a Hilbert (or Morton/Z-order) curve makes
+//! consecutive raster windows neighbours, so decoded blocks and the OS page
+//! cache are reused instead of thrashed by arbitrary input order.
+
+use crate::errors::{OxrsError, OxrsResult};
+
+/// Grid resolution per axis for curve keys.
+const CURVE_BITS: u32 = 16;
+
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+pub enum SpatialOrder {
+    /// Layer order.
+    Input,
+    Hilbert,
+    Morton,
+}
+
+impl SpatialOrder {
+    pub fn parse(name: Option<&str>) -> OxrsResult<Self> {
+        match name {
+            None | Some("input") => Ok(Self::Input),
+            Some("hilbert") => Ok(Self::Hilbert),
+            Some("morton") | Some("zorder") => Ok(Self::Morton),
+            Some(other) => Err(OxrsError::InvalidArgument(format!(
+                "spatial_order must be input, hilbert or morton, got {other}"
+            ))),
+        }
+    }
+}
+
+/// Distance of cell `(x, y)` along the Hilbert curve filling a
+/// `2^bits x 2^bits` grid.
+pub fn hilbert_index(bits: u32, mut x: u32, mut y: u32) -> u64 {
+    let n: u32 = 1 << bits;
+    let mut d: u64 = 0;
+    let mut s = n >> 1;
+    while s > 0 {
+        let rx = u32::from(x & s > 0);
+        let ry = u32::from(y & s > 0);
+        d += u64::from(s) * u64::from(s) * u64::from((3 * rx) ^ ry);
+        if ry == 0 {
+            if rx == 1 {
+                x = n - 1 - x;
+                y = n - 1 - y;
+            }
+            std::mem::swap(&mut x, &mut y);
+        }
+        s >>= 1;
+    }
+    d
+}
+
+/// Morton (Z-order) key: the bits of `x` and `y` interleaved, `x` lowest.
+pub fn morton_index(x: u32, y: u32) -> u64 {
+    fn spread(v: u32) -> u64 {
+        let mut v = u64::from(v);
+        v = (v | (v << 16)) & 0x0000_FFFF_0000_FFFF;
+        v = (v | (v << 8)) & 0x00FF_00FF_00FF_00FF;
+        v = (v | (v << 4)) & 0x0F0F_0F0F_0F0F_0F0F;
+        v = (v | (v << 2)) & 0x3333_3333_3333_3333;
+        v = (v | (v << 1)) & 0x5555_5555_5555_5555;
+        v
+    }
+    spread(x) | (spread(y) << 1)
+}
+
+/// Feature indices in processing order. Features without a centroid (no
+/// geometry) come first; ties keep input order.
+pub fn spatial_permutation(centroids: &[Option<(f64, f64)>], order: SpatialOrder) -> Vec<usize> {
+    let mut indices: Vec<usize> = (0..centroids.len()).collect();
+    if order == SpatialOrder::Input {
+        return indices;
+    }
+
+    let (mut min_x, mut min_y) = (f64::INFINITY, f64::INFINITY);
+    let (mut max_x, mut max_y) = (f64::NEG_INFINITY, f64::NEG_INFINITY);
+    for &(x, y) in centroids.iter().flatten() {
+        min_x = min_x.min(x);
+        min_y = min_y.min(y);
+        max_x = max_x.max(x);
+        max_y = max_y.max(y);
+    }
+    let cells = f64::from((1u32 << CURVE_BITS) - 1);
+    let to_cell = |v: f64, lo: f64, hi: f64| -> u32 {
+        if hi > lo && v.is_finite() {
+            ((v - lo) / (hi - lo) * cells).round().clamp(0.0, cells) as u32
+        } else {
+            0
+        }
+    };
+
+    let keys: Vec<u64> = centroids
+        .iter()
+        .map(|c| match c {
+            None => 0,
+            Some((x, y)) => {
+                let cx = to_cell(*x, min_x, max_x);
+                let cy = to_cell(*y, min_y, max_y);
+                let key = match order {
+                    SpatialOrder::Hilbert => hilbert_index(CURVE_BITS, cx, cy),
+                    _ => morton_index(cx, cy),
+                };
+                key + 1
+            }
+        })
+        .collect();
+    indices.sort_by_key(|&i| keys[i]);
+    indices
+}
+
+#[cfg(test)]
+mod tests {
+    use super::{hilbert_index, morton_index, spatial_permutation, SpatialOrder};
+
+    #[test]
+    fn hilbert_visits_adjacent_cells() {
+        assert_eq!(
+            [(0, 0), (0, 1), (1, 1), (1, 0)].map(|(x, y)| hilbert_index(1, x, y)),
+            [0, 1, 2, 3]
+        );
+
+        let bits = 3;
+        let side = 1u32 << bits;
+        let mut cells: Vec<(u64, u32, u32)> = (0..side)
+            .flat_map(|x| (0..side).map(move |y| (hilbert_index(bits, x, y), x, y)))
+            .collect();
+        cells.sort_unstable();
+        for (d, pair) in cells.windows(2).enumerate() {
+            assert_eq!(pair[0].0, d as u64);
+            let step = pair[0].1.abs_diff(pair[1].1) + pair[0].2.abs_diff(pair[1].2);
+            assert_eq!(step, 1);
+        }
+    }
+
+    #[test]
+    fn morton_interleaves_bits() {
+        assert_eq!(morton_index(1, 0), 1);
+        assert_eq!(morton_index(0, 1), 2);
+        assert_eq!(morton_index(3, 3), 15);
+        assert_eq!(morton_index(0xFFFF, 0), 0x5555_5555);
+    }
+
+    #[test]
+    fn permutation_groups_neighbours() {
+        let centroids = [
+            Some((0.0, 0.0)),
+            Some((100.0, 100.0)),
+            None,
+            Some((1.0, 0.0)),
+            Some((99.0, 100.0)),
+        ];
+        assert_eq!(
+            spatial_permutation(&centroids, SpatialOrder::Input),
+            vec![0, 1, 2, 3, 4]
+        );
+        for order in [SpatialOrder::Hilbert, SpatialOrder::Morton] {
+            let perm = spatial_permutation(&centroids, order);
+            assert_eq!(perm[0], 2);
+            let pos = |i: usize| perm.iter().position(|&p| p == i).unwrap();
+            assert_eq!(pos(0).abs_diff(pos(3)), 1);
+            assert_eq!(pos(1).abs_diff(pos(4)), 1);
+        }
+    }
+}
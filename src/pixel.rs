@@ -0,0 +1,251 @@
+//! Native band pixel types.
+//!
+//! Windows are read in the band's own GDAL data type, so a Byte band moves one
+//! byte per pixel instead of eight, and values are only widened to `f64` where
+//! a statistic needs it. Integer bands also sum exactly in `i64`.
+
+use gdal_sys::GDALDataType;
+use std::ffi::CStr;
+
+/// A plain numeric type GDAL can read a band into.
+///
+/// Implemented only for primitive numbers: every bit pattern is a valid value
+/// and alignment is at most 8, which the block cache relies on.
+pub trait Pixel: Copy + Default + PartialOrd + Send + Sync + 'static {
+    const GDAL_TYPE: GDALDataType::Type;
+    /// Integer types accumulate sums exactly as `i64`.
+    const INTEGER: bool;
+
+    fn to_f64(self) -> f64;
+
+    /// Exact integer value; only meaningful when `INTEGER` is true.
+    fn to_i64(self) -> i64;
+
+    fn is_finite(self) -> bool;
+
+    /// `value` as `Self` when it is exactly representable.
+    fn exact_from_f64(value: f64) -> Option<Self>;
+
+    /// Hands a window over as a runtime-typed buffer without copying it.
+    fn into_pixel_vec(values: Vec<Self>) -> PixelVec;
+
+    /// Whether `self` counts as nodata; `native` is `nodata` as `Self`, if any.
+    fn is_nodata(self, nodata: f64, native: Option<Self>) -> bool {
+        let _ = nodata;
+        native == Some(self)
+    }
+}
+
+macro_rules! integer_pixel {
+    ($($ty:ty => $gdal:ident, $variant:ident),* $(,)?) => {$(
+        impl Pixel for $ty {
+            const GDAL_TYPE: GDALDataType::Type = GDALDataType::$gdal;
+            const INTEGER: bool = true;
+
+            fn into_pixel_vec(values: Vec<Self>) -> PixelVec {
+                PixelVec::$variant(values)
+            }
+
+            fn to_f64(self) -> f64 {
+                self as f64
+            }
+
+            fn to_i64(self) -> i64 {
+                self as i64
+            }
+
+            fn is_finite(self) -> bool {
+                true
+            }
+
+            fn exact_from_f64(value: f64) -> Option<Self> {
+                let cast = value as $ty;
+                (cast as f64 == value).then_some(cast)
+            }
+        }
+    )*};
+}
+
+macro_rules! float_pixel {
+    ($($ty:ty => $gdal:ident, $variant:ident),* $(,)?) => {$(
+        impl Pixel for $ty {
+            const GDAL_TYPE: GDALDataType::Type = GDALDataType::$gdal;
+            const INTEGER: bool = false;
+
+            fn into_pixel_vec(values: Vec<Self>) -> PixelVec {
+                PixelVec::$variant(values)
+            }
+
+            fn to_f64(self) -> f64 {
+                self as f64
+            }
+
+            fn to_i64(self) -> i64 {
+                self as i64
+            }
+
+            fn is_finite(self) -> bool {
+                <$ty>::is_finite(self)
+            }
+
+            fn exact_from_f64(value: f64) -> Option<Self> {
+                let cast = value as $ty;
+                (cast as f64 == value).then_some(cast)
+            }
+
+            fn is_nodata(self, nodata: f64, _native: Option<Self>) -> bool {
+                (self as f64 - nodata).abs() <= f64::EPSILON
+            }
+        }
+    )*};
+}
+
+integer_pixel!(
+    u8 => GDT_Byte, U8,
+    u16 => GDT_UInt16, U16,
+    i16 => GDT_Int16, I16,
+    u32 => GDT_UInt32, U32,
+    i32 => GDT_Int32, I32,
+);
+
+float_pixel!(
+    f32 => GDT_Float32, F32,
+    f64 => GDT_Float64, F64,
+);
+
+/// Pixels whose type is only known at runtime, e.g. windows handed to Python.
+#[derive(Debug, Clone, PartialEq)]
+pub enum PixelVec {
+    U8(Vec<u8>),
+    U16(Vec<u16>),
+    I16(Vec<i16>),
+    U32(Vec<u32>),
+    I32(Vec<i32>),
+    F32(Vec<f32>),
+    F64(Vec<f64>),
+}
+
+impl PixelVec {
+    pub fn len(&self) -> usize {
+        match self {
+            Self::U8(v) => v.len(),
+            Self::U16(v) => v.len(),
+            Self::I16(v) => v.len(),
+            Self::U32(v) => v.len(),
+            Self::I32(v) => v.len(),
+            Self::F32(v) => v.len(),
+            Self::F64(v) => v.len(),
+        }
+    }
+
+    pub fn item_size(&self) -> usize {
+        match self {
+            Self::U8(_) => 1,
+            Self::U16(_) | Self::I16(_) => 2,
+            Self::U32(_) | Self::I32(_) | Self::F32(_) => 4,
+            Self::F64(_) => 8,
+        }
+    }
+
+    /// Native-order `struct` format code, as the buffer protocol expects.
+    pub fn format(&self) -> &'static CStr {
+        match self {
+            Self::U8(_) => c"B",
+            Self::U16(_) => c"H",
+            Self::I16(_) => c"h",
+            Self::U32(_) => c"I",
+            Self::I32(_) => c"i",
+            Self::F32(_) => c"f",
+            Self::F64(_) => c"d",
+        }
+    }
+
+    pub fn as_mut_ptr(&mut self) -> *mut u8 {
+        match self {
+            Self::U8(v) => v.as_mut_ptr(),
+            Self::U16(v) => v.as_mut_ptr().cast(),
+            Self::I16(v) => v.as_mut_ptr().cast(),
+            Self::U32(v) => v.as_mut_ptr().cast(),
+            Self::I32(v) => v.as_mut_ptr().cast(),
+            Self::F32(v) => v.as_mut_ptr().cast(),
+            Self::F64(v) => v.as_mut_ptr().cast(),
+        }
+    }
+}
+
+/// Calls `$body` with `$T` bound to the `Pixel` type for a GDAL data type.
+/// Types without a native mapping (64-bit integers, complex) read as `f64`.
+macro_rules! with_pixel_type {
+    ($data_type:expr, $T:ident => $body:expr) => {{
+        use gdal_sys::GDALDataType as Dt;
+        match $data_type {
+            Dt::GDT_Byte => {
+                type $T = u8;
+                $body
+            }
+            Dt::GDT_UInt16 => {
+                type $T = u16;
+                $body
+            }
+            Dt::GDT_Int16 => {
+                type $T = i16;
+                $body
+            }
+            Dt::GDT_UInt32 => {
+                type $T = u32;
+                $body
+            }
+            Dt::GDT_Int32 => {
+                type $T = i32;
+                $body
+            }
+            Dt::GDT_Float32 => {
+                type $T = f32;
+                $body
+            }
+            _ => {
+                type $T = f64;
+                $body
+            }
+        }
+    }};
+}
+
+pub(crate) use with_pixel_type;
+
+#[cfg(test)]
+mod tests {
+    use super::Pixel;
+
+    #[test]
+    fn nodata_matching_respects_representability() {
+        assert_eq!(u8::exact_from_f64(255.0), Some(255));
+        assert_eq!(u8::exact_from_f64(-999.0), None);
+        assert_eq!(i16::exact_from_f64(-9999.0), Some(-9999));
+        assert_eq!(i16::exact_from_f64(0.5), None);
+
+        assert!(255u8.is_nodata(255.0, u8::exact_from_f64(255.0)));
+        assert!(!0u8.is_nodata(-999.0, u8::exact_from_f64(-999.0)));
+        assert!((-3.5f32).is_nodata(-3.5, f32::exact_from_f64(-3.5)));
+        assert!(!f32::NAN.is_nodata(0.0, Some(0.0)));
+    }
+
+    #[test]
+    fn pixel_vec_keeps_the_native_buffer() {
+        let values = vec![1i16, -2, 3];
+        let ptr = values.as_ptr();
+        let mut wrapped = i16::into_pixel_vec(values);
+        assert_eq!(wrapped.as_mut_ptr().cast_const(), ptr.cast());
+        assert_eq!((wrapped.len(), wrapped.item_size()), (3, 2));
+        assert_eq!(wrapped.format().to_bytes(), b"h");
+        assert_eq!(f64::into_pixel_vec(vec![0.5]).format().to_bytes(), b"d");
+    }
+
+    #[test]
+    fn integer_widening_is_exact() {
+        assert_eq!(u32::MAX.to_i64(), 4_294_967_295);
+        assert_eq!((-32768i16).to_f64(), -32768.0);
+        assert!(!f64::INFINITY.is_finite());
+        assert!(7u16.is_finite());
+    }
+}
@@ -1,6 +1,6 @@
 use crate::errors::{OxrsError, OxrsResult};
 use crate::geom::require_finite;
-use crate::raster::RasterContext;
+use crate::raster::{RasterContext, RasterSource};
 
 fn bilinear(values: [[Option<f64>; 2]; 2], x: f64, y: f64) -> Option<f64> {
     if !(0.0..=1.0).contains(&x) || !(0.0..=1.0).contains(&y) {
@@ -31,8 +31,8 @@ fn bilinear(values: [[Option<f64>; 2]; 2], x: f64, y: f64) -> Option<f64> {
     )
 }
 
-pub fn point_query_path(
-    raster_path: &str,
+pub fn point_query(
+    raster: &RasterSource,
     coords: &[(f64, f64)],
     band: isize,
     nodata: Option<f64>,
@@ -45,7 +45,7 @@ pub fn point_query_path(
         ));
     }
 
-    let raster = RasterContext::open(raster_path, band, nodata)?;
+    let raster = RasterContext::open_source(raster, band, nodata)?;
     let mut out = Vec::with_capacity(coords.len());
 
     for (x, y) in coords {
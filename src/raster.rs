@@ -1,7 +1,102 @@
+use crate::block_cache::{BlockCache, CacheCounters};
 use crate::errors::{OxrsError, OxrsResult};
-use gdal::raster::Buffer;
+use crate::pixel::{with_pixel_type, Pixel};
+use gdal::config::{clear_thread_local_config_option, set_thread_local_config_option};
+use gdal::raster::RasterBand;
 use gdal::Dataset;
+use gdal_sys::{CPLErr, GDALDataType, GDALRWFlag};
+use pyo3::FromPyObject;
+use std::any::Any;
+use std::ffi::CStr;
+use std::os::raw::{c_int, c_void};
 use std::path::Path;
+use std::sync::Arc;
+
+/// Where a raster's pixels come from.
+#[derive(Clone)]
+pub enum RasterSource {
+    /// Anything `GDALOpen` accepts.
+    Path(String),
+    /// A single band in caller-owned memory (e.g. a numpy array).
+    Memory(MemoryRaster),
+}
+
+/// The `band` argument of `zonal_stats_path`: one band, a list of bands or
+/// `"all"`.
+#[derive(Clone, Debug, FromPyObject)]
+pub enum BandRef {
+    One(isize),
+    Many(Vec<isize>),
+    Name(String),
+}
+
+impl BandRef {
+    /// The bands to read and whether stats are per band (keys suffixed with
+    /// `_b{band}`). A one-element list is still per band.
+    pub fn resolve(&self, raster: &RasterSource) -> OxrsResult<(Vec<isize>, bool)> {
+        match self {
+            Self::One(band) => Ok((vec![*band], false)),
+            Self::Many(bands) if bands.is_empty() => Err(OxrsError::InvalidArgument(
+                "band list must not be empty".to_string(),
+            )),
+            Self::Many(bands) => Ok((bands.clone(), true)),
+            Self::Name(name) if name == "all" => {
+                let count = RasterContext::open_source(raster, 1, None)?.band_count();
+                Ok(((1..=count as isize).collect(), true))
+            }
+            Self::Name(name) => Err(OxrsError::InvalidArgument(format!(
+                "band must be an int, a list of ints or \"all\", got {name:?}"
+            ))),
+        }
+    }
+}
+
+/// A 2-D band in memory, opened as a GDAL MEM dataset over the same bytes so
+/// windows are read without copying the array first.
+#[derive(Clone)]
+pub struct MemoryRaster {
+    /// Address of the first pixel.
+    pub data: usize,
+    pub width: usize,
+    pub height: usize,
+    /// Byte steps between neighbouring columns and rows (any positive
+    /// layout, so C- and Fortran-ordered arrays both work).
+    pub pixel_offset: usize,
+    pub line_offset: usize,
+    /// GDAL data type name, e.g. `Float32`.
+    pub data_type: &'static str,
+    pub geo_transform: [f64; 6],
+    /// Keeps the memory alive (and its exporter locked) for as long as any
+    /// clone of this source, and so any dataset opened on it, exists.
+    pub owner: Arc<dyn Any + Send + Sync>,
+}
+
+impl MemoryRaster {
+    fn open(&self) -> OxrsResult<Dataset> {
+        let spec = format!(
+            "MEM:::DATAPOINTER={:#x},PIXELS={},LINES={},BANDS=1,DATATYPE={},PIXELOFFSET={},LINEOFFSET={}",
+            self.data, self.width, self.height, self.data_type, self.pixel_offset, self.line_offset
+        );
+        // GDAL refuses MEM::: names unless asked (a path string must not be
+        // able to read arbitrary memory). The spec is built here from memory
+        // we hold, and only this thread's open is allowed.
+        set_thread_local_config_option("GDAL_MEM_ENABLE_OPEN", "YES")?;
+        let opened = Dataset::open(Path::new(&spec));
+        clear_thread_local_config_option("GDAL_MEM_ENABLE_OPEN")?;
+        let mut dataset = opened?;
+        dataset.set_geo_transform(&self.geo_transform)?;
+        Ok(dataset)
+    }
+}
+
+impl RasterSource {
+    fn open_dataset(&self) -> OxrsResult<Dataset> {
+        match self {
+            Self::Path(path) => Ok(Dataset::open(Path::new(path))?),
+            Self::Memory(memory) => memory.open(),
+        }
+    }
+}
 
 #[derive(Clone, Copy, Debug)]
 pub struct Window {
@@ -11,6 +106,11 @@ pub struct Window {
     pub col_end: isize,
 }
 
+/// Owns one GDAL dataset handle for a single call or worker thread.
+///
+/// Contexts are `Send` (they move into worker threads and run with the GIL
+/// released) but deliberately not shared: concurrent Python threads each open
+/// their own context, so no GDAL handle is ever used from two threads at once.
 pub struct RasterContext {
     dataset: Dataset,
     band_index: usize,
@@ -19,10 +119,16 @@ pub struct RasterContext {
     inverse_geotransform: [f64; 6],
     width: usize,
     height: usize,
+    data_type: GDALDataType::Type,
+    block_cache: Option<BlockCache>,
 }
 
 impl RasterContext {
     pub fn open(path: &str, band: isize, nodata: Option<f64>) -> OxrsResult<Self> {
+        Self::open_source(&RasterSource::Path(path.to_string()), band, nodata)
+    }
+
+    pub fn open_source(source: &RasterSource, band: isize, nodata: Option<f64>) -> OxrsResult<Self> {
         if band < 1 {
             return Err(OxrsError::InvalidArgument(
                 "band must be >= 1".to_string(),
@@ -32,9 +138,10 @@ impl RasterContext {
             OxrsError::InvalidArgument("band must be a positive integer".to_string())
         })?;
 
-        let dataset = Dataset::open(Path::new(path))?;
+        let dataset = source.open_dataset()?;
         let raster_band = dataset.rasterband(band_index)?;
         let source_nodata = nodata.or_else(|| raster_band.no_data_value());
+        let data_type = unsafe { gdal_sys::GDALGetRasterDataType(raster_band.c_rasterband()) };
         let geotransform = dataset.geo_transform()?;
         let inverse_geotransform = invert_geo_transform(geotransform).ok_or_else(|| {
             OxrsError::Runtime("unable to invert raster geotransform".to_string())
@@ -48,9 +155,64 @@ impl RasterContext {
             nodata: source_nodata,
             geotransform,
             inverse_geotransform,
+            data_type,
+            block_cache: None,
         })
     }
 
+    /// Serves `read_window::<T>` calls from an LRU of decoded `T` blocks
+    /// holding at most `budget_bytes`. Left disabled when a single block
+    /// would not fit.
+    pub fn enable_block_cache<T: Pixel>(
+        &mut self,
+        budget_bytes: usize,
+        counters: Arc<CacheCounters>,
+    ) -> OxrsResult<()> {
+        let native_block = self.dataset.rasterband(self.band_index)?.block_size();
+        self.block_cache = BlockCache::new::<T>(native_block, budget_bytes, counters);
+        Ok(())
+    }
+
+    /// The band's native block size as `(columns, rows)`.
+    pub fn block_size(&self) -> OxrsResult<(usize, usize)> {
+        Ok(self.dataset.rasterband(self.band_index)?.block_size())
+    }
+
+    /// The band's native GDAL data type.
+    pub fn data_type(&self) -> GDALDataType::Type {
+        self.data_type
+    }
+
+    pub fn band_count(&self) -> usize {
+        self.dataset.raster_count() as usize
+    }
+
+    /// Native type and nodata (`nodata` overriding the band's own) of any
+    /// band of this dataset, for multi-band reads.
+    pub fn band_info(
+        &self,
+        band: isize,
+        nodata: Option<f64>,
+    ) -> OxrsResult<(GDALDataType::Type, Option<f64>)> {
+        let index = usize::try_from(band)
+            .ok()
+            .filter(|&index| index >= 1)
+            .ok_or_else(|| OxrsError::InvalidArgument("band must be >= 1".to_string()))?;
+        let raster_band = self.dataset.rasterband(index)?;
+        let data_type = unsafe { gdal_sys::GDALGetRasterDataType(raster_band.c_rasterband()) };
+        Ok((data_type, nodata.or_else(|| raster_band.no_data_value())))
+    }
+
+    /// Spatial reference as WKT (empty when the dataset has none).
+    pub fn projection(&self) -> String {
+        self.dataset.projection()
+    }
+
+    /// Geotransform and size in pixels.
+    pub fn grid(&self) -> ([f64; 6], usize, usize) {
+        (self.geotransform, self.width, self.height)
+    }
+
     pub fn world_to_pixel(&self, x: f64, y: f64) -> (f64, f64) {
         let gt = self.inverse_geotransform;
         let col = gt[0] + gt[1] * x + gt[2] * y;
@@ -73,25 +235,22 @@ impl RasterContext {
             return Ok(None);
         }
 
+        with_pixel_type!(self.data_type, P => self.read_value_native::<P>(row, col))
+    }
+
+    fn read_value_native<T: Pixel>(&self, row: isize, col: isize) -> OxrsResult<Option<f64>> {
         let raster_band = self.dataset.rasterband(self.band_index)?;
-        let buffer: Buffer<f64> = raster_band.read_as((col, row), (1, 1), (1, 1), None)?;
-        let value = buffer.data().first().copied();
-
-        Ok(match value {
-            None => None,
-            Some(v) if !v.is_finite() => None,
-            Some(v) => {
-                if self
-                    .nodata
-                    .map(|n| (v - n).abs() <= f64::EPSILON)
-                    .unwrap_or(false)
-                {
-                    None
-                } else {
-                    Some(v)
-                }
-            }
-        })
+        let mut pixel = [T::default()];
+        band_io(&raster_band, GDALRWFlag::GF_Read, (col, row), (1, 1), &mut pixel, 1)?;
+        let v = pixel[0];
+
+        if !v.is_finite() {
+            return Ok(None);
+        }
+        let is_nodata = self
+            .nodata
+            .is_some_and(|n| v.is_nodata(n, T::exact_from_f64(n)));
+        Ok(if is_nodata { None } else { Some(v.to_f64()) })
     }
 
     pub fn window_for_bounds_unclipped(
@@ -151,14 +310,21 @@ impl RasterContext {
         ]
     }
 
-    pub fn read_window_f64_boundless(
-        &self,
+    /// Reads `window` as `T` into `out` (resized to `width * height`), filling
+    /// cells outside the dataset with `fill`. The in-extent part is copied
+    /// from cached blocks when a `T` block cache is enabled, otherwise read by
+    /// GDAL straight into its rows of `out`; either way `out` keeps its
+    /// capacity across calls.
+    pub fn read_window<T: Pixel>(
+        &mut self,
         window: Window,
         boundless: bool,
-        fill_nodata: f64,
-    ) -> OxrsResult<(usize, usize, Vec<f64>)> {
+        fill: T,
+        out: &mut Vec<T>,
+    ) -> OxrsResult<(usize, usize)> {
+        out.clear();
         if window.row_end < window.row_start || window.col_end < window.col_start {
-            return Ok((0, 0, Vec::new()));
+            return Ok((0, 0));
         }
 
         if self.window_beyond_extent(window) && !boundless {
@@ -170,34 +336,144 @@ impl RasterContext {
 
         let width = (window.col_end - window.col_start + 1) as usize;
         let height = (window.row_end - window.row_start + 1) as usize;
-        let mut out = vec![fill_nodata; width * height];
+        out.resize(width * height, fill);
 
         let Some(overlap) = self.clip_window(window) else {
-            return Ok((width, height, out));
+            return Ok((width, height));
         };
 
-        let overlap_width = (overlap.col_end - overlap.col_start + 1) as usize;
-        let overlap_height = (overlap.row_end - overlap.row_start + 1) as usize;
         let raster_band = self.dataset.rasterband(self.band_index)?;
-        let overlap_buf: Buffer<f64> = raster_band.read_as(
-            (overlap.col_start, overlap.row_start),
-            (overlap_width, overlap_height),
-            (overlap_width, overlap_height),
-            None,
-        )?;
-        let (_, overlap_data) = overlap_buf.into_shape_and_vec();
+        let cache = self
+            .block_cache
+            .as_mut()
+            .filter(|cache| cache.pixel_type() == T::GDAL_TYPE);
+        let Some(cache) = cache else {
+            let overlap_width = (overlap.col_end - overlap.col_start + 1) as usize;
+            let overlap_height = (overlap.row_end - overlap.row_start + 1) as usize;
+            let dst_row_off = (overlap.row_start - window.row_start) as usize;
+            let dst_col_off = (overlap.col_start - window.col_start) as usize;
+            band_io(
+                &raster_band,
+                GDALRWFlag::GF_Read,
+                (overlap.col_start, overlap.row_start),
+                (overlap_width, overlap_height),
+                &mut out[dst_row_off * width + dst_col_off..],
+                width,
+            )?;
+            return Ok((width, height));
+        };
+
+        // The overlap is inside the raster, so its bounds are non-negative.
+        let (block_w, block_h) = cache.block_size();
+        let (col_start, col_end) = (overlap.col_start as usize, overlap.col_end as usize);
+        let (row_start, row_end) = (overlap.row_start as usize, overlap.row_end as usize);
+        for block_row in row_start / block_h..=row_end / block_h {
+            for block_col in col_start / block_w..=col_end / block_w {
+                let x0 = block_col * block_w;
+                let y0 = block_row * block_h;
+                let bw = block_w.min(self.width - x0);
+                let bh = block_h.min(self.height - y0);
+                let block = cache.get_or_load((block_col, block_row), bw * bh, |buf| {
+                    band_io(
+                        &raster_band,
+                        GDALRWFlag::GF_Read,
+                        (x0 as isize, y0 as isize),
+                        (bw, bh),
+                        buf,
+                        bw,
+                    )
+                })?;
+
+                let c0 = col_start.max(x0);
+                let c1 = col_end.min(x0 + bw - 1);
+                let n = c1 - c0 + 1;
+                for row in row_start.max(y0)..=row_end.min(y0 + bh - 1) {
+                    let src = (row - y0) * bw + (c0 - x0);
+                    let dst = (row as isize - window.row_start) as usize * width
+                        + (c0 as isize - window.col_start) as usize;
+                    out[dst..dst + n].copy_from_slice(&block[src..src + n]);
+                }
+            }
+        }
+
+        Ok((width, height))
+    }
+
+    /// Reads `window` of several `bands` with one `GDALDatasetRasterIO` call
+    /// into `out`: a `width * height` plane per band, in `bands` order, with
+    /// cells outside the dataset set to that band's entry of `fills`. Formats
+    /// that interleave bands decode each block once for all of them.
+    pub fn read_bands_window<T: Pixel>(
+        &self,
+        window: Window,
+        boundless: bool,
+        bands: &[usize],
+        fills: &[T],
+        out: &mut Vec<T>,
+    ) -> OxrsResult<(usize, usize)> {
+        debug_assert_eq!(bands.len(), fills.len());
+        out.clear();
+        if window.row_end < window.row_start || window.col_end < window.col_start {
+            return Ok((0, 0));
+        }
 
+        if self.window_beyond_extent(window) && !boundless {
+            return Err(OxrsError::InvalidArgument(
+                "Window/bounds is outside dataset extent, boundless reads are disabled"
+                    .to_string(),
+            ));
+        }
+
+        let width = (window.col_end - window.col_start + 1) as usize;
+        let height = (window.row_end - window.row_start + 1) as usize;
+        let plane = width * height;
+        let size = std::mem::size_of::<T>();
+        // `GDALDatasetRasterIO` takes the buffer spacing as C ints; a plane
+        // past 2 GiB would wrap and send GDAL writing through wrong offsets.
+        let spacing = |bytes: usize| {
+            c_int::try_from(bytes).map_err(|_| {
+                OxrsError::InvalidArgument(format!(
+                    "window of {width}x{height} cells is too large to read {} bands at once",
+                    bands.len()
+                ))
+            })
+        };
+        let (line_space, band_space) = (spacing(width * size)?, spacing(plane * size)?);
+        for &fill in fills {
+            out.resize(out.len() + plane, fill);
+        }
+
+        let Some(overlap) = self.clip_window(window) else {
+            return Ok((width, height));
+        };
+        let overlap_width = (overlap.col_end - overlap.col_start + 1) as usize;
+        let overlap_height = (overlap.row_end - overlap.row_start + 1) as usize;
         let dst_row_off = (overlap.row_start - window.row_start) as usize;
         let dst_col_off = (overlap.col_start - window.col_start) as usize;
-        for r in 0..overlap_height {
-            let src_start = r * overlap_width;
-            let src_end = src_start + overlap_width;
-            let dst_start = (dst_row_off + r) * width + dst_col_off;
-            let dst_end = dst_start + overlap_width;
-            out[dst_start..dst_end].copy_from_slice(&overlap_data[src_start..src_end]);
+        let mut band_map: Vec<c_int> = bands.iter().map(|&band| band as c_int).collect();
+        let rv = unsafe {
+            gdal_sys::GDALDatasetRasterIO(
+                self.dataset.c_dataset(),
+                GDALRWFlag::GF_Read,
+                overlap.col_start as c_int,
+                overlap.row_start as c_int,
+                overlap_width as c_int,
+                overlap_height as c_int,
+                out[dst_row_off * width + dst_col_off..].as_mut_ptr() as *mut c_void,
+                overlap_width as c_int,
+                overlap_height as c_int,
+                T::GDAL_TYPE,
+                band_map.len() as c_int,
+                band_map.as_mut_ptr(),
+                size as c_int,
+                line_space,
+                band_space,
+            )
+        };
+        if rv != CPLErr::CE_None {
+            return Err(OxrsError::Gdal(last_gdal_error_message()));
         }
-
-        Ok((width, height, out))
+        Ok((width, height))
     }
 
     pub fn window_beyond_extent(&self, window: Window) -> bool {
@@ -222,6 +498,53 @@ impl RasterContext {
     }
 }
 
+/// `GDALRasterIO` on a `size` block at `offset`, with buffer rows `line_width`
+/// elements apart in `buf`. GDAL converts to/from `T` as needed.
+pub(crate) fn band_io<T: Pixel>(
+    band: &RasterBand,
+    flag: GDALRWFlag::Type,
+    offset: (isize, isize),
+    size: (usize, usize),
+    buf: &mut [T],
+    line_width: usize,
+) -> OxrsResult<()> {
+    let (width, height) = size;
+    if width == 0 || height == 0 {
+        return Ok(());
+    }
+    if line_width < width || buf.len() < (height - 1) * line_width + width {
+        return Err(OxrsError::Runtime(
+            "raster I/O buffer is smaller than the requested block".to_string(),
+        ));
+    }
+
+    let rv = unsafe {
+        gdal_sys::GDALRasterIO(
+            band.c_rasterband(),
+            flag,
+            offset.0 as c_int,
+            offset.1 as c_int,
+            width as c_int,
+            height as c_int,
+            buf.as_mut_ptr() as *mut c_void,
+            width as c_int,
+            height as c_int,
+            T::GDAL_TYPE,
+            0,
+            (line_width * std::mem::size_of::<T>()) as c_int,
+        )
+    };
+    if rv != CPLErr::CE_None {
+        return Err(OxrsError::Gdal(last_gdal_error_message()));
+    }
+    Ok(())
+}
+
+fn last_gdal_error_message() -> String {
+    let msg = unsafe { CStr::from_ptr(gdal_sys::CPLGetLastErrorMsg()) };
+    msg.to_string_lossy().into_owned()
+}
+
 fn invert_geo_transform(gt: [f64; 6]) -> Option<[f64; 6]> {
     let det = gt[1] * gt[5] - gt[2] * gt[4];
     if det.abs() < 1e-15 {
@@ -238,3 +561,161 @@ fn invert_geo_transform(gt: [f64; 6]) -> Option<[f64; 6]> {
         gt[1] * inv_det,
     ])
 }
+
+#[cfg(test)]
+mod tests {
+    use super::{band_io, MemoryRaster, RasterContext, RasterSource, Window};
+    use crate::block_cache::CacheCounters;
+    use gdal::DriverManager;
+    use gdal_sys::{GDALDataType, GDALRWFlag};
+    use std::sync::Arc;
+
+    fn assert_send<T: Send>() {}
+
+    #[test]
+    fn raster_context_is_send() {
+        assert_send::<RasterContext>();
+    }
+
+    #[test]
+    fn block_cache_reads_match_direct_reads() {
+        let path = "/vsimem/oxrs_block_cache_test.tif";
+        let (width, height) = (300, 200);
+        {
+            let driver = DriverManager::get_driver_by_name("GTiff").unwrap();
+            let mut ds = driver.create_with_band_type::<f64, _>(path, width, height, 1).unwrap();
+            ds.set_geo_transform(&[0.0, 1.0, 0.0, 0.0, 0.0, -1.0]).unwrap();
+            let band = ds.rasterband(1).unwrap();
+            let mut values: Vec<f64> = (0..width * height).map(|i| i as f64).collect();
+            band_io(&band, GDALRWFlag::GF_Write, (0, 0), (width, height), &mut values, width).unwrap();
+        }
+
+        let mut direct = RasterContext::open(path, 1, None).unwrap();
+        let mut cached = RasterContext::open(path, 1, None).unwrap();
+        let counters = Arc::new(CacheCounters::default());
+        // Room for only a few blocks, so later windows evict earlier ones.
+        cached.enable_block_cache::<f64>(400_000, counters.clone()).unwrap();
+        assert_eq!(cached.data_type(), GDALDataType::GDT_Float64);
+
+        let windows = [
+            (0, 10, 0, 10),
+            (5, 120, 40, 299),
+            (-7, 30, -3, 20),
+            (150, 230, 250, 320),
+            (60, 61, 0, 299),
+        ];
+        let (mut expected, mut got) = (Vec::new(), Vec::new());
+        for _ in 0..2 {
+            for (row_start, row_end, col_start, col_end) in windows {
+                let window = Window { row_start, row_end, col_start, col_end };
+                let a = direct.read_window(window, true, -1.0, &mut expected).unwrap();
+                let b = cached.read_window(window, true, -1.0, &mut got).unwrap();
+                assert_eq!(a, b);
+                assert_eq!(expected, got, "{window:?}");
+            }
+        }
+
+        let (hits, misses, _) = counters.snapshot();
+        assert!(hits > 0 && misses > 0);
+        gdal::vsi::unlink_mem_file(path).unwrap();
+    }
+
+    #[test]
+    fn native_reads_match_widened_reads() {
+        let path = "/vsimem/oxrs_native_read_test.tif";
+        let (width, height) = (40, 30);
+        {
+            let driver = DriverManager::get_driver_by_name("GTiff").unwrap();
+            let mut ds = driver.create_with_band_type::<u8, _>(path, width, height, 1).unwrap();
+            ds.set_geo_transform(&[0.0, 1.0, 0.0, 0.0, 0.0, -1.0]).unwrap();
+            let band = ds.rasterband(1).unwrap();
+            let mut values: Vec<u8> = (0..width * height).map(|i| (i % 251) as u8).collect();
+            band_io(&band, GDALRWFlag::GF_Write, (0, 0), (width, height), &mut values, width).unwrap();
+        }
+
+        let mut raster = RasterContext::open(path, 1, Some(7.0)).unwrap();
+        assert_eq!(raster.data_type(), GDALDataType::GDT_Byte);
+        let window = Window { row_start: -2, row_end: 12, col_start: 30, col_end: 45 };
+        let (mut native, mut widened) = (Vec::<u8>::new(), Vec::<f64>::new());
+        raster.read_window(window, true, 0, &mut native).unwrap();
+        raster.read_window(window, true, 0.0, &mut widened).unwrap();
+        let native_widened: Vec<f64> = native.iter().map(|v| f64::from(*v)).collect();
+        assert_eq!(native_widened, widened);
+
+        assert_eq!(raster.read_value(0, 7, true).unwrap(), None);
+        assert_eq!(raster.read_value(0, 8, true).unwrap(), Some(8.0));
+        gdal::vsi::unlink_mem_file(path).unwrap();
+    }
+
+    #[test]
+    fn memory_rasters_read_in_place_in_either_order() {
+        let (width, height) = (5usize, 3usize);
+        let c_order: Vec<f32> = (0..width * height).map(|i| i as f32).collect();
+        // The same grid stored column-major, as a Fortran-ordered array is.
+        let f_order: Vec<f32> = (0..width * height)
+            .map(|i| c_order[(i % height) * width + i / height])
+            .collect();
+        let gt = [10.0, 2.0, 0.0, 20.0, 0.0, -2.0];
+        let source = |data: &Arc<Vec<f32>>, pixel_offset: usize, line_offset: usize| {
+            RasterSource::Memory(MemoryRaster {
+                data: data.as_ptr() as usize,
+                width,
+                height,
+                pixel_offset,
+                line_offset,
+                data_type: "Float32",
+                geo_transform: gt,
+                owner: data.clone(),
+            })
+        };
+        let c_data = Arc::new(c_order);
+        let f_data = Arc::new(f_order);
+
+        let window = Window { row_start: -1, row_end: 2, col_start: 1, col_end: 5 };
+        let mut reads = Vec::new();
+        for source in [source(&c_data, 4, 4 * width), source(&f_data, 4 * height, 4)] {
+            let mut raster = RasterContext::open_source(&source, 1, Some(-1.0)).unwrap();
+            assert_eq!(raster.window_geo_transform(window)[0], 12.0);
+            let mut out = Vec::<f32>::new();
+            raster.read_window(window, true, -1.0, &mut out).unwrap();
+            assert_eq!(raster.read_value(2, 4, false).unwrap(), Some(14.0));
+            reads.push(out);
+        }
+        assert_eq!(reads[0], reads[1]);
+        assert_eq!(&reads[0][..5], &[-1.0; 5]);
+        assert_eq!(&reads[0][5..10], &[1.0, 2.0, 3.0, 4.0, -1.0]);
+    }
+
+    #[test]
+    fn band_blocks_match_single_band_reads() {
+        let path = "/vsimem/oxrs_band_block_test.tif";
+        let (width, height) = (20, 15);
+        {
+            let driver = DriverManager::get_driver_by_name("GTiff").unwrap();
+            let mut ds = driver.create_with_band_type::<i16, _>(path, width, height, 3).unwrap();
+            ds.set_geo_transform(&[0.0, 1.0, 0.0, 0.0, 0.0, -1.0]).unwrap();
+            for index in 1..=3 {
+                let band = ds.rasterband(index).unwrap();
+                let mut values: Vec<i16> =
+                    (0..width * height).map(|i| (i * index) as i16).collect();
+                band_io(&band, GDALRWFlag::GF_Write, (0, 0), (width, height), &mut values, width)
+                    .unwrap();
+            }
+        }
+
+        let window = Window { row_start: -2, row_end: 6, col_start: 14, col_end: 22 };
+        let raster = RasterContext::open(path, 1, None).unwrap();
+        assert_eq!(raster.band_count(), 3);
+        let mut block = Vec::<i16>::new();
+        let (w, h) = raster.read_bands_window(window, true, &[3, 1], &[-3, -1], &mut block).unwrap();
+        assert_eq!(block.len(), 2 * w * h);
+        for (plane, (band, fill)) in block.chunks_exact(w * h).zip([(3, -3), (1, -1)]) {
+            let mut single = RasterContext::open(path, band, None).unwrap();
+            let mut expected = Vec::<i16>::new();
+            single.read_window(window, true, fill, &mut expected).unwrap();
+            assert_eq!(plane, &expected[..], "band {band}");
+        }
+        assert!(raster.read_bands_window(window, false, &[1], &[0], &mut block).is_err());
+        gdal::vsi::unlink_mem_file(path).unwrap();
+    }
+}
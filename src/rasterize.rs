@@ -0,0 +1,328 @@
+//! Native scanline rasterizer for polygon zone masks.
+//!
+//! Ports GDAL's `GDALdllImageFilledPolygon` (pixel-centre rule, even-odd fill
+//! across every ring of the geometry) and `GDALdllImageLineAllTouched` (ring
+//! outlines for `all_touched`) so masks match `gdal::raster::rasterize` without
+//! creating a MEM dataset per feature.
+
+/// One closed ring in window pixel/line coordinates.
+pub type Ring = Vec<(f64, f64)>;
+
+const EPSILON_INTERSECT: f64 = 1e-8;
+
+/// Inverts a geotransform exactly as `GDALInvGeoTransform` does, including its
+/// north-up shortcut, so pixel coordinates round the same way GDAL's do.
+pub fn gdal_inv_geo_transform(gt: [f64; 6]) -> Option<[f64; 6]> {
+    if gt[2] == 0.0 && gt[4] == 0.0 && gt[1] != 0.0 && gt[5] != 0.0 {
+        return Some([
+            -gt[0] / gt[1],
+            1.0 / gt[1],
+            0.0,
+            -gt[3] / gt[5],
+            0.0,
+            1.0 / gt[5],
+        ]);
+    }
+
+    let det = gt[1] * gt[5] - gt[2] * gt[4];
+    let magnitude = gt[1].abs().max(gt[2].abs()).max(gt[4].abs().max(gt[5].abs()));
+    if det.abs() <= 1e-10 * magnitude * magnitude {
+        return None;
+    }
+    let inv_det = 1.0 / det;
+    Some([
+        (gt[2] * gt[3] - gt[0] * gt[5]) * inv_det,
+        gt[5] * inv_det,
+        -gt[2] * inv_det,
+        (-gt[1] * gt[3] + gt[0] * gt[4]) * inv_det,
+        -gt[4] * inv_det,
+        gt[1] * inv_det,
+    ])
+}
+
+/// Applies an (inverse) geotransform in GDAL's evaluation order.
+pub fn apply_geo_transform(gt: &[f64; 6], x: f64, y: f64) -> (f64, f64) {
+    (gt[0] + x * gt[1] + y * gt[2], gt[3] + x * gt[4] + y * gt[5])
+}
+
+/// Burns `rings` into a row-major `width * height` mask (1 = inside).
+///
+/// The mask is not cleared first, so callers can burn several geometries.
+pub fn burn_polygon(rings: &[Ring], width: usize, height: usize, all_touched: bool, mask: &mut [u8]) {
+    debug_assert_eq!(mask.len(), width * height);
+    if width == 0 || height == 0 {
+        return;
+    }
+    if all_touched {
+        for ring in rings {
+            burn_line_all_touched(ring, width, height, mask);
+        }
+    }
+    fill_even_odd(rings, width, height, mask);
+}
+
+fn burn_span(mask: &mut [u8], width: usize, row: usize, x_start: i64, x_end: i64) {
+    let x_start = x_start.max(0);
+    let x_end = x_end.min(width as i64 - 1);
+    if x_start > x_end {
+        return;
+    }
+    let offset = row * width;
+    mask[offset + x_start as usize..=offset + x_end as usize].fill(1);
+}
+
+fn round_half_up(value: f64) -> i64 {
+    (value + 0.5).floor() as i64
+}
+
+fn fill_even_odd(rings: &[Ring], width: usize, height: usize, mask: &mut [u8]) {
+    let mut min_y = f64::INFINITY;
+    let mut max_y = f64::NEG_INFINITY;
+    let mut edge_count = 0;
+    for ring in rings {
+        edge_count += ring.len();
+        for &(_, y) in ring {
+            min_y = min_y.min(y);
+            max_y = max_y.max(y);
+        }
+    }
+    if edge_count == 0 {
+        return;
+    }
+
+    // GDAL truncates (not floors) the vertical extent before clamping.
+    let first_row = (min_y as i64).max(0);
+    let last_row = (max_y as i64).min(height as i64 - 1);
+    let max_x = width as i64 - 1;
+    let mut crossings: Vec<i64> = Vec::with_capacity(edge_count);
+
+    for row in first_row..=last_row {
+        let dy = row as f64 + 0.5;
+        crossings.clear();
+
+        for ring in rings {
+            let n = ring.len();
+            for i in 0..n {
+                let (ax, ay) = ring[if i == 0 { n - 1 } else { i - 1 }];
+                let (bx, by) = ring[i];
+
+                if (ay < dy && by < dy) || (ay > dy && by > dy) {
+                    continue;
+                }
+
+                let (x1, y1, x2, y2) = if ay < by {
+                    (ax, ay, bx, by)
+                } else if ay > by {
+                    (bx, by, ax, ay)
+                } else {
+                    // Horizontal edges lying on the scanline centre are burned
+                    // separately when walked right-to-left (bottom edges).
+                    if ax > bx {
+                        let hx1 = round_half_up(bx);
+                        let hx2 = round_half_up(ax);
+                        if hx1 <= max_x && hx2 > 0 {
+                            burn_span(mask, width, row as usize, hx1, hx2 - 1);
+                        }
+                    }
+                    continue;
+                };
+
+                if dy < y2 && dy >= y1 {
+                    let intersect = (dy - y1) * (x2 - x1) / (y2 - y1) + x1;
+                    crossings.push(round_half_up(intersect));
+                }
+            }
+        }
+
+        crossings.sort_unstable();
+        for pair in crossings.chunks_exact(2) {
+            if pair[0] <= max_x && pair[1] > 0 {
+                burn_span(mask, width, row as usize, pair[0], pair[1] - 1);
+            }
+        }
+    }
+}
+
+fn burn_line_all_touched(ring: &[(f64, f64)], width: usize, height: usize, mask: &mut [u8]) {
+    let w = width as f64;
+    let h = height as f64;
+    let wi = width as i64;
+    let hi = height as i64;
+    let mut burn = |col: i64, row: i64| {
+        if col >= 0 && col < wi && row >= 0 && row < hi {
+            mask[row as usize * width + col as usize] = 1;
+        }
+    };
+
+    for seg in ring.windows(2) {
+        let (mut x, mut y) = seg[0];
+        let (mut x_end, mut y_end) = seg[1];
+
+        if (y < 0.0 && y_end < 0.0)
+            || (y > h && y_end > h)
+            || (x < 0.0 && x_end < 0.0)
+            || (x > w && x_end > w)
+        {
+            continue;
+        }
+
+        if x > x_end {
+            std::mem::swap(&mut x, &mut x_end);
+            std::mem::swap(&mut y, &mut y_end);
+        }
+
+        // Near-vertical segment: a single column.
+        if (x - x_end).abs() < 0.01 {
+            if y_end < y {
+                std::mem::swap(&mut y, &mut y_end);
+            }
+            let col = x_end.floor() as i64;
+            if col < 0 || col >= wi {
+                continue;
+            }
+            let row_start = (y.floor() as i64).max(0);
+            let row_end = ((y_end - EPSILON_INTERSECT).floor() as i64).min(hi - 1);
+            for row in row_start..=row_end {
+                burn(col, row);
+            }
+            continue;
+        }
+
+        let slope = (y_end - y) / (x_end - x);
+
+        // Near-horizontal segment: a single row.
+        if (y - y_end).abs() < 0.01 {
+            let row = y.floor() as i64;
+            if row < 0 || row >= hi {
+                continue;
+            }
+            let col_start = (x.floor() as i64).max(0);
+            let col_end = ((x_end - EPSILON_INTERSECT).floor() as i64).min(wi - 1);
+            for col in col_start..=col_end {
+                burn(col, row);
+            }
+            continue;
+        }
+
+        // General case: clip to the raster, then step pixel by pixel.
+        if x_end > w {
+            y_end -= (x_end - w) * slope;
+            x_end = w;
+        }
+        if x < 0.0 {
+            y += (0.0 - x) * slope;
+            x = 0.0;
+        }
+        if y_end > y {
+            if y < 0.0 {
+                x += (0.0 - y) / slope;
+                y = 0.0;
+            }
+            if y_end >= h {
+                x_end += (y_end - h) / slope;
+            }
+        } else {
+            if y >= h {
+                x += (h - y) / slope;
+                y = h;
+            }
+            if y_end < 0.0 {
+                x_end -= y_end / slope;
+            }
+        }
+
+        while x >= 0.0 && x < x_end {
+            let col = x.floor() as i64;
+            let row = y.floor() as i64;
+            burn(col, row);
+
+            let mut step_x = (x + 1.0).floor() - x;
+            let mut step_y = step_x * slope;
+
+            if (y + step_y).floor() as i64 == row {
+                x += step_x;
+                y += step_y;
+            } else if slope < 0.0 {
+                step_y = row as f64 - y;
+                if step_y > -EPSILON_INTERSECT {
+                    step_y = -EPSILON_INTERSECT;
+                }
+                step_x = step_y / slope;
+                x += step_x;
+                y += step_y;
+            } else {
+                step_y = (row + 1) as f64 - y;
+                if step_y < EPSILON_INTERSECT {
+                    step_y = EPSILON_INTERSECT;
+                }
+                step_x = step_y / slope;
+                x += step_x;
+                y += step_y;
+            }
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::{burn_polygon, gdal_inv_geo_transform, Ring};
+
+    fn square(x0: f64, y0: f64, x1: f64, y1: f64) -> Ring {
+        vec![(x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0, y0)]
+    }
+
+    fn burned(rings: &[Ring], width: usize, height: usize, all_touched: bool) -> Vec<u8> {
+        let mut mask = vec![0u8; width * height];
+        burn_polygon(rings, width, height, all_touched, &mut mask);
+        mask
+    }
+
+    #[test]
+    fn pixel_aligned_square_burns_interior_only() {
+        let mask = burned(&[square(1.0, 1.0, 3.0, 3.0)], 4, 4, false);
+        #[rustfmt::skip]
+        let expected = vec![
+            0, 0, 0, 0,
+            0, 1, 1, 0,
+            0, 1, 1, 0,
+            0, 0, 0, 0,
+        ];
+        assert_eq!(mask, expected);
+    }
+
+    #[test]
+    fn centre_rule_excludes_partial_pixels() {
+        // Covers the centres of columns 1..=2 only.
+        let mask = burned(&[square(0.6, 0.0, 2.6, 1.0)], 4, 1, false);
+        assert_eq!(mask, vec![0, 1, 1, 0]);
+    }
+
+    #[test]
+    fn all_touched_adds_partial_pixels() {
+        let mask = burned(&[square(0.6, 0.6, 2.6, 0.9)], 4, 1, true);
+        assert_eq!(mask, vec![1, 1, 1, 0]);
+        let none = burned(&[square(0.6, 0.6, 2.6, 0.9)], 4, 1, false);
+        assert_eq!(none, vec![0, 0, 0, 0]);
+    }
+
+    #[test]
+    fn holes_use_even_odd_fill() {
+        let rings = vec![square(0.0, 0.0, 5.0, 5.0), square(2.0, 2.0, 3.0, 3.0)];
+        let mask = burned(&rings, 5, 5, false);
+        assert_eq!(mask.iter().filter(|v| **v == 1).count(), 24);
+        assert_eq!(mask[2 * 5 + 2], 0);
+    }
+
+    #[test]
+    fn geometry_outside_window_is_clipped() {
+        let mask = burned(&[square(-3.0, -3.0, 0.5, 0.5)], 3, 3, true);
+        assert_eq!(mask, vec![1, 0, 0, 0, 0, 0, 0, 0, 0]);
+    }
+
+    #[test]
+    fn north_up_inverse_matches_gdal_shortcut() {
+        let inv = gdal_inv_geo_transform([100.0, 2.0, 0.0, 50.0, 0.0, -2.0]).unwrap();
+        assert_eq!(inv, [-50.0, 0.5, 0.0, 25.0, 0.0, -0.5]);
+        assert!(gdal_inv_geo_transform([0.0, 0.0, 0.0, 0.0, 0.0, 0.0]).is_none());
+    }
+}
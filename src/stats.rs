@@ -1,10 +1,25 @@
+use crate::pixel::{Pixel, PixelVec};
 use std::cmp::Ordering;
 use std::collections::{BTreeMap, HashMap};
 
+/// A categorical pixel value: integer bands report integer keys, float bands
+/// float keys, as `np.unique(...).item()` does upstream.
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub enum CategoryKey {
+    Int(i64),
+    Float(f64),
+}
+
 #[derive(Debug, Clone)]
 pub struct StatRecord {
     pub floats: BTreeMap<String, Option<f64>>,
     pub ints: BTreeMap<String, i64>,
+    /// Per-value pixel counts in ascending value order (`categorical`).
+    pub categories: Vec<(CategoryKey, i64)>,
+    /// The zone's window and mask (`raster_out`).
+    pub mini_raster: Option<MiniRaster>,
+    /// The zone's valid values in row-major order (`batch_stats`).
+    pub zone_values: Option<PixelVec>,
 }
 
 impl StatRecord {
@@ -12,51 +27,112 @@ impl StatRecord {
         Self {
             floats: BTreeMap::new(),
             ints: BTreeMap::new(),
+            categories: Vec::new(),
+            mini_raster: None,
+            zone_values: None,
         }
     }
+
+    /// Moves `other`'s stats into this record with `prefix` prepended to each
+    /// key (many-raster records hold `relief_mean`, `nlcd_mean`, ...).
+    pub fn merge_prefixed(&mut self, other: StatRecord, prefix: &str) {
+        self.floats
+            .extend(other.floats.into_iter().map(|(k, v)| (format!("{prefix}{k}"), v)));
+        self.ints
+            .extend(other.ints.into_iter().map(|(k, v)| (format!("{prefix}{k}"), v)));
+    }
+
+    /// Moves `other`'s stats into this record with `suffix` appended to each
+    /// key (multi-band records hold `count_b1`, `count_b2`, ...).
+    pub fn merge_suffixed(&mut self, other: StatRecord, suffix: &str) {
+        self.floats
+            .extend(other.floats.into_iter().map(|(k, v)| (format!("{k}{suffix}"), v)));
+        self.ints
+            .extend(other.ints.into_iter().map(|(k, v)| (format!("{k}{suffix}"), v)));
+    }
 }
 
-fn sort_values(values: &[f64]) -> Vec<f64> {
-    let mut sorted = values.to_vec();
-    sorted.sort_by(|a, b| a.partial_cmp(b).unwrap_or(Ordering::Equal));
-    sorted
+/// A feature's raster window in the band's native type, row-major, with the
+/// upstream mask: 1 where a cell is outside the zone, nodata or NaN.
+#[derive(Debug, Clone)]
+pub struct MiniRaster {
+    pub data: PixelVec,
+    pub mask: Vec<u8>,
+    /// The rasterized geometry alone (1 = inside), upstream's `rv_array`.
+    pub zone: Vec<u8>,
+    pub width: usize,
+    pub height: usize,
+    pub geo_transform: [f64; 6],
+    pub nodata: f64,
 }
 
-fn percentile(sorted: &[f64], q: f64) -> f64 {
-    if sorted.is_empty() {
+/// Ranks (`floor`/`ceil` of the interpolation position) that `percentile`
+/// reads for `q` over `n` values.
+fn percentile_ranks(n: usize, q: f64) -> [usize; 2] {
+    let q = q.clamp(0.0, 100.0);
+    let pos = (q / 100.0) * (n as f64 - 1.0);
+    [pos.floor() as usize, pos.ceil() as usize]
+}
+
+fn cmp_pixels<T: Pixel>(a: &T, b: &T) -> Ordering {
+    a.partial_cmp(b).unwrap_or(Ordering::Equal)
+}
+
+/// Partially orders `values` so every position in `ranks` (sorted, unique,
+/// absolute; `offset` is the index of `values[0]`) holds the element a full
+/// sort would put there. Each level splits on the middle rank, so all ranks
+/// are placed in one O(n log r) partitioning pass.
+fn select_ranks<T: Pixel>(values: &mut [T], ranks: &[usize], offset: usize) {
+    if ranks.is_empty() || values.len() <= 1 {
+        return;
+    }
+    let mid = ranks.len() / 2;
+    let k = ranks[mid] - offset;
+    let (left, _, right) = values.select_nth_unstable_by(k, cmp_pixels);
+    select_ranks(left, &ranks[..mid], offset);
+    select_ranks(right, &ranks[mid + 1..], offset + k + 1);
+}
+
+/// Interpolated percentile of `n` sorted values, `at(rank)` giving the value
+/// at a `percentile_ranks` position.
+fn interpolate_percentile(n: usize, q: f64, at: impl Fn(usize) -> f64) -> f64 {
+    if n == 0 {
         return f64::NAN;
     }
-    if sorted.len() == 1 {
-        return sorted[0];
+    if n == 1 {
+        return at(0);
     }
     let q = q.clamp(0.0, 100.0);
-    let n = sorted.len() as f64;
-    let pos = (q / 100.0) * (n - 1.0);
-    let low = pos.floor() as usize;
-    let high = pos.ceil() as usize;
+    let pos = (q / 100.0) * (n as f64 - 1.0);
+    let [low, high] = percentile_ranks(n, q);
     if low == high {
-        sorted[low]
+        at(low)
     } else {
         let weight = pos - (low as f64);
-        (sorted[low] * (1.0 - weight)) + (sorted[high] * weight)
+        (at(low) * (1.0 - weight)) + (at(high) * weight)
     }
 }
 
-fn histogram(values: &[f64]) -> HashMap<u64, usize> {
+/// Interpolated percentile over values that are sorted at least at the
+/// `percentile_ranks` positions for `q`.
+#[cfg(test)]
+fn percentile<T: Pixel>(sorted: &[T], q: f64) -> f64 {
+    interpolate_percentile(sorted.len(), q, |rank| sorted[rank].to_f64())
+}
+
+fn histogram<T: Pixel>(values: &[T]) -> HashMap<u64, usize> {
     let mut map = HashMap::new();
     for v in values {
-        *map.entry(v.to_bits()).or_insert(0) += 1;
+        *map.entry(v.to_f64().to_bits()).or_insert(0) += 1;
     }
     map
 }
 
-fn mode_value(values: &[f64], majority: bool) -> Option<f64> {
-    if values.is_empty() {
-        return None;
-    }
-    let hist = histogram(values);
+/// Most (or least) frequent value from `(f64 bits, count)` pairs; ties go to
+/// the smaller bit pattern so hash and dense counting agree.
+fn select_mode(counts: impl Iterator<Item = (u64, usize)>, majority: bool) -> Option<f64> {
     let mut selected: Option<(u64, usize)> = None;
-    for (bits, count) in hist {
+    for (bits, count) in counts {
         selected = match selected {
             None => Some((bits, count)),
             Some((prev_bits, prev_count)) => {
@@ -76,108 +152,424 @@ fn mode_value(values: &[f64], majority: bool) -> Option<f64> {
     selected.map(|(bits, _)| f64::from_bits(bits))
 }
 
-pub fn compute_stats(
-    values: &[f64],
-    stats: &[String],
-    nodata_count: usize,
-    nan_count: usize,
-) -> StatRecord {
-    let mut record = StatRecord::new();
-
-    if values.is_empty() {
-        for stat in stats {
-            if stat == "count" {
-                record.ints.insert(stat.clone(), 0);
-            } else if stat == "nodata" {
-                record.floats.insert(stat.clone(), Some(nodata_count as f64));
-            } else if stat == "nan" {
-                record.floats.insert(stat.clone(), Some(nan_count as f64));
+fn mode_value<T: Pixel>(values: &[T], majority: bool) -> Option<f64> {
+    select_mode(histogram(values).into_iter(), majority)
+}
+
+/// Per-value counts through the hash histogram, ascending by value.
+fn category_counts<T: Pixel>(values: &[T]) -> Vec<(CategoryKey, i64)> {
+    let mut counts: Vec<(f64, i64)> = histogram(values)
+        .into_iter()
+        .map(|(bits, count)| (f64::from_bits(bits), count as i64))
+        .collect();
+    counts.sort_unstable_by(|a, b| a.0.total_cmp(&b.0));
+    counts
+        .into_iter()
+        .map(|(value, count)| {
+            let key = if T::INTEGER {
+                CategoryKey::Int(value as i64)
             } else {
-                record.floats.insert(stat.clone(), None);
-            }
+                CategoryKey::Float(value)
+            };
+            (key, count)
+        })
+        .collect()
+}
+
+/// Dense histograms are used up to this many bins...
+const DENSE_MAX_BINS: u64 = 1 << 20;
+/// ...as long as the bins do not outnumber the values by much; this floor
+/// keeps Byte/Int16-style spans dense even for small zones.
+const DENSE_MIN_BINS: u64 = 1 << 12;
+
+/// Value counts indexed by `value - base` for integer zones with a small
+/// span: O(n + span) frequency and order stats, no hashing or sorting.
+struct DenseCounts {
+    base: i64,
+    counts: Vec<usize>,
+}
+
+impl DenseCounts {
+    /// `None` when the span `[min, max]` is too wide relative to `values`.
+    fn build<T: Pixel>(values: &[T], min: i64, max: i64) -> Option<Self> {
+        let span = max.abs_diff(min) + 1;
+        if span > DENSE_MAX_BINS || span > (4 * values.len() as u64).max(DENSE_MIN_BINS) {
+            return None;
         }
-        return record;
+        let mut counts = vec![0usize; span as usize];
+        for v in values {
+            counts[(v.to_i64() - min) as usize] += 1;
+        }
+        Some(Self { base: min, counts })
     }
 
-    let sorted = sort_values(values);
-    let count = values.len() as i64;
-    let sum: f64 = values.iter().sum();
-    let mean = sum / (count as f64);
-    let min = *sorted.first().unwrap_or(&f64::NAN);
-    let max = *sorted.last().unwrap_or(&f64::NAN);
+    fn occupied(&self) -> impl Iterator<Item = (i64, usize)> + '_ {
+        self.counts
+            .iter()
+            .enumerate()
+            .filter(|(_, c)| **c > 0)
+            .map(|(i, c)| (self.base + i as i64, *c))
+    }
 
-    for stat in stats {
-        match stat.as_str() {
-            "min" => {
-                record.floats.insert(stat.clone(), Some(min));
-            }
-            "max" => {
-                record.floats.insert(stat.clone(), Some(max));
-            }
-            "mean" => {
-                record.floats.insert(stat.clone(), Some(mean));
-            }
-            "sum" => {
-                record.floats.insert(stat.clone(), Some(sum));
-            }
-            "count" => {
-                record.ints.insert(stat.clone(), count);
-            }
-            "std" => {
-                let var = values.iter().map(|v| (v - mean).powi(2)).sum::<f64>() / (count as f64);
-                record.floats.insert(stat.clone(), Some(var.sqrt()));
-            }
-            "median" => {
-                let med = percentile(&sorted, 50.0);
-                record.floats.insert(stat.clone(), Some(med));
-            }
-            "majority" => {
-                record
-                    .floats
-                    .insert(stat.clone(), mode_value(values, true));
-            }
-            "minority" => {
-                record
-                    .floats
-                    .insert(stat.clone(), mode_value(values, false));
-            }
-            "unique" => {
-                let unique = histogram(values).len() as i64;
-                record.ints.insert(stat.clone(), unique);
-            }
-            "range" => {
-                record.floats.insert(stat.clone(), Some(max - min));
-            }
-            "nodata" => {
-                record
-                    .floats
-                    .insert(stat.clone(), Some(nodata_count as f64));
+    fn unique(&self) -> usize {
+        self.counts.iter().filter(|c| **c > 0).count()
+    }
+
+    fn mode(&self, majority: bool) -> Option<f64> {
+        select_mode(self.occupied().map(|(v, c)| ((v as f64).to_bits(), c)), majority)
+    }
+
+    /// Values at `ranks` (sorted ascending) in one cumulative walk.
+    fn rank_values(&self, ranks: &[usize]) -> Vec<f64> {
+        let mut out = Vec::with_capacity(ranks.len());
+        let mut next = ranks.iter().peekable();
+        let mut seen = 0;
+        for (value, count) in self.occupied() {
+            seen += count;
+            while next.next_if(|r| **r < seen).is_some() {
+                out.push(value as f64);
             }
-            "nan" => {
-                record.floats.insert(stat.clone(), Some(nan_count as f64));
+            if next.peek().is_none() {
+                break;
             }
-            _ if stat.starts_with("percentile_") => {
-                let q = stat
-                    .split('_')
+        }
+        out
+    }
+}
+
+/// One requested statistic, parsed once per call.
+#[derive(Clone, Copy, Debug, PartialEq)]
+enum Stat {
+    Min,
+    Max,
+    Mean,
+    Sum,
+    Count,
+    Std,
+    Median,
+    Majority,
+    Minority,
+    Unique,
+    Range,
+    Nodata,
+    Nan,
+    Percentile(f64),
+    Unknown,
+}
+
+impl Stat {
+    fn parse(name: &str) -> Self {
+        match name {
+            "min" => Self::Min,
+            "max" => Self::Max,
+            "mean" => Self::Mean,
+            "sum" => Self::Sum,
+            "count" => Self::Count,
+            "std" => Self::Std,
+            "median" => Self::Median,
+            "majority" => Self::Majority,
+            "minority" => Self::Minority,
+            "unique" => Self::Unique,
+            "range" => Self::Range,
+            "nodata" => Self::Nodata,
+            "nan" => Self::Nan,
+            _ if name.starts_with("percentile_") => Self::Percentile(
+                name.split('_')
                     .last()
                     .and_then(|v| v.parse::<f64>().ok())
-                    .unwrap_or(50.0);
-                record
-                    .floats
-                    .insert(stat.clone(), Some(percentile(&sorted, q)));
+                    .unwrap_or(50.0),
+            ),
+            _ => Self::Unknown,
+        }
+    }
+}
+
+/// A requested stat list compiled once per call.
+///
+/// Cheap stats come from `Moments`, accumulated in the same pass that walks
+/// the mask; the masked values are only kept when an order or frequency
+/// stat needs them, and order stats select just the ranks they read.
+#[derive(Clone, Debug)]
+pub struct StatPlan {
+    stats: Vec<(String, Stat)>,
+    categorical: bool,
+    needs_std: bool,
+    needs_values: bool,
+    quantiles: Vec<f64>,
+}
+
+impl StatPlan {
+    pub fn new(stats: Vec<String>, categorical: bool) -> Self {
+        let stats: Vec<(String, Stat)> = stats
+            .into_iter()
+            .map(|name| {
+                let stat = Stat::parse(&name);
+                (name, stat)
+            })
+            .collect();
+        let has = |pred: fn(&Stat) -> bool| stats.iter().any(|(_, s)| pred(s));
+        let quantiles: Vec<f64> = stats
+            .iter()
+            .filter_map(|(_, s)| match s {
+                Stat::Median => Some(50.0),
+                Stat::Percentile(q) => Some(*q),
+                _ => None,
+            })
+            .collect();
+        Self {
+            needs_std: has(|s| *s == Stat::Std),
+            needs_values: categorical
+                || !quantiles.is_empty()
+                || has(|s| matches!(s, Stat::Majority | Stat::Minority | Stat::Unique)),
+            quantiles,
+            categorical,
+            stats,
+        }
+    }
+
+    pub fn categorical(&self) -> bool {
+        self.categorical
+    }
+
+    /// Whether `finish` needs the masked values themselves.
+    pub fn needs_values(&self) -> bool {
+        self.needs_values
+    }
+
+    pub fn moments<T: Pixel>(&self) -> Moments<T> {
+        Moments::new(self.needs_std)
+    }
+
+    /// Record for a zone with no valid pixels.
+    pub fn empty_record(&self, nodata_count: usize, nan_count: usize) -> StatRecord {
+        let mut record = StatRecord::new();
+        for (name, stat) in &self.stats {
+            match stat {
+                Stat::Count => {
+                    record.ints.insert(name.clone(), 0);
+                }
+                Stat::Nodata => {
+                    record.floats.insert(name.clone(), Some(nodata_count as f64));
+                }
+                Stat::Nan => {
+                    record.floats.insert(name.clone(), Some(nan_count as f64));
+                }
+                _ => {
+                    record.floats.insert(name.clone(), None);
+                }
             }
-            _ => {
-                record.floats.insert(stat.clone(), None);
+        }
+        record
+    }
+
+    /// Stats over values that are already masked, such as a zone array
+    /// returned by a Python `zone_func`. Non-finite values count as `nan`.
+    pub fn compute<T: Pixel>(&self, mut values: Vec<T>, nodata_count: usize, nan_count: usize) -> StatRecord {
+        let before = values.len();
+        values.retain(|v| v.is_finite());
+        let nan_count = nan_count + (before - values.len());
+        let mut moments = self.moments::<T>();
+        for v in &values {
+            moments.push(*v);
+        }
+        if !self.needs_values {
+            values.clear();
+        }
+        self.finish(&moments, &mut values, nodata_count, nan_count)
+    }
+
+    /// Builds the record from `moments` and, when `needs_values`, the same
+    /// masked `values` (partially reordered in place for order stats).
+    pub fn finish<T: Pixel>(
+        &self,
+        moments: &Moments<T>,
+        values: &mut [T],
+        nodata_count: usize,
+        nan_count: usize,
+    ) -> StatRecord {
+        if moments.count == 0 {
+            return self.empty_record(nodata_count, nan_count);
+        }
+        debug_assert!(!self.needs_values || values.len() == moments.count);
+
+        // Integer zones with a small value span count into dense bins;
+        // otherwise order stats select their ranks and frequency stats hash.
+        let dense = match (T::INTEGER && self.needs_values, moments.min, moments.max) {
+            (true, Some(lo), Some(hi)) => DenseCounts::build(values, lo.to_i64(), hi.to_i64()),
+            _ => None,
+        };
+        let mut ranks: Vec<usize> = self
+            .quantiles
+            .iter()
+            .flat_map(|q| percentile_ranks(values.len(), *q))
+            .collect();
+        ranks.sort_unstable();
+        ranks.dedup();
+        let rank_values = match &dense {
+            Some(dense) => dense.rank_values(&ranks),
+            None => {
+                select_ranks(values, &ranks, 0);
+                ranks.iter().map(|r| values[*r].to_f64()).collect()
             }
+        };
+        let quantile = |q: f64| {
+            interpolate_percentile(values.len(), q, |rank| {
+                rank_values[ranks.binary_search(&rank).expect("rank selected above")]
+            })
+        };
+
+        let count = moments.count as i64;
+        let sum = moments.sum();
+        let mean = sum / (count as f64);
+        let min = moments.min.map_or(f64::NAN, |v| v.to_f64());
+        let max = moments.max.map_or(f64::NAN, |v| v.to_f64());
+
+        let mut record = StatRecord::new();
+        if self.categorical {
+            record.categories = match &dense {
+                Some(dense) => dense.occupied().map(|(v, c)| (CategoryKey::Int(v), c as i64)).collect(),
+                None => category_counts(values),
+            };
         }
+        for (name, stat) in &self.stats {
+            let name = name.clone();
+            match *stat {
+                Stat::Min => {
+                    record.floats.insert(name, Some(min));
+                }
+                Stat::Max => {
+                    record.floats.insert(name, Some(max));
+                }
+                Stat::Mean => {
+                    record.floats.insert(name, Some(mean));
+                }
+                Stat::Sum => {
+                    record.floats.insert(name, Some(sum));
+                }
+                Stat::Count => {
+                    record.ints.insert(name, count);
+                }
+                Stat::Std => {
+                    record.floats.insert(name, Some((moments.m2 / (count as f64)).sqrt()));
+                }
+                Stat::Median => {
+                    record.floats.insert(name, Some(quantile(50.0)));
+                }
+                Stat::Majority | Stat::Minority => {
+                    let majority = *stat == Stat::Majority;
+                    let mode = match &dense {
+                        Some(dense) => dense.mode(majority),
+                        None => mode_value(values, majority),
+                    };
+                    record.floats.insert(name, mode);
+                }
+                Stat::Unique => {
+                    let unique = match &dense {
+                        Some(dense) => dense.unique(),
+                        None => histogram(values).len(),
+                    };
+                    record.ints.insert(name, unique as i64);
+                }
+                Stat::Range => {
+                    record.floats.insert(name, Some(max - min));
+                }
+                Stat::Nodata => {
+                    record.floats.insert(name, Some(nodata_count as f64));
+                }
+                Stat::Nan => {
+                    record.floats.insert(name, Some(nan_count as f64));
+                }
+                Stat::Percentile(q) => {
+                    record.floats.insert(name, Some(quantile(q)));
+                }
+                Stat::Unknown => {
+                    record.floats.insert(name, None);
+                }
+            }
+        }
+        record
     }
+}
 
-    record
+/// Single-pass count/sum/min/max, plus Welford's running variance when
+/// `std` is requested.
+#[derive(Clone, Debug)]
+pub struct Moments<T> {
+    count: usize,
+    sum_int: i64,
+    sum_float: f64,
+    min: Option<T>,
+    max: Option<T>,
+    track_std: bool,
+    welford_mean: f64,
+    m2: f64,
+}
+
+impl<T: Pixel> Moments<T> {
+    fn new(track_std: bool) -> Self {
+        Self {
+            count: 0,
+            sum_int: 0,
+            sum_float: 0.0,
+            min: None,
+            max: None,
+            track_std,
+            welford_mean: 0.0,
+            m2: 0.0,
+        }
+    }
+
+    #[inline]
+    pub fn push(&mut self, v: T) {
+        self.count += 1;
+        if T::INTEGER {
+            self.sum_int += v.to_i64();
+        } else {
+            self.sum_float += v.to_f64();
+        }
+        if self.min.map_or(true, |m| v < m) {
+            self.min = Some(v);
+        }
+        if self.max.map_or(true, |m| v > m) {
+            self.max = Some(v);
+        }
+        if self.track_std {
+            let x = v.to_f64();
+            let delta = x - self.welford_mean;
+            self.welford_mean += delta / self.count as f64;
+            self.m2 += delta * (x - self.welford_mean);
+        }
+    }
+
+    /// Sum of the pushed values, exact in `i64` for integer pixel types.
+    fn sum(&self) -> f64 {
+        if T::INTEGER {
+            self.sum_int as f64
+        } else {
+            self.sum_float
+        }
+    }
+}
+
+/// Convenience for callers holding all values already: one plan, one pass.
+#[cfg(test)]
+pub fn compute_stats<T: Pixel>(
+    values: &[T],
+    stats: &[String],
+    nodata_count: usize,
+    nan_count: usize,
+) -> StatRecord {
+    let plan = StatPlan::new(stats.to_vec(), false);
+    plan.compute(values.to_vec(), nodata_count, nan_count)
 }
 
 #[cfg(test)]
 mod tests {
-    use super::compute_stats;
+    use super::{compute_stats, percentile, percentile_ranks, select_ranks, CategoryKey, StatPlan};
+
+    fn plan(stats: &[&str]) -> StatPlan {
+        StatPlan::new(stats.iter().map(|s| s.to_string()).collect(), false)
+    }
 
     #[test]
     fn stats_basics() {
@@ -188,4 +580,154 @@ mod tests {
         assert_eq!(rec.floats.get("mean").copied().flatten(), Some(2.0));
         assert_eq!(rec.ints.get("count").copied(), Some(3));
     }
+
+    #[test]
+    fn native_integer_stats_match_f64() {
+        let stats: Vec<String> = ["sum", "mean", "std", "median", "majority", "unique", "percentile_25"]
+            .iter()
+            .map(|s| s.to_string())
+            .collect();
+        let native: Vec<i16> = vec![-3, 7, 7, 120, -32768, 0, 7, 32767];
+        let widened: Vec<f64> = native.iter().map(|v| f64::from(*v)).collect();
+
+        let a = compute_stats(&native, &stats, 1, 0);
+        let b = compute_stats(&widened, &stats, 1, 0);
+        assert_eq!(a.floats, b.floats);
+        assert_eq!(a.ints, b.ints);
+    }
+
+    #[test]
+    fn cheap_stats_skip_the_value_buffer() {
+        assert!(!plan(&["count", "mean", "min", "max", "sum", "range", "std", "nodata"]).needs_values());
+        assert!(plan(&["count", "median"]).needs_values());
+        assert!(plan(&["majority"]).needs_values());
+        assert!(plan(&["percentile_90"]).needs_values());
+
+        let plan = plan(&["count", "mean", "std", "range"]);
+        let mut moments = plan.moments::<f32>();
+        for v in [4.0f32, 8.0, -2.0, 10.0] {
+            moments.push(v);
+        }
+        let rec = plan.finish(&moments, &mut [], 2, 1);
+        assert_eq!(rec.ints.get("count").copied(), Some(4));
+        assert_eq!(rec.floats.get("mean").copied().flatten(), Some(5.0));
+        assert_eq!(rec.floats.get("range").copied().flatten(), Some(12.0));
+        let std = rec.floats.get("std").copied().flatten().unwrap();
+        assert!((std - 21.0f64.sqrt()).abs() < 1e-12);
+    }
+
+    #[test]
+    fn empty_zone_reports_counts_only() {
+        let rec = plan(&["count", "nodata", "nan", "mean"]).finish::<u8>(&plan(&[]).moments(), &mut [], 3, 1);
+        assert_eq!(rec.ints.get("count").copied(), Some(0));
+        assert_eq!(rec.floats.get("nodata").copied().flatten(), Some(3.0));
+        assert_eq!(rec.floats.get("nan").copied().flatten(), Some(1.0));
+        assert_eq!(rec.floats.get("mean").copied(), Some(None));
+    }
+
+    #[test]
+    fn selected_percentiles_match_full_sort() {
+        let mut state: u64 = 0x2545_f491_4f6c_dd1d;
+        let mut next = || {
+            state ^= state << 13;
+            state ^= state >> 7;
+            state ^= state << 17;
+            state
+        };
+        let quantiles = [0.0, 1.0, 12.5, 25.0, 33.3, 50.0, 66.6, 75.0, 90.0, 99.0, 100.0];
+        for n in [1, 2, 3, 10, 101, 1000, 4097] {
+            // Few distinct values so ties straddle the selected ranks.
+            let values: Vec<f64> = (0..n).map(|_| (next() % 37) as f64 * 0.5).collect();
+            let mut sorted = values.clone();
+            sorted.sort_by(|a, b| a.partial_cmp(b).unwrap());
+
+            let mut ranks: Vec<usize> = quantiles.iter().flat_map(|q| percentile_ranks(n, *q)).collect();
+            ranks.sort_unstable();
+            ranks.dedup();
+            let mut selected = values.clone();
+            select_ranks(&mut selected, &ranks, 0);
+
+            for q in quantiles {
+                assert_eq!(percentile(&selected, q), percentile(&sorted, q), "n={n} q={q}");
+            }
+        }
+    }
+
+    #[test]
+    fn dense_counts_match_hash_and_select() {
+        let stats: Vec<String> = [
+            "majority", "minority", "unique", "median", "percentile_10", "percentile_97.5", "count",
+        ]
+        .iter()
+        .map(|s| s.to_string())
+        .collect();
+        // Negative values with tied counts exercise the shared tie rule.
+        let small_span: Vec<i32> = vec![-4, -4, 3, 3, 0, 9, 9, -1, 250, 17, 17, -4, 3];
+        let bytes: Vec<u8> = (0..5000u32).map(|i| (i * 7919 % 253) as u8).collect();
+
+        let a = compute_stats(&small_span, &stats, 0, 0);
+        let widened: Vec<f64> = small_span.iter().map(|v| f64::from(*v)).collect();
+        let b = compute_stats(&widened, &stats, 0, 0);
+        assert_eq!(a.floats, b.floats);
+        assert_eq!(a.ints, b.ints);
+
+        let a = compute_stats(&bytes, &stats, 0, 0);
+        let widened: Vec<f64> = bytes.iter().map(|v| f64::from(*v)).collect();
+        let b = compute_stats(&widened, &stats, 0, 0);
+        assert_eq!(a.floats, b.floats);
+        assert_eq!(a.ints, b.ints);
+    }
+
+    #[test]
+    fn dense_counts_skip_wide_spans() {
+        assert!(super::DenseCounts::build(&[0u8, 255], 0, 255).is_some());
+        assert!(super::DenseCounts::build(&[i32::MIN, i32::MAX], i32::MIN as i64, i32::MAX as i64).is_none());
+    }
+
+    #[test]
+    fn categorical_counts_use_native_keys() {
+        let plan = StatPlan::new(vec!["count".to_string()], true);
+        let mut values: Vec<u8> = vec![11, 41, 11, 90, 41, 11];
+        let mut moments = plan.moments::<u8>();
+        values.iter().for_each(|v| moments.push(*v));
+        let rec = plan.finish(&moments, &mut values, 0, 0);
+        assert_eq!(
+            rec.categories,
+            vec![(CategoryKey::Int(11), 3), (CategoryKey::Int(41), 2), (CategoryKey::Int(90), 1)]
+        );
+        assert_eq!(rec.ints.get("count").copied(), Some(6));
+
+        let mut values: Vec<f32> = vec![2.5, -1.0, 2.5];
+        let mut moments = plan.moments::<f32>();
+        values.iter().for_each(|v| moments.push(*v));
+        let rec = plan.finish(&moments, &mut values, 0, 0);
+        assert_eq!(rec.categories, vec![(CategoryKey::Float(-1.0), 1), (CategoryKey::Float(2.5), 2)]);
+
+        let wide: Vec<i32> = vec![i32::MAX, i32::MIN, i32::MAX];
+        let mut values = wide.clone();
+        let mut moments = plan.moments::<i32>();
+        wide.iter().for_each(|v| moments.push(*v));
+        let rec = plan.finish(&moments, &mut values, 0, 0);
+        assert_eq!(
+            rec.categories,
+            vec![(CategoryKey::Int(i32::MIN as i64), 1), (CategoryKey::Int(i32::MAX as i64), 2)]
+        );
+        assert!(plan.empty_record(4, 0).categories.is_empty());
+    }
+
+    #[test]
+    fn compute_counts_non_finite_values_as_nan() {
+        let rec = plan(&["count", "sum", "nan", "nodata"]).compute(vec![1.0f32, f32::NAN, 2.0, f32::INFINITY], 3, 1);
+        assert_eq!(rec.ints.get("count").copied(), Some(2));
+        assert_eq!(rec.floats.get("sum").copied().flatten(), Some(3.0));
+        assert_eq!(rec.floats.get("nan").copied().flatten(), Some(3.0));
+        assert_eq!(rec.floats.get("nodata").copied().flatten(), Some(3.0));
+    }
+
+    #[test]
+    fn integer_sums_are_exact() {
+        let values = vec![u32::MAX; 3];
+        let rec = compute_stats(&values, &["sum".to_string()], 0, 0);
+        assert_eq!(rec.floats.get("sum").copied().flatten(), Some(3.0 * 4_294_967_295.0));
+    }
 }
@@ -0,0 +1,88 @@
+//! Background producer that feeds zonal records to the Python iterator.
+//!
+//! The engine runs on its own thread and hands chunks over a bounded channel,
+//! so Python sees the first records while later features are still being
+//! processed and at most `QUEUE_DEPTH` chunks are ever held in memory.
+
+use crate::block_cache::CacheCounters;
+use crate::errors::{OxrsError, OxrsResult};
+use crate::raster::RasterSource;
+use crate::stats::StatRecord;
+use crate::vector::VectorSource;
+use crate::zonal::{self, ZonalOptions};
+use std::sync::mpsc::{sync_channel, Receiver};
+use std::sync::Arc;
+use std::thread::JoinHandle;
+
+/// Chunks buffered ahead of the consumer before the producer blocks.
+const QUEUE_DEPTH: usize = 2;
+
+type Message = OxrsResult<Vec<StatRecord>>;
+
+pub struct ZonalStream {
+    rx: Receiver<Message>,
+    producer: Option<JoinHandle<()>>,
+    counters: Arc<CacheCounters>,
+}
+
+impl ZonalStream {
+    pub fn spawn(
+        vectors: VectorSource,
+        raster: RasterSource,
+        opts: ZonalOptions,
+    ) -> OxrsResult<Self> {
+        Self::spawn_with(move |counters, emit| {
+            zonal::zonal_stats_stream(&vectors, &raster, &opts, counters, emit)
+        })
+    }
+
+    /// Streams the records of `run`, a zonal engine call that hands chunks
+    /// to the emit callback it is given and adds cache activity to the
+    /// counters.
+    pub fn spawn_with<R>(run: R) -> OxrsResult<Self>
+    where
+        R: FnOnce(&Arc<CacheCounters>, &mut dyn FnMut(Vec<StatRecord>) -> bool) -> OxrsResult<()>
+            + Send
+            + 'static,
+    {
+        let (tx, rx) = sync_channel::<Message>(QUEUE_DEPTH);
+        let counters = Arc::new(CacheCounters::default());
+        let producer_counters = counters.clone();
+        let producer = std::thread::Builder::new()
+            .name("oxrs-zonal".to_string())
+            .spawn(move || {
+                // A failed send means the consumer was dropped: stop quietly.
+                let result = run(&producer_counters, &mut |chunk| tx.send(Ok(chunk)).is_ok());
+                if let Err(err) = result {
+                    let _ = tx.send(Err(err));
+                }
+            })
+            .map_err(|e| OxrsError::Runtime(e.to_string()))?;
+        Ok(Self {
+            rx,
+            producer: Some(producer),
+            counters,
+        })
+    }
+
+    /// Block cache `(hits, misses, evictions)` so far, across all workers.
+    pub fn cache_counters(&self) -> (u64, u64, u64) {
+        self.counters.snapshot()
+    }
+
+    /// Blocks until the next chunk is ready; `None` once the producer is done.
+    pub fn next_chunk(&mut self) -> OxrsResult<Option<Vec<StatRecord>>> {
+        match self.rx.recv() {
+            Ok(Ok(chunk)) => Ok(Some(chunk)),
+            Ok(Err(err)) => Err(err),
+            Err(_) => {
+                if let Some(producer) = self.producer.take() {
+                    producer
+                        .join()
+                        .map_err(|_| OxrsError::Runtime("zonal producer thread panicked".to_string()))?;
+                }
+                Ok(None)
+            }
+        }
+    }
+}
@@ -0,0 +1,385 @@
+//! Label-raster sweep for zones that do not overlap (subcatchments, admin
+//! units, ...). The value raster is read once, strip by strip along its
+//! block rows. Each strip's zones are burned into a raster of feature labels
+//! over just that strip, and every cell is tallied into its zone's
+//! accumulators. Each pixel is read once however many features there are,
+//! and the label buffer stays bounded by the strip size.
+//!
+//! Where zones do overlap, later features take the shared cells.
+
+use crate::errors::{OxrsError, OxrsResult};
+use crate::pixel::{with_pixel_type, Pixel};
+use crate::raster::{band_io, RasterContext, RasterSource, Window};
+use crate::stats::{Moments, StatRecord};
+use crate::vector::VectorSource;
+use crate::zonal::{pixel_type, ZonalOptions, STREAM_CHUNK};
+use gdal::raster::{rasterize, RasterizeOptions};
+use gdal::vector::Geometry;
+use gdal::{Driver, DriverManager};
+use gdal_sys::GDALRWFlag;
+
+/// Target size of one strip's labels. Strips are whole block rows, so a
+/// strip is never smaller than one block row of the zones' columns.
+const LABEL_STRIP_BYTES: usize = 16 << 20;
+
+/// One zone's running stats.
+struct ZoneTally<T> {
+    moments: Moments<T>,
+    values: Vec<T>,
+    nodata_count: usize,
+    nan_count: usize,
+}
+
+/// A feature to burn: its geometry, unclipped window and label.
+struct Burn {
+    geom: Geometry,
+    window: Window,
+    label: u32,
+}
+
+/// Runs zonal stats in one sweep of the raster and emits the records in
+/// feature order once it is done. `opts.rasterizer` and `opts.n_jobs` do
+/// not apply: zones are burned by GDAL and tallied serially.
+pub fn zonal_stats_sweep<F>(
+    vectors: &VectorSource,
+    raster: &RasterSource,
+    opts: &ZonalOptions,
+    emit: F,
+) -> OxrsResult<()>
+where
+    F: FnMut(Vec<StatRecord>) -> bool,
+{
+    sweep_in_strips(vectors, raster, opts, LABEL_STRIP_BYTES, emit)
+}
+
+fn sweep_in_strips<F>(
+    vectors: &VectorSource,
+    raster: &RasterSource,
+    opts: &ZonalOptions,
+    strip_bytes: usize,
+    emit: F,
+) -> OxrsResult<()>
+where
+    F: FnMut(Vec<StatRecord>) -> bool,
+{
+    if opts.per_band || opts.raster_out || opts.zone_values {
+        return Err(OxrsError::InvalidArgument(
+            "sweep does not support band lists, raster_out or zone_values".to_string(),
+        ));
+    }
+    with_pixel_type!(pixel_type(raster, opts)?, P => {
+        sweep_typed::<P, F>(vectors, raster, opts, strip_bytes, emit)
+    })
+}
+
+fn sweep_typed<T, F>(
+    vectors: &VectorSource,
+    raster: &RasterSource,
+    opts: &ZonalOptions,
+    strip_bytes: usize,
+    mut emit: F,
+) -> OxrsResult<()>
+where
+    T: Pixel,
+    F: FnMut(Vec<StatRecord>) -> bool,
+{
+    let mut raster = RasterContext::open_source(raster, opts.bands[0], opts.nodata)?;
+    let nodata = raster.nodata.unwrap_or(-999.0);
+    let nodata_native = T::exact_from_f64(nodata);
+
+    // Labels are feature index + 1; 0 is outside every zone.
+    let mut present = Vec::new();
+    let mut burns = Vec::new();
+    vectors.for_each_geometry(|geom| {
+        present.push(geom.is_some());
+        if let Some(geom) = geom {
+            let env = geom.envelope();
+            burns.push(Burn {
+                geom: geom.clone(),
+                window: raster.window_for_bounds_unclipped(env.MinX, env.MinY, env.MaxX, env.MaxY),
+                label: present.len() as u32,
+            });
+        }
+        Ok(true)
+    })?;
+    burns.sort_by_key(|burn| burn.window.row_start);
+
+    let mut zones: Vec<ZoneTally<T>> = present
+        .iter()
+        .map(|_| ZoneTally {
+            moments: opts.plan.moments::<T>(),
+            values: Vec::new(),
+            nodata_count: 0,
+            nan_count: 0,
+        })
+        .collect();
+
+    if let Some(last_row) = burns.iter().map(|burn| burn.window.row_end).max() {
+        let driver = DriverManager::get_driver_by_name("MEM")?;
+        let keep_values = opts.plan.needs_values();
+        // Strips follow the raster's block rows so each block is decoded
+        // once, sized for the widest strip the zones can make.
+        let col_start = burns.iter().map(|burn| burn.window.col_start).min();
+        let col_end = burns.iter().map(|burn| burn.window.col_end).max();
+        let max_width = (col_end.unwrap_or(0) - col_start.unwrap_or(0) + 1) as usize;
+        let block_rows = raster.block_size()?.1.max(1);
+        let strip_rows = (strip_bytes / (4 * max_width) / block_rows).max(1) * block_rows;
+        let strip_rows = strip_rows as isize;
+
+        let (mut strip_labels, mut strip_values) = (Vec::<u32>::new(), Vec::<T>::new());
+        // `burns[..started]` begin at or above the current strip; `active`
+        // are those that also reach into it.
+        let mut started = 0;
+        let mut active: Vec<usize> = Vec::new();
+        let mut row_start = burns[0].window.row_start;
+        while row_start <= last_row {
+            let row_end = ((row_start.div_euclid(strip_rows) + 1) * strip_rows - 1).min(last_row);
+            while started < burns.len() && burns[started].window.row_start <= row_end {
+                active.push(started);
+                started += 1;
+            }
+            active.retain(|&i| burns[i].window.row_end >= row_start);
+            if active.is_empty() {
+                // Nothing until the next zone starts; skip the rows between.
+                row_start = burns[started].window.row_start;
+                continue;
+            }
+            // Burned in feature order, so later features win shared cells.
+            active.sort_unstable_by_key(|&i| burns[i].label);
+            let strip = Window {
+                row_start,
+                row_end,
+                col_start: active
+                    .iter()
+                    .map(|&i| burns[i].window.col_start)
+                    .min()
+                    .unwrap(),
+                col_end: active
+                    .iter()
+                    .map(|&i| burns[i].window.col_end)
+                    .max()
+                    .unwrap(),
+            };
+            let width = (strip.col_end - strip.col_start + 1) as usize;
+            let rows = (row_end - row_start + 1) as usize;
+            burn_labels(
+                &driver,
+                raster.window_geo_transform(strip),
+                (width, rows),
+                active.iter().map(|&i| &burns[i]),
+                opts.all_touched,
+                &mut strip_labels,
+            )?;
+            raster.read_window(
+                strip,
+                opts.boundless,
+                nodata_native.unwrap_or_default(),
+                &mut strip_values,
+            )?;
+
+            // Cells outside the raster count as nodata, as in the windowed path.
+            let inside = raster.clip_window(strip).map(|o| {
+                (
+                    (o.row_start - row_start) as usize..=(o.row_end - row_start) as usize,
+                    (o.col_start - strip.col_start) as usize
+                        ..=(o.col_end - strip.col_start) as usize,
+                )
+            });
+            let cells = strip_labels
+                .chunks_exact(width)
+                .zip(strip_values.chunks_exact(width));
+            for (row, (label_row, value_row)) in cells.enumerate() {
+                let row_inside = inside
+                    .as_ref()
+                    .filter(|(r, _)| r.contains(&row))
+                    .map(|(_, c)| c);
+                for (col, (&label, &v)) in label_row.iter().zip(value_row).enumerate() {
+                    if label == 0 {
+                        continue;
+                    }
+                    let zone = &mut zones[label as usize - 1];
+                    let in_extent = row_inside.is_some_and(|c| c.contains(&col));
+                    if !in_extent || v.is_nodata(nodata, nodata_native) {
+                        zone.nodata_count += 1;
+                    } else if !v.is_finite() {
+                        zone.nan_count += 1;
+                    } else {
+                        zone.moments.push(v);
+                        if keep_values {
+                            zone.values.push(v);
+                        }
+                    }
+                }
+            }
+            row_start = row_end + 1;
+        }
+    }
+
+    let mut chunk = Vec::with_capacity(STREAM_CHUNK);
+    for (zone, present) in zones.iter_mut().zip(present) {
+        chunk.push(if present {
+            let mut values = std::mem::take(&mut zone.values);
+            opts.plan.finish(
+                &zone.moments,
+                &mut values,
+                zone.nodata_count,
+                zone.nan_count,
+            )
+        } else {
+            opts.plan.empty_record(0, 0)
+        });
+        if chunk.len() == STREAM_CHUNK && !emit(std::mem::take(&mut chunk)) {
+            return Ok(());
+        }
+    }
+    if !chunk.is_empty() {
+        emit(chunk);
+    }
+    Ok(())
+}
+
+/// Burns `burns` (in order) into `labels`, a `size` raster of their labels
+/// with geotransform `gt` and 0 elsewhere.
+fn burn_labels<'a>(
+    driver: &Driver,
+    gt: [f64; 6],
+    size: (usize, usize),
+    burns: impl Iterator<Item = &'a Burn>,
+    all_touched: bool,
+    labels: &mut Vec<u32>,
+) -> OxrsResult<()> {
+    let (geoms, values): (Vec<Geometry>, Vec<f64>) = burns
+        .map(|burn| (burn.geom.clone(), f64::from(burn.label)))
+        .unzip();
+    let mut dataset = driver.create_with_band_type::<u32, _>("", size.0, size.1, 1)?;
+    dataset.set_geo_transform(&gt)?;
+    rasterize(
+        &mut dataset,
+        &[1],
+        &geoms,
+        &values,
+        Some(RasterizeOptions {
+            all_touched,
+            ..Default::default()
+        }),
+    )?;
+    labels.clear();
+    labels.resize(size.0 * size.1, 0);
+    band_io(
+        &dataset.rasterband(1)?,
+        GDALRWFlag::GF_Read,
+        (0, 0),
+        size,
+        labels,
+        size.0,
+    )
+}
+
+#[cfg(test)]
+mod tests {
+    use super::{sweep_in_strips, LABEL_STRIP_BYTES};
+    use crate::block_cache::CacheCounters;
+    use crate::order::SpatialOrder;
+    use crate::raster::{band_io, RasterSource};
+    use crate::stats::{StatPlan, StatRecord};
+    use crate::vector::{VectorSource, WkbColumn};
+    use crate::zonal::{self, Rasterizer, ZonalOptions};
+    use gdal::vector::Geometry;
+    use gdal::DriverManager;
+    use gdal_sys::GDALRWFlag;
+    use std::sync::Arc;
+
+    #[test]
+    fn sweep_matches_windowed_zones() {
+        // Wide enough that a GTiff strip holds a single row.
+        let path = "/vsimem/oxrs_sweep_test.tif";
+        let (width, height) = (1100, 25);
+        {
+            let driver = DriverManager::get_driver_by_name("GTiff").unwrap();
+            let mut ds = driver
+                .create_with_band_type::<f32, _>(path, width, height, 1)
+                .unwrap();
+            ds.set_geo_transform(&[0.0, 1.0, 0.0, 25.0, 0.0, -1.0])
+                .unwrap();
+            let mut band = ds.rasterband(1).unwrap();
+            band.set_no_data_value(Some(-1.0)).unwrap();
+            let mut values: Vec<f32> = (0..width * height)
+                .map(|i| if i % 17 == 0 { -1.0 } else { (i % 23) as f32 })
+                .collect();
+            band_io(
+                &band,
+                GDALRWFlag::GF_Write,
+                (0, 0),
+                (width, height),
+                &mut values,
+                width,
+            )
+            .unwrap();
+        }
+        // A partition of part of the raster, with one zone across the
+        // raster, one reaching off its edge and one far below it.
+        let mut column = WkbColumn::with_capacity(6, 0);
+        for wkt in [
+            Some("POLYGON ((2 2, 14 2, 14 13, 2 13, 2 2))"),
+            Some("POLYGON ((14 2, 1095 2, 1095 5, 14 5, 14 2))"),
+            None,
+            Some("POLYGON ((2 13, 20.5 13, 9 24.2, 2 13))"),
+            Some("POLYGON ((1090 8, 1110 8, 1110 20, 1090 20, 1090 8))"),
+            Some("POLYGON ((40 -900, 44 -900, 44 -896, 40 -896, 40 -900))"),
+        ] {
+            let wkb = wkt.map(|w| Geometry::from_wkt(w).unwrap().wkb().unwrap());
+            column.push(wkb.as_deref());
+        }
+        let vectors = VectorSource::Wkb(Arc::new(column));
+        let raster = RasterSource::Path(path.to_string());
+        let opts = ZonalOptions {
+            bands: vec![1],
+            per_band: false,
+            nodata: None,
+            all_touched: false,
+            boundless: true,
+            plan: StatPlan::new(
+                [
+                    "count", "nodata", "min", "max", "mean", "median", "majority",
+                ]
+                .map(String::from)
+                .to_vec(),
+                false,
+            ),
+            n_jobs: 1,
+            rasterizer: Rasterizer::Gdal,
+            cache_bytes: 0,
+            order: SpatialOrder::Input,
+            raster_out: false,
+            zone_values: false,
+            mask_cache: None,
+            sweep: false,
+        };
+
+        let mut windowed: Vec<StatRecord> = Vec::new();
+        let counters = Arc::new(CacheCounters::default());
+        zonal::zonal_stats_stream(&vectors, &raster, &opts, &counters, |chunk| {
+            windowed.extend(chunk);
+            true
+        })
+        .unwrap();
+        // The default strip size and one-row strips.
+        for strip_bytes in [LABEL_STRIP_BYTES, 1] {
+            let mut swept: Vec<StatRecord> = Vec::new();
+            sweep_in_strips(&vectors, &raster, &opts, strip_bytes, |chunk| {
+                swept.extend(chunk);
+                true
+            })
+            .unwrap();
+
+            assert_eq!(swept.len(), 6);
+            for (got, expected) in swept.iter().zip(&windowed) {
+                assert_eq!(got.floats, expected.floats);
+                assert_eq!(got.ints, expected.ints);
+            }
+            assert!(swept[4].floats["nodata"] > Some(0.0));
+            assert_eq!(swept[5].ints["count"], 0);
+        }
+        gdal::vsi::unlink_mem_file(path).unwrap();
+    }
+}
@@ -0,0 +1,357 @@
+//! Feature geometries for the zonal engine: an OGR layer on disk, or WKB
+//! handed over from Python without going through a file.
+
+use crate::errors::{OxrsError, OxrsResult};
+use gdal::vector::{Geometry, Layer, LayerAccess};
+use gdal::Dataset;
+use gdal_sys::OGRErr;
+use pyo3::FromPyObject;
+use std::collections::HashSet;
+use std::ffi::{c_char, CString};
+use std::path::Path;
+use std::sync::Arc;
+
+/// Where features come from, always visited in input order.
+#[derive(Clone)]
+pub enum VectorSource {
+    /// One layer of anything `GDALOpenEx` reads as vectors, optionally
+    /// narrowed by OGR filters.
+    Layer {
+        path: String,
+        layer: LayerRef,
+        filter: LayerFilter,
+    },
+    /// Geometries already encoded as WKB (`None` for null geometries).
+    Wkb(Arc<WkbColumn>),
+}
+
+/// A layer by index or by name (the `layer` argument of `zonal_stats_path`).
+#[derive(Clone, Debug, FromPyObject)]
+pub enum LayerRef {
+    Index(usize),
+    Name(String),
+}
+
+/// Feature selection pushed down to OGR, so features outside it are never
+/// read (drivers with indexes, e.g. GeoPackage, skip them entirely).
+#[derive(Clone, Debug, Default)]
+pub struct LayerFilter {
+    /// `[min_x, min_y, max_x, max_y]`; keeps features whose envelope
+    /// intersects it.
+    pub bbox: Option<[f64; 4]>,
+    /// An OGR SQL `WHERE` expression (FIDs can be selected with `FID IN (...)`).
+    pub where_clause: Option<String>,
+}
+
+/// WKB geometries packed end to end, Arrow binary-array style, so a whole
+/// column is two allocations however many features it holds.
+pub struct WkbColumn {
+    data: Vec<u8>,
+    /// `offsets[i]..offsets[i + 1]` is feature `i`.
+    offsets: Vec<usize>,
+    valid: Vec<bool>,
+}
+
+impl WkbColumn {
+    pub fn with_capacity(features: usize, bytes: usize) -> Self {
+        let mut offsets = Vec::with_capacity(features + 1);
+        offsets.push(0);
+        Self {
+            data: Vec::with_capacity(bytes),
+            offsets,
+            valid: Vec::with_capacity(features),
+        }
+    }
+
+    /// A column from Arrow-style parts: `offsets` has one more entry than
+    /// `valid` and indexes into `data`.
+    pub fn from_parts(data: Vec<u8>, offsets: Vec<usize>, valid: Vec<bool>) -> Self {
+        debug_assert_eq!(offsets.len(), valid.len() + 1);
+        debug_assert!(offsets.last().is_some_and(|&end| end <= data.len()));
+        Self { data, offsets, valid }
+    }
+
+    pub fn push(&mut self, wkb: Option<&[u8]>) {
+        self.data.extend_from_slice(wkb.unwrap_or_default());
+        self.offsets.push(self.data.len());
+        self.valid.push(wkb.is_some());
+    }
+
+    pub fn len(&self) -> usize {
+        self.valid.len()
+    }
+
+    pub fn get(&self, index: usize) -> Option<&[u8]> {
+        self.valid[index].then(|| &self.data[self.offsets[index]..self.offsets[index + 1]])
+    }
+}
+
+/// Zonal stats only need geometries, so attribute fields are skipped.
+/// Columnar drivers (Parquet, Arrow IPC) then decode just the geometry column
+/// of each row group, and row drivers skip parsing the attribute values.
+/// Fields a `where_clause` names are kept: drivers that evaluate the filter
+/// on fetched features would otherwise see them as null.
+fn ignore_attribute_fields(layer: &Layer, where_clause: Option<&str>) -> OxrsResult<()> {
+    let used = where_clause.map(where_identifiers);
+    let names = layer
+        .defn()
+        .fields()
+        .map(|field| field.name())
+        .filter(|name| match &used {
+            None => true,
+            Some(None) => false,
+            Some(Some(used)) => !used.contains(&name.to_lowercase()),
+        })
+        .map(CString::new)
+        .chain([CString::new("OGR_STYLE")])
+        .collect::<Result<Vec<_>, _>>()
+        .map_err(|e| OxrsError::InvalidArgument(e.to_string()))?;
+    let mut list: Vec<*const c_char> = names.iter().map(|name| name.as_ptr()).collect();
+    list.push(std::ptr::null());
+    let rv = unsafe { gdal_sys::OGR_L_SetIgnoredFields(layer.c_layer(), list.as_mut_ptr()) };
+    if rv != OGRErr::OGRERR_NONE {
+        return Err(OxrsError::Gdal(format!("OGR_L_SetIgnoredFields failed ({rv})")));
+    }
+    Ok(())
+}
+
+/// The identifiers of an OGR SQL `where` clause, lowercased as OGR matches
+/// field names regardless of case: bare words and `"double"` or `` `back` ``
+/// quoted names, but not the contents of `'string'` literals. `None` when
+/// a quote is left open, so the caller can keep every field.
+fn where_identifiers(clause: &str) -> Option<HashSet<String>> {
+    let mut found = HashSet::new();
+    let mut chars = clause.chars().peekable();
+    while let Some(c) = chars.next() {
+        if c == '\'' || c == '"' || c == '`' {
+            // A doubled quote stands for the quote itself.
+            let mut token = String::new();
+            loop {
+                match chars.next()? {
+                    q if q == c && chars.peek() == Some(&c) => {
+                        chars.next();
+                        token.push(c);
+                    }
+                    q if q == c => break,
+                    other => token.push(other),
+                }
+            }
+            if c != '\'' {
+                found.insert(token.to_lowercase());
+            }
+        } else if c.is_alphanumeric() || c == '_' {
+            let mut token = c.to_string();
+            while let Some(&next) = chars.peek() {
+                if !(next.is_alphanumeric() || next == '_') {
+                    break;
+                }
+                token.push(next);
+                chars.next();
+            }
+            found.insert(token.to_lowercase());
+        }
+    }
+    Some(found)
+}
+
+/// Calls `visit` with each feature geometry of an OGR layer until it
+/// returns `false`.
+fn each_feature(
+    path: &str,
+    layer: &LayerRef,
+    filter: &LayerFilter,
+    mut visit: impl FnMut(Option<&Geometry>) -> OxrsResult<bool>,
+) -> OxrsResult<()> {
+    let dataset = Dataset::open(Path::new(path))?;
+    let mut layer = match layer {
+        LayerRef::Index(index) => dataset.layer(*index)?,
+        LayerRef::Name(name) => dataset.layer_by_name(name)?,
+    };
+    ignore_attribute_fields(&layer, filter.where_clause.as_deref())?;
+    if let Some([min_x, min_y, max_x, max_y]) = filter.bbox {
+        layer.set_spatial_filter_rect(min_x, min_y, max_x, max_y);
+    }
+    if let Some(where_clause) = &filter.where_clause {
+        layer.set_attribute_filter(where_clause)?;
+    }
+    for feature in layer.features() {
+        if !visit(feature.geometry())? {
+            break;
+        }
+    }
+    Ok(())
+}
+
+impl VectorSource {
+    /// Calls `visit` with each geometry until it returns `false`.
+    pub fn for_each_geometry(
+        &self,
+        mut visit: impl FnMut(Option<&Geometry>) -> OxrsResult<bool>,
+    ) -> OxrsResult<()> {
+        match self {
+            Self::Layer { path, layer, filter } => each_feature(path, layer, filter, visit),
+            Self::Wkb(column) => {
+                for index in 0..column.len() {
+                    let geom = column.get(index).map(Geometry::from_wkb).transpose()?;
+                    if !visit(geom.as_ref())? {
+                        break;
+                    }
+                }
+                Ok(())
+            }
+        }
+    }
+
+    /// Calls `visit` with consecutive batches of up to `batch_size` WKB
+    /// geometries until it returns `false`. OGR geometry handles are not
+    /// `Send`, so this is the form features cross into worker threads in.
+    pub fn for_each_wkb_batch(
+        &self,
+        batch_size: usize,
+        mut visit: impl FnMut(&[Option<&[u8]>]) -> OxrsResult<bool>,
+    ) -> OxrsResult<()> {
+        match self {
+            Self::Layer { path, layer, filter } => {
+                let mut wkbs: Vec<Option<Vec<u8>>> = Vec::with_capacity(batch_size);
+                let mut open = true;
+                each_feature(path, layer, filter, |geom| {
+                    wkbs.push(geom.map(|g| g.wkb()).transpose()?);
+                    if wkbs.len() == batch_size {
+                        let views: Vec<Option<&[u8]>> = wkbs.iter().map(Option::as_deref).collect();
+                        open = visit(&views)?;
+                        wkbs.clear();
+                    }
+                    Ok(open)
+                })?;
+                if open && !wkbs.is_empty() {
+                    let views: Vec<Option<&[u8]>> = wkbs.iter().map(Option::as_deref).collect();
+                    visit(&views)?;
+                }
+                Ok(())
+            }
+            Self::Wkb(column) => {
+                for start in (0..column.len()).step_by(batch_size.max(1)) {
+                    let end = (start + batch_size).min(column.len());
+                    let views: Vec<Option<&[u8]>> = (start..end).map(|i| column.get(i)).collect();
+                    if !visit(&views)? {
+                        break;
+                    }
+                }
+                Ok(())
+            }
+        }
+    }
+
+    /// All geometries as one WKB column, showing each parsed geometry to
+    /// `inspect` on the way. In-memory columns are shared, not copied.
+    pub fn column_with(
+        &self,
+        mut inspect: impl FnMut(Option<&Geometry>),
+    ) -> OxrsResult<Arc<WkbColumn>> {
+        match self {
+            Self::Layer { path, layer, filter } => {
+                let mut column = WkbColumn::with_capacity(0, 0);
+                each_feature(path, layer, filter, |geom| {
+                    inspect(geom);
+                    column.push(geom.map(|g| g.wkb()).transpose()?.as_deref());
+                    Ok(true)
+                })?;
+                Ok(Arc::new(column))
+            }
+            Self::Wkb(column) => {
+                self.for_each_geometry(|geom| {
+                    inspect(geom);
+                    Ok(true)
+                })?;
+                Ok(column.clone())
+            }
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::{where_identifiers, LayerFilter, LayerRef, VectorSource, WkbColumn};
+    use gdal::vector::Geometry;
+    use std::sync::Arc;
+
+    #[test]
+    fn wkb_columns_visit_in_order_with_nulls() {
+        let wkts = [Some("POINT (1 2)"), None, Some("LINESTRING (0 0, 3 4)")];
+        let mut column = WkbColumn::with_capacity(wkts.len(), 0);
+        for wkt in wkts {
+            let wkb = wkt.map(|w| Geometry::from_wkt(w).unwrap().wkb().unwrap());
+            column.push(wkb.as_deref());
+        }
+        let source = VectorSource::Wkb(Arc::new(column));
+
+        let mut seen = Vec::new();
+        source
+            .for_each_geometry(|geom| {
+                seen.push(geom.map(|g| g.wkt().unwrap()));
+                Ok(true)
+            })
+            .unwrap();
+        assert_eq!(seen, wkts.map(|w| w.map(str::to_string)));
+
+        let mut batches = Vec::new();
+        source
+            .for_each_wkb_batch(2, |batch| {
+                batches.push(batch.iter().map(Option::is_some).collect::<Vec<_>>());
+                Ok(true)
+            })
+            .unwrap();
+        assert_eq!(batches, vec![vec![true, false], vec![true]]);
+    }
+
+    #[test]
+    fn layer_sources_apply_filters_and_keep_geometries() {
+        let path = "/vsimem/oxrs_vector_layer_test.geojson";
+        let geojson = r#"{"type": "FeatureCollection", "name": "pts", "features": [
+            {"type": "Feature", "properties": {"name": "a", "v": 1, "Land Use": "crop"},
+             "geometry": {"type": "Point", "coordinates": [1, 2]}},
+            {"type": "Feature", "properties": {"name": "b", "v": 2, "Land Use": "crop"},
+             "geometry": null},
+            {"type": "Feature", "properties": {"name": "c", "v": 3, "Land Use": "forest"},
+             "geometry": {"type": "Point", "coordinates": [5, 5]}}
+        ]}"#;
+        gdal::vsi::create_mem_file(path, geojson.as_bytes().to_vec()).unwrap();
+        let wkts = |layer: LayerRef, filter: LayerFilter| {
+            let source = VectorSource::Layer { path: path.to_string(), layer, filter };
+            let mut seen = Vec::new();
+            source
+                .for_each_geometry(|geom| {
+                    seen.push(geom.map(|g| g.wkt().unwrap()));
+                    Ok(true)
+                })
+                .unwrap();
+            seen
+        };
+        let point = |wkt: &str| Some(wkt.to_string());
+
+        assert_eq!(
+            wkts(LayerRef::Index(0), LayerFilter::default()),
+            vec![point("POINT (1 2)"), None, point("POINT (5 5)")]
+        );
+        let by_bbox = LayerFilter { bbox: Some([4.0, 4.0, 6.0, 6.0]), where_clause: None };
+        assert_eq!(wkts(LayerRef::Name("pts".to_string()), by_bbox), vec![point("POINT (5 5)")]);
+        // Attribute filters still see the ignored fields.
+        let by_where = LayerFilter { bbox: None, where_clause: Some("v >= 2".to_string()) };
+        assert_eq!(wkts(LayerRef::Index(0), by_where), vec![None, point("POINT (5 5)")]);
+        let quoted = LayerFilter {
+            bbox: None,
+            where_clause: Some(r#""Land Use" = 'crop'"#.to_string()),
+        };
+        assert_eq!(wkts(LayerRef::Index(0), quoted), vec![point("POINT (1 2)"), None]);
+        gdal::vsi::unlink_mem_file(path).unwrap();
+    }
+
+    #[test]
+    fn where_identifiers_skip_string_literals() {
+        let names = where_identifiers(r#"Name = 'v''s name' AND "Land ""Use""" > `X_1`"#).unwrap();
+        let mut names: Vec<_> = names.into_iter().collect();
+        names.sort();
+        assert_eq!(names, ["and", "land \"use\"", "name", "x_1"]);
+        assert_eq!(where_identifiers("name = 'open"), None);
+    }
+}
@@ -1,93 +1,737 @@
-use crate::errors::OxrsResult;
-use crate::raster::RasterContext;
-use crate::stats::{compute_stats, StatRecord};
-use gdal::raster::{rasterize, Buffer, RasterizeOptions};
-use gdal::vector::LayerAccess;
-use gdal::{Dataset, DriverManager};
-use std::path::Path;
-
-pub fn zonal_stats_path(
-    vectors_path: &str,
-    raster_path: &str,
-    layer_index: usize,
+use crate::block_cache::CacheCounters;
+use crate::errors::{OxrsError, OxrsResult};
+use crate::geom::polygon_rings;
+use crate::mask_cache::{KeyHasher, MaskCache};
+use crate::order::{spatial_permutation, SpatialOrder};
+use crate::pixel::{with_pixel_type, Pixel};
+use crate::raster::{band_io, RasterContext, RasterSource};
+use crate::rasterize::{apply_geo_transform, burn_polygon, gdal_inv_geo_transform};
+use crate::stats::{MiniRaster, StatPlan, StatRecord};
+use crate::vector::VectorSource;
+use gdal::raster::{rasterize, RasterizeOptions};
+use gdal::vector::Geometry;
+use gdal::{Dataset, Driver, DriverManager};
+use gdal_sys::{GDALDataType, GDALRWFlag};
+use rayon::prelude::*;
+use std::sync::{Arc, Mutex};
+
+/// How zone masks are produced for polygonal features.
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+pub enum Rasterizer {
+    /// In-process scanline fill (`rasterize.rs`); non-polygons still use GDAL.
+    Native,
+    /// `gdal::raster::rasterize` into a reused per-worker MEM dataset.
+    Gdal,
+}
+
+impl Rasterizer {
+    pub fn parse(name: &str) -> OxrsResult<Self> {
+        match name {
+            "native" => Ok(Self::Native),
+            "gdal" => Ok(Self::Gdal),
+            other => Err(OxrsError::InvalidArgument(format!(
+                "rasterizer must be native or gdal, got {other}"
+            ))),
+        }
+    }
+}
+
+pub struct ZonalOptions {
+    /// Bands to summarise; the first one's grid defines the windows.
+    pub bands: Vec<isize>,
+    /// Suffix each stat with `_b{band}` (a band list was requested). The
+    /// bands are then read together and each zone is rasterized once.
+    pub per_band: bool,
+    pub nodata: Option<f64>,
+    pub all_touched: bool,
+    pub boundless: bool,
+    pub plan: StatPlan,
+    pub n_jobs: isize,
+    pub rasterizer: Rasterizer,
+    /// Decoded-block cache budget shared by all workers; 0 disables it.
+    pub cache_bytes: usize,
+    /// Processing order; output is always in layer order.
+    pub order: SpatialOrder,
+    /// Attach each zone's window and mask to its record.
+    pub raster_out: bool,
+    /// Attach each zone's valid values (row-major) for batch callbacks.
+    pub zone_values: bool,
+    /// Load and store zone masks here instead of always rasterizing.
+    pub mask_cache: Option<Arc<MaskCache>>,
+    /// Burn all zones into one label raster and read the raster once
+    /// (`sweep.rs`) instead of a window per feature.
+    pub sweep: bool,
+}
+
+// GDAL driver handles are entries in the process-global driver registry and
+// `Create()` on the MEM driver is safe to call from several threads.
+struct MemDriver(Driver);
+
+unsafe impl Send for MemDriver {}
+
+/// MEM dataset reused by the GDAL rasterizer; grown, never shrunk.
+struct MaskDataset {
+    dataset: Dataset,
+    width: usize,
+    height: usize,
+}
+
+/// Per-worker buffers reused across features. Once grown to the largest
+/// window seen, the per-feature loop stops allocating.
+struct ZoneScratch<T> {
+    window: Vec<T>,
+    mask: Vec<u8>,
+    values: Vec<T>,
+    mask_ds: Option<MaskDataset>,
+}
+
+impl<T> Default for ZoneScratch<T> {
+    fn default() -> Self {
+        Self {
+            window: Vec::new(),
+            mask: Vec::new(),
+            values: Vec::new(),
+            mask_ds: None,
+        }
+    }
+}
+
+/// One band of a multi-band read, with its own nodata.
+struct BandRead<T> {
     band: isize,
-    nodata: Option<f64>,
-    all_touched: bool,
-    boundless: bool,
-    stats: &[String],
-) -> OxrsResult<Vec<StatRecord>> {
-    let raster = RasterContext::open(raster_path, band, nodata)?;
-    let vectors = Dataset::open(Path::new(vectors_path))?;
-    let mut layer = vectors.layer(layer_index)?;
-    let mem_driver = DriverManager::get_driver_by_name("MEM")?;
-    let mut out = Vec::new();
-
-    for feature in layer.features() {
-        let Some(geom) = feature.geometry() else {
-            out.push(compute_stats(&[], stats, 0, 0));
-            continue;
+    index: usize,
+    nodata: f64,
+    nodata_native: Option<T>,
+}
+
+/// Per-thread zonal state for bands read natively as `T`. Workers never
+/// share GDAL handles.
+struct ZoneWorker<T> {
+    raster: RasterContext,
+    /// Empty unless `opts.per_band`.
+    bands: Vec<BandRead<T>>,
+    mem_driver: MemDriver,
+    scratch: ZoneScratch<T>,
+    /// Mask cache key state after the grid and rasterization options; a
+    /// feature's key adds its WKB.
+    mask_key: Option<KeyHasher>,
+}
+
+impl<T: Pixel> ZoneWorker<T> {
+    fn open(
+        raster: &RasterSource,
+        opts: &ZonalOptions,
+        cache_bytes: usize,
+        counters: &Arc<CacheCounters>,
+    ) -> OxrsResult<Self> {
+        let mut raster = RasterContext::open_source(raster, opts.bands[0], opts.nodata)?;
+        let mut bands = Vec::new();
+        // Multi-band windows go through GDAL's own block cache; ours holds
+        // single-band blocks.
+        if opts.per_band {
+            for &band in &opts.bands {
+                let (_, nodata) = raster.band_info(band, opts.nodata)?;
+                let nodata = nodata.unwrap_or(-999.0);
+                bands.push(BandRead {
+                    band,
+                    index: band as usize,
+                    nodata,
+                    nodata_native: T::exact_from_f64(nodata),
+                });
+            }
+        } else if cache_bytes > 0 {
+            raster.enable_block_cache::<T>(cache_bytes, counters.clone())?;
+        }
+        let mask_key = opts.mask_cache.as_ref().map(|_| {
+            let (geo_transform, width, height) = raster.grid();
+            let mut key = KeyHasher::new();
+            for value in geo_transform {
+                key.write(&value.to_le_bytes());
+            }
+            key.write(&(width as u64).to_le_bytes())
+                .write(&(height as u64).to_le_bytes())
+                .write(raster.projection().as_bytes())
+                .write(&[u8::from(opts.all_touched), opts.rasterizer as u8]);
+            key
+        });
+        Ok(Self {
+            raster,
+            bands,
+            mem_driver: MemDriver(DriverManager::get_driver_by_name("MEM")?),
+            scratch: ZoneScratch::default(),
+            mask_key,
+        })
+    }
+
+    /// The record for a zone with no cells.
+    fn empty_record(&self, opts: &ZonalOptions) -> StatRecord {
+        let mut record = opts.plan.empty_record(0, 0);
+        if opts.per_band {
+            let single = std::mem::replace(&mut record, StatRecord::new());
+            for read in &self.bands {
+                record.merge_suffixed(single.clone(), &format!("_b{}", read.band));
+            }
+        } else if opts.zone_values {
+            record.zone_values = Some(T::into_pixel_vec(Vec::new()));
+        }
+        record
+    }
+
+    fn zone_stats(&mut self, geom: Option<&Geometry>, opts: &ZonalOptions) -> OxrsResult<StatRecord> {
+        self.zone_stats_sharing(geom, opts, None)
+    }
+
+    /// `zone_stats`, reusing `shared_mask` (the zone burned by a worker on
+    /// the same grid for this feature) instead of rasterizing again when it
+    /// fits the window.
+    fn zone_stats_sharing(
+        &mut self,
+        geom: Option<&Geometry>,
+        opts: &ZonalOptions,
+        shared_mask: Option<&[u8]>,
+    ) -> OxrsResult<StatRecord> {
+        let Some(geom) = geom else {
+            return Ok(self.empty_record(opts));
         };
 
         let env = geom.envelope();
+        let raster = &self.raster;
         let window = raster.window_for_bounds_unclipped(env.MinX, env.MinY, env.MaxX, env.MaxY);
 
+        let effective_nodata = raster.nodata.unwrap_or(-999.0);
+        let window_gt = raster.window_geo_transform(window);
+        let empty_zone = |worker: &Self| {
+            let mut record = worker.empty_record(opts);
+            if opts.raster_out {
+                record.mini_raster = Some(MiniRaster {
+                    data: T::into_pixel_vec(Vec::new()),
+                    mask: Vec::new(),
+                    zone: Vec::new(),
+                    width: 0,
+                    height: 0,
+                    geo_transform: window_gt,
+                    nodata: effective_nodata,
+                });
+            }
+            record
+        };
         if window.row_end < window.row_start || window.col_end < window.col_start {
-            out.push(compute_stats(&[], stats, 0, 0));
-            continue;
+            return Ok(empty_zone(self));
         }
 
-        let effective_nodata = raster.nodata.unwrap_or(-999.0);
-        let (width, height, values_window) =
-            raster.read_window_f64_boundless(window, boundless, effective_nodata)?;
+        let nodata_native = T::exact_from_f64(effective_nodata);
+        let (width, height) = if opts.per_band {
+            let indexes: Vec<usize> = self.bands.iter().map(|read| read.index).collect();
+            let fills: Vec<T> = self
+                .bands
+                .iter()
+                .map(|read| read.nodata_native.unwrap_or_default())
+                .collect();
+            self.raster
+                .read_bands_window(window, opts.boundless, &indexes, &fills, &mut self.scratch.window)?
+        } else {
+            self.raster.read_window(
+                window,
+                opts.boundless,
+                nodata_native.unwrap_or_default(),
+                &mut self.scratch.window,
+            )?
+        };
         if width == 0 || height == 0 {
-            out.push(compute_stats(&[], stats, 0, 0));
-            continue;
+            return Ok(empty_zone(self));
         }
 
-        let mut mask_ds = mem_driver.create_with_band_type::<u8, _>("", width, height, 1)?;
-        let window_gt = raster.window_geo_transform(window);
-        mask_ds.set_geo_transform(&window_gt)?;
-        {
-            let mut mask_band = mask_ds.rasterband(1)?;
-            mask_band.fill(0.0, None)?;
+        let raster = &self.raster;
+        let scratch = &mut self.scratch;
+        let shared_mask = shared_mask.filter(|mask| mask.len() == width * height);
+        let mask: &[u8] = match shared_mask {
+            Some(mask) => mask,
+            None => {
+                let cached = match (&opts.mask_cache, self.mask_key) {
+                    (Some(cache), Some(mut key)) => Some((cache, key.write(&geom.wkb()?).finish())),
+                    _ => None,
+                };
+                let loaded = cached
+                    .is_some_and(|(cache, key)| cache.load(key, width, height, &mut scratch.mask));
+                if !loaded {
+                    scratch.mask.clear();
+                    scratch.mask.resize(width * height, 0);
+                    burn_zone_mask(
+                        &self.mem_driver.0,
+                        &mut scratch.mask_ds,
+                        geom,
+                        window_gt,
+                        (width, height),
+                        opts,
+                        &mut scratch.mask,
+                    )?;
+                    if let Some((cache, key)) = cached {
+                        cache.store(key, &scratch.mask, width, height);
+                    }
+                }
+                &scratch.mask
+            }
+        };
+
+        // Cells outside the raster always count as nodata; the fill value
+        // cannot represent that when nodata does not fit the native type.
+        let inside = raster.clip_window(window).map(|o| {
+            (
+                (o.row_start - window.row_start) as usize..=(o.row_end - window.row_start) as usize,
+                (o.col_start - window.col_start) as usize..=(o.col_end - window.col_start) as usize,
+            )
+        });
+        let in_extent = |row: usize, col: usize| {
+            inside
+                .as_ref()
+                .is_some_and(|(r, c)| r.contains(&row) && c.contains(&col))
+        };
+
+        if opts.per_band {
+            // One mask, one pass over each band's plane of the shared read.
+            let mut record = StatRecord::new();
+            let planes = scratch.window.chunks_exact(width * height);
+            for (read, plane) in self.bands.iter().zip(planes) {
+                let band = band_record(
+                    &opts.plan,
+                    plane,
+                    mask,
+                    width,
+                    &in_extent,
+                    (read.nodata, read.nodata_native),
+                    &mut scratch.values,
+                    false,
+                );
+                record.merge_suffixed(band, &format!("_b{}", read.band));
+            }
+            return Ok(record);
+        }
+
+        let mut record = band_record(
+            &opts.plan,
+            &scratch.window,
+            mask,
+            width,
+            &in_extent,
+            (effective_nodata, nodata_native),
+            &mut scratch.values,
+            opts.zone_values,
+        );
+        if opts.raster_out {
+            // Upstream masks outside-zone, nodata (exact match) and NaN cells
+            // but leaves infinities visible.
+            let mut masked = Vec::with_capacity(width * height);
+            let rows = mask.chunks_exact(width).zip(scratch.window.chunks_exact(width));
+            for (row, (mask_row, value_row)) in rows.enumerate() {
+                for (col, (mask, value)) in mask_row.iter().zip(value_row).enumerate() {
+                    let nodata = !in_extent(row, col) || value.to_f64() == effective_nodata;
+                    let nan = value.partial_cmp(value).is_none();
+                    masked.push(u8::from(*mask == 0 || nodata || nan));
+                }
+            }
+            // The window and zone mask are handed over as-is; the next
+            // feature reallocates.
+            record.mini_raster = Some(MiniRaster {
+                data: T::into_pixel_vec(std::mem::take(&mut scratch.window)),
+                mask: masked,
+                zone: match shared_mask {
+                    Some(mask) => mask.to_vec(),
+                    None => std::mem::take(&mut scratch.mask),
+                },
+                width,
+                height,
+                geo_transform: window_gt,
+                nodata: effective_nodata,
+            });
         }
+        Ok(record)
+    }
+}
 
-        let burn_values = [1.0_f64];
-        let geoms = [geom.clone()];
-        rasterize(
-            &mut mask_ds,
-            &[1],
-            &geoms,
-            &burn_values,
-            Some(RasterizeOptions {
-                all_touched,
-                ..Default::default()
-            }),
-        )?;
-        let mask_band = mask_ds.rasterband(1)?;
-        let mask_buf: Buffer<u8> = mask_band.read_as((0, 0), (width, height), (width, height), None)?;
-        let (_, mask_window) = mask_buf.into_shape_and_vec();
-
-        let mut values = Vec::new();
-        let mut nodata_count: usize = 0;
-        let mut nan_count: usize = 0;
-
-        for (mask, value) in mask_window.iter().zip(values_window.iter()) {
+/// Tallies the zone cells (`mask != 0`) of one band's `window` and finishes
+/// the plan's stats. With `zone_values` the record also carries the valid
+/// values in row-major order.
+#[allow(clippy::too_many_arguments)]
+fn band_record<T: Pixel>(
+    plan: &StatPlan,
+    window: &[T],
+    mask: &[u8],
+    width: usize,
+    in_extent: &impl Fn(usize, usize) -> bool,
+    (nodata, nodata_native): (f64, Option<T>),
+    values: &mut Vec<T>,
+    zone_values: bool,
+) -> StatRecord {
+    // Only order/frequency stats (and batch callbacks) need the masked
+    // values themselves.
+    let keep_values = plan.needs_values() || zone_values;
+    let mut moments = plan.moments::<T>();
+    values.clear();
+    let mut nodata_count: usize = 0;
+    let mut nan_count: usize = 0;
+
+    let rows = mask.chunks_exact(width).zip(window.chunks_exact(width));
+    for (row, (mask_row, value_row)) in rows.enumerate() {
+        for (col, (mask, value)) in mask_row.iter().zip(value_row).enumerate() {
             if *mask == 0 {
                 continue;
             }
             let v = *value;
-            if (v - effective_nodata).abs() <= f64::EPSILON {
+            if !in_extent(row, col) || v.is_nodata(nodata, nodata_native) {
                 nodata_count += 1;
             } else if !v.is_finite() {
                 nan_count += 1;
             } else {
-                values.push(v);
+                moments.push(v);
+                if keep_values {
+                    values.push(v);
+                }
             }
         }
+    }
 
-        out.push(compute_stats(&values, stats, nodata_count, nan_count));
+    // `finish` may reorder the values, so batch callbacks get a copy
+    // unless the plan leaves them untouched.
+    let kept = (zone_values && plan.needs_values()).then(|| values.clone());
+    let mut record = plan.finish(&moments, values, nodata_count, nan_count);
+    if zone_values {
+        let values = kept.unwrap_or_else(|| std::mem::take(values));
+        record.zone_values = Some(T::into_pixel_vec(values));
     }
+    record
+}
 
-    Ok(out)
+/// Burns `geom` into the zeroed `width * height` `mask` for a window whose
+/// geotransform is `window_gt`.
+fn burn_zone_mask(
+    mem_driver: &Driver,
+    mask_ds: &mut Option<MaskDataset>,
+    geom: &Geometry,
+    window_gt: [f64; 6],
+    size: (usize, usize),
+    opts: &ZonalOptions,
+    mask: &mut [u8],
+) -> OxrsResult<()> {
+    let (width, height) = size;
+    if opts.rasterizer == Rasterizer::Native {
+        if let Some(inv) = gdal_inv_geo_transform(window_gt) {
+            if let Some(rings) = polygon_rings(geom, |x, y| apply_geo_transform(&inv, x, y)) {
+                burn_polygon(&rings, width, height, opts.all_touched, mask);
+                return Ok(());
+            }
+        }
+    }
+    gdal_burn_mask(mem_driver, mask_ds, geom, window_gt, size, opts.all_touched, mask)
+}
+
+/// GDAL rasterization into a reused MEM dataset. Only the top-left
+/// `width * height` region is cleared and read back, so whatever earlier
+/// (larger) windows left outside it never reaches `mask`.
+fn gdal_burn_mask(
+    mem_driver: &Driver,
+    mask_ds: &mut Option<MaskDataset>,
+    geom: &Geometry,
+    window_gt: [f64; 6],
+    size: (usize, usize),
+    all_touched: bool,
+    mask: &mut [u8],
+) -> OxrsResult<()> {
+    let (width, height) = size;
+    if mask_ds
+        .as_ref()
+        .map_or(true, |ds| ds.width < width || ds.height < height)
+    {
+        let (grow_w, grow_h) = mask_ds
+            .as_ref()
+            .map_or((width, height), |ds| (ds.width.max(width), ds.height.max(height)));
+        *mask_ds = Some(MaskDataset {
+            dataset: mem_driver.create_with_band_type::<u8, _>("", grow_w, grow_h, 1)?,
+            width: grow_w,
+            height: grow_h,
+        });
+    }
+    let target = mask_ds.as_mut().expect("mask dataset allocated above");
+    target.dataset.set_geo_transform(&window_gt)?;
+    {
+        // `mask` arrives zeroed, so writing it clears the region we read back.
+        let band = target.dataset.rasterband(1)?;
+        band_io(&band, GDALRWFlag::GF_Write, (0, 0), size, mask, width)?;
+    }
+
+    let burn_values = [1.0_f64];
+    let geoms = [geom.clone()];
+    rasterize(
+        &mut target.dataset,
+        &[1],
+        &geoms,
+        &burn_values,
+        Some(RasterizeOptions {
+            all_touched,
+            ..Default::default()
+        }),
+    )?;
+    let band = target.dataset.rasterband(1)?;
+    band_io(&band, GDALRWFlag::GF_Read, (0, 0), size, mask, width)
+}
+
+/// Number of worker threads for `n_jobs`; values below 1 mean "all cores".
+fn resolve_threads(n_jobs: isize) -> usize {
+    if n_jobs >= 1 {
+        n_jobs as usize
+    } else {
+        std::thread::available_parallelism()
+            .map(|n| n.get())
+            .unwrap_or(1)
+    }
+}
+
+/// Features per emitted chunk on the serial path.
+pub const STREAM_CHUNK: usize = 256;
+
+/// Runs zonal stats over every feature of `vectors`, handing results to
+/// `emit` in feature order, a chunk at a time. Stops early (without error)
+/// when `emit` returns `false`. Block cache activity is added to `counters`.
+pub fn zonal_stats_stream<F>(
+    vectors: &VectorSource,
+    raster: &RasterSource,
+    opts: &ZonalOptions,
+    counters: &Arc<CacheCounters>,
+    emit: F,
+) -> OxrsResult<()>
+where
+    F: FnMut(Vec<StatRecord>) -> bool,
+{
+    if opts.sweep {
+        return crate::sweep::zonal_stats_sweep(vectors, raster, opts, emit);
+    }
+    // Windows are read in the band's native type; the engine is monomorphised
+    // per type so the inner loops never convert whole windows to f64.
+    with_pixel_type!(pixel_type(raster, opts)?, P => {
+        stream_features(
+            vectors,
+            opts.n_jobs,
+            opts.order,
+            opts.cache_bytes,
+            |cache_bytes| ZoneWorker::<P>::open(raster, opts, cache_bytes, counters),
+            |worker, geom| worker.zone_stats(geom, opts),
+            emit,
+        )
+    })
+}
+
+/// The type windows of `raster` are read in for `opts`.
+pub fn pixel_type(raster: &RasterSource, opts: &ZonalOptions) -> OxrsResult<GDALDataType::Type> {
+    let context = RasterContext::open_source(raster, opts.bands[0], opts.nodata)?;
+    let mut data_type = context.data_type();
+    if opts.per_band {
+        if opts.plan.categorical() || opts.raster_out || opts.zone_values {
+            return Err(OxrsError::InvalidArgument(
+                "categorical, raster_out and zone_values need a single band".to_string(),
+            ));
+        }
+        // One read converts every band to a shared type, so mixed bands
+        // are read as Float64.
+        for &band in &opts.bands {
+            if context.band_info(band, opts.nodata)?.0 != data_type {
+                data_type = GDALDataType::GDT_Float64;
+            }
+        }
+    }
+    Ok(data_type)
+}
+
+/// A zone worker for `raster` of whatever pixel type `opts` reads it in, as
+/// the many-raster engine holds one per raster.
+pub fn open_grid_zones(
+    raster: &RasterSource,
+    opts: &ZonalOptions,
+    cache_bytes: usize,
+    counters: &Arc<CacheCounters>,
+) -> OxrsResult<Box<dyn GridZones>> {
+    with_pixel_type!(pixel_type(raster, opts)?, P => {
+        Ok(Box::new(ZoneWorker::<P>::open(raster, opts, cache_bytes, counters)?) as Box<dyn GridZones>)
+    })
+}
+
+/// Type-erased `ZoneWorker`: zone stats for one raster, sharing zone masks
+/// with other rasters on the same grid.
+pub trait GridZones: Send {
+    /// Geotransform and size; rasters with equal grids burn equal masks.
+    fn grid(&self) -> ([f64; 6], usize, usize);
+
+    /// Zone stats of `geom`, reusing `shared_mask` when it fits the window.
+    fn zone_stats(
+        &mut self,
+        geom: Option<&Geometry>,
+        opts: &ZonalOptions,
+        shared_mask: Option<&[u8]>,
+    ) -> OxrsResult<StatRecord>;
+
+    /// The mask burned by the last `zone_stats` call that did not share one.
+    fn mask(&self) -> &[u8];
+}
+
+impl<T: Pixel> GridZones for ZoneWorker<T> {
+    fn grid(&self) -> ([f64; 6], usize, usize) {
+        self.raster.grid()
+    }
+
+    fn zone_stats(
+        &mut self,
+        geom: Option<&Geometry>,
+        opts: &ZonalOptions,
+        shared_mask: Option<&[u8]>,
+    ) -> OxrsResult<StatRecord> {
+        self.zone_stats_sharing(geom, opts, shared_mask)
+    }
+
+    fn mask(&self) -> &[u8] {
+        &self.scratch.mask
+    }
+}
+
+/// Runs `stats` over every feature with per-thread workers from `open_worker`
+/// (given each worker's share of `cache_bytes`), handing records to `emit`
+/// in feature order as `zonal_stats_stream` describes.
+pub fn stream_features<W, F>(
+    vectors: &VectorSource,
+    n_jobs: isize,
+    order: SpatialOrder,
+    cache_bytes: usize,
+    open_worker: impl Fn(usize) -> OxrsResult<W> + Sync,
+    stats: impl Fn(&mut W, Option<&Geometry>) -> OxrsResult<StatRecord> + Sync,
+    mut emit: F,
+) -> OxrsResult<()>
+where
+    W: Send,
+    F: FnMut(Vec<StatRecord>) -> bool,
+{
+    let threads = resolve_threads(n_jobs);
+
+    if threads <= 1 && order == SpatialOrder::Input {
+        let mut worker = open_worker(cache_bytes)?;
+        let mut chunk = Vec::with_capacity(STREAM_CHUNK);
+        let mut open = true;
+        vectors.for_each_geometry(|geom| {
+            chunk.push(stats(&mut worker, geom)?);
+            if chunk.len() == STREAM_CHUNK {
+                open = emit(std::mem::take(&mut chunk));
+            }
+            Ok(open)
+        })?;
+        if open && !chunk.is_empty() {
+            emit(chunk);
+        }
+        return Ok(());
+    }
+
+    let pool = rayon::ThreadPoolBuilder::new()
+        .num_threads(threads)
+        .build()
+        .map_err(|e| OxrsError::Runtime(e.to_string()))?;
+    let workers: Vec<Mutex<Option<W>>> = (0..threads).map(|_| Mutex::new(None)).collect();
+    // Big enough to keep every thread busy, small enough to bound memory.
+    let batch_size = STREAM_CHUNK.max(threads * 32);
+    let worker_cache_bytes = cache_bytes / threads;
+
+    let run_batch = |wkbs: &[Option<&[u8]>]| -> OxrsResult<Vec<StatRecord>> {
+        // Indexed collect keeps output in batch order regardless of scheduling.
+        pool.install(|| {
+            wkbs.par_iter()
+                .map(|wkb| {
+                    let slot_index = rayon::current_thread_index().unwrap_or(0);
+                    let mut slot = workers[slot_index]
+                        .lock()
+                        .map_err(|_| OxrsError::Runtime("zonal worker state poisoned".to_string()))?;
+                    if slot.is_none() {
+                        *slot = Some(open_worker(worker_cache_bytes)?);
+                    }
+                    let worker = slot.as_mut().expect("worker initialized above");
+                    let geom = wkb.map(Geometry::from_wkb).transpose()?;
+                    stats(worker, geom.as_ref())
+                })
+                .collect()
+        })
+    };
+
+    if order != SpatialOrder::Input {
+        let mut centroids: Vec<Option<(f64, f64)>> = Vec::new();
+        let wkbs = vectors.column_with(|geom| {
+            centroids.push(geom.map(|g| {
+                let env = g.envelope();
+                ((env.MinX + env.MaxX) / 2.0, (env.MinY + env.MaxY) / 2.0)
+            }));
+        })?;
+        let order = spatial_permutation(&centroids, order);
+
+        // Reorder buffer: records land in their input slot and the completed
+        // prefix is emitted after every batch.
+        let mut slots: Vec<Option<StatRecord>> = (0..wkbs.len()).map(|_| None).collect();
+        let mut next_out = 0;
+        for batch in order.chunks(batch_size) {
+            let views: Vec<Option<&[u8]>> = batch.iter().map(|&i| wkbs.get(i)).collect();
+            let records = run_batch(&views)?;
+            for (&i, record) in batch.iter().zip(records) {
+                slots[i] = Some(record);
+            }
+            let mut ready = Vec::new();
+            while let Some(record) = slots.get_mut(next_out).and_then(Option::take) {
+                ready.push(record);
+                next_out += 1;
+            }
+            if !ready.is_empty() && !emit(ready) {
+                return Ok(());
+            }
+        }
+        return Ok(());
+    }
+
+    vectors.for_each_wkb_batch(batch_size, |views| Ok(emit(run_batch(views)?)))
+}
+
+#[cfg(test)]
+mod tests {
+    use super::gdal_burn_mask;
+    use crate::geom::polygon_rings;
+    use crate::rasterize::{apply_geo_transform, burn_polygon, gdal_inv_geo_transform};
+    use gdal::vector::Geometry;
+    use gdal::DriverManager;
+
+    const POLYGONS: &[&str] = &[
+        "POLYGON ((0.3 0.2, 7.7 1.1, 6.2 8.9, 1.1 6.4, 0.3 0.2))",
+        "POLYGON ((1 1, 9 1, 9 9, 1 9, 1 1), (3.2 3.1, 6.4 3.3, 6.1 6.6, 3.2 3.1))",
+        "MULTIPOLYGON (((0.5 0.5, 3.5 0.5, 2 4.2, 0.5 0.5)), ((5.1 5.1, 9.7 5.3, 9.2 9.6, 5.1 5.1)))",
+        "POLYGON ((2 0, 10.6 5, 2 10.8, -1.3 5, 2 0))",
+    ];
+
+    #[test]
+    fn native_masks_match_gdal_rasterize() {
+        let driver = DriverManager::get_driver_by_name("MEM").unwrap();
+        let gt = [-0.25, 0.5, 0.0, 10.25, 0.0, -0.5];
+        let (width, height) = (22, 22);
+        let inv = gdal_inv_geo_transform(gt).unwrap();
+        // Shared across geometries to exercise MEM dataset reuse as well.
+        let mut mask_ds = None;
+
+        for wkt in POLYGONS {
+            let geom = Geometry::from_wkt(wkt).unwrap();
+            for all_touched in [false, true] {
+                let mut expected = vec![0u8; width * height];
+                gdal_burn_mask(
+                    &driver,
+                    &mut mask_ds,
+                    &geom,
+                    gt,
+                    (width, height),
+                    all_touched,
+                    &mut expected,
+                )
+                .unwrap();
+                let rings = polygon_rings(&geom, |x, y| apply_geo_transform(&inv, x, y)).unwrap();
+                let mut got = vec![0u8; width * height];
+                burn_polygon(&rings, width, height, all_touched, &mut got);
+                assert_eq!(got, expected, "{wkt} all_touched={all_touched}");
+            }
+        }
+    }
 }
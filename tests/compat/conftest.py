@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from collections import defaultdict
+
+import pytest
+
+from rasterstats import _dispatch
+
+
+class FakeRustModule:
+    """Stand-in for ``rasterstats._rs`` that records every call.
+
+    ``calls[name]`` holds the ``(args, kwargs)`` of each call to ``name``;
+    tests replace ``respond[name]`` to shape what the engine returns.
+    """
+
+    def __init__(self):
+        self.calls = defaultdict(list)
+        self.respond = {
+            "zonal_stats_path": lambda vectors, raster, **kwargs: [{"count": 1}],
+            "zonal_stats_rasters": lambda vectors, rasters, **kwargs: [{}],
+            "point_query_path": lambda raster, coords, **kwargs: [1.0] * len(coords),
+            "masked_stats": lambda values, **kwargs: {"count": int(values.size)},
+        }
+
+    def kwargs(self, name="zonal_stats_path"):
+        """The keyword arguments of each call to ``name``, in call order."""
+        return [kwargs for _, kwargs in self.calls[name]]
+
+    def _call(self, name, args, kwargs):
+        self.calls[name].append((args, kwargs))
+        return self.respond[name](*args, **kwargs)
+
+    def zonal_stats_path(self, *args, **kwargs):
+        return self._call("zonal_stats_path", args, kwargs)
+
+    def zonal_stats_rasters(self, *args, **kwargs):
+        return self._call("zonal_stats_rasters", args, kwargs)
+
+    def point_query_path(self, *args, **kwargs):
+        return self._call("point_query_path", args, kwargs)
+
+    def masked_stats(self, *args, **kwargs):
+        return self._call("masked_stats", args, kwargs)
+
+
+@pytest.fixture
+def fake_rs(monkeypatch):
+    """Dispatch with Rust enabled, answered by a `FakeRustModule`."""
+    fake = FakeRustModule()
+    monkeypatch.delenv("OXRS_DISABLE_RUST", raising=False)
+    monkeypatch.setattr(_dispatch, "_rs_mod", fake)
+    return fake
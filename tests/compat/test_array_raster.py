@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+from affine import Affine
+
+from rasterstats import point_query, zonal_stats
+from rasterstats import _dispatch
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+AFFINE = Affine(5.0, 0.0, 244300.0, 0.0, -5.0, 1000500.0)
+
+
+def _zonal_rasters(fake_rs):
+    return [args[1] for args, _ in fake_rs.calls["zonal_stats_path"]]
+
+
+@pytest.mark.parametrize("order", ["C", "F"])
+def test_arrays_are_passed_to_rust_in_place(fake_rs, order):
+    arr = np.asarray(np.arange(12, dtype=np.float32).reshape(3, 4), order=order)
+
+    zonal_stats(DATA / "polygons.shp", arr, affine=AFFINE, band=2)
+    point_query(DATA / "points.shp", arr, affine=AFFINE)
+
+    (_, raster), kwargs = fake_rs.calls["zonal_stats_path"][0]
+    (point_raster, _), point_kwargs = fake_rs.calls["point_query_path"][0]
+    assert raster is arr and point_raster is arr
+    assert kwargs["geo_transform"] == point_kwargs["geo_transform"] == AFFINE.to_gdal()
+    assert kwargs["band"] == point_kwargs["band"] == 1
+
+
+def test_array_views_and_dtypes(fake_rs):
+    base = np.arange(24, dtype=np.int32).reshape(4, 6)
+
+    zonal_stats(DATA / "polygons.shp", base[::2, 1::2], affine=AFFINE)
+    zonal_stats(DATA / "polygons.shp", base[::-1], affine=AFFINE)
+    zonal_stats(DATA / "polygons.shp", base > 3, affine=AFFINE)
+    zonal_stats(DATA / "polygons.shp", base.astype(np.int64), affine=AFFINE)
+    zonal_stats(DATA / "polygons.shp", base.astype(np.uint64) + 2**31, affine=AFFINE)
+    zonal_stats(DATA / "polygons.shp", base.astype(np.float16), affine=AFFINE)
+
+    strided, flipped, flags, wide, unsigned, half = _zonal_rasters(fake_rs)
+    assert np.shares_memory(strided, base)
+    assert flipped.strides[0] > 0 and np.array_equal(flipped, base[::-1])
+    assert flags.dtype == np.uint8
+    assert wide.dtype == np.int32 and np.array_equal(wide, base)
+    assert unsigned.dtype == np.uint32
+    assert half.dtype == np.float32
+
+
+def test_unsupported_arrays_fall_back():
+    arr = np.zeros((3, 4), dtype=np.float32)
+
+    assert _dispatch._array_raster(arr, None) is None
+    assert _dispatch._array_raster(np.ma.masked_equal(arr, 0), AFFINE) is None
+    assert _dispatch._array_raster(arr[None], AFFINE) is None
+    assert _dispatch._array_raster(arr.astype(np.complex64), AFFINE) is None
+    # 64-bit integers that do not fit 32 bits would lose precision as float64.
+    huge = np.array([[2**53 + 1, -1]], dtype=np.int64)
+    assert _dispatch._array_raster(huge, AFFINE) is None
+    assert _dispatch._array_raster(np.full((1, 2), 2**40, np.uint64), AFFINE) is None
+
+
+def test_int64_array_matches_python_path(monkeypatch):
+    pytest.importorskip("rasterstats._rs")
+    monkeypatch.delenv("OXRS_DISABLE_RUST", raising=False)
+    arr = np.random.default_rng(3).integers(1, 6, size=(60, 80))
+    kwargs = {"affine": AFFINE, "stats": "count sum min max", "prefix": "lc_"}
+
+    got = zonal_stats(DATA / "polygons.shp", arr, categorical=True, **kwargs)
+    monkeypatch.setenv("OXRS_DISABLE_RUST", "1")
+    expected = zonal_stats(DATA / "polygons.shp", arr, categorical=True, **kwargs)
+
+    assert arr.dtype == np.int64
+    assert got == expected
+    assert all(type(key) is str and "." not in key for rec in got for key in rec)
+
+
+def test_array_matches_python_path(monkeypatch):
+    rng = np.random.default_rng(7)
+    arr = rng.integers(0, 50, size=(60, 80)).astype(np.int16)
+    kwargs = {"affine": AFFINE, "nodata": 0, "stats": "count min max sum nodata"}
+
+    got = zonal_stats(DATA / "polygons.shp", arr, **kwargs)
+    monkeypatch.setenv("OXRS_DISABLE_RUST", "1")
+    expected = zonal_stats(DATA / "polygons.shp", arr, **kwargs)
+
+    assert got == expected
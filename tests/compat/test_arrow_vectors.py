@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+import shapely
+from shapely.geometry import Point, box
+
+from rasterstats import zonal_stats
+
+gpd = pytest.importorskip("geopandas")
+pa = pytest.importorskip("pyarrow")
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+SMALL = Path(__file__).resolve().parents[1] / "fixtures" / "weppcloud" / "small"
+
+GEOMS = [box(244700, 1000100, 245200, 1000400), None, Point(245309.0, 1000064.0)]
+
+
+@pytest.fixture
+def fake(fake_rs):
+    fake_rs.respond["zonal_stats_path"] = lambda vectors, raster, **kwargs: [
+        {"count": i} for i in range(len(pa.array(vectors)))
+    ]
+    return fake_rs
+
+
+def _decoded(column):
+    return shapely.from_wkb(pa.array(column).to_numpy(zero_copy_only=False)).tolist()
+
+
+@pytest.mark.parametrize(
+    "vectors",
+    [
+        gpd.GeoDataFrame({"id": [1, 2, 3]}, geometry=GEOMS),
+        gpd.GeoSeries(GEOMS),
+        pa.array(shapely.to_wkb(GEOMS)),
+        pa.chunked_array([shapely.to_wkb(GEOMS[:1]), shapely.to_wkb(GEOMS[1:])]),
+    ],
+    ids=["geodataframe", "geoseries", "array", "chunked"],
+)
+def test_arrow_columns_reach_rust(fake, vectors):
+    got = zonal_stats(vectors, DATA / "slope.tif", stats="count")
+
+    assert got == [{"count": 0}, {"count": 1}, {"count": 2}]
+    (((column, _), _),) = fake.calls["zonal_stats_path"]
+    assert hasattr(column, "__arrow_c_array__")
+    assert _decoded(column) == GEOMS
+
+
+def test_geojson_out_keeps_geodataframe_properties(fake):
+    gdf = gpd.GeoDataFrame({"id": [1, 3]}, geometry=[GEOMS[0], GEOMS[2]])
+
+    got = zonal_stats(gdf, DATA / "slope.tif", stats="count", geojson_out=True)
+
+    assert [f["properties"] for f in got] == [
+        {"id": 1, "count": 0},
+        {"id": 3, "count": 1},
+    ]
+
+
+def test_geodataframe_matches_python_path(monkeypatch):
+    gdf = gpd.read_file(SMALL / "dem/wbt/subcatchments.geojson")
+    raster = SMALL / "dem/wbt/relief.tif"
+
+    got = zonal_stats(gdf, raster, stats="count min max mean")
+    monkeypatch.setenv("OXRS_DISABLE_RUST", "1")
+    expected = zonal_stats(gdf, raster, stats="count min max mean")
+
+    assert got == expected
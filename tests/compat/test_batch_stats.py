@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+from affine import Affine
+
+from rasterstats import zonal_stats
+from rasterstats.main import _batch_as_add_stats
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+AFFINE = Affine(5.0, 0.0, 244300.0, 0.0, -5.0, 1000500.0)
+
+
+def _zone_sum(values, offsets):
+    totals = np.concatenate([np.zeros(1, values.dtype), np.cumsum(values)])
+    return totals[offsets[1:]] - totals[offsets[:-1]]
+
+
+def _zone_size(values, offsets):
+    return np.diff(offsets)
+
+
+def _engine(n):
+    """``n`` records as Rust returns them for the requested kwargs."""
+
+    def zonal_stats_path(*args, **kwargs):
+        records = []
+        for i in range(n):
+            rec = {"count": i % 3}
+            if kwargs["zone_values"]:
+                rec["_zone_values"] = np.arange(i % 3, dtype=np.int16) + 1
+            if kwargs["raster_out"]:
+                rec["mini_raster_array"] = (
+                    np.arange(4, dtype=np.int16).reshape(2, 2),
+                    np.zeros((2, 2), dtype=bool),
+                    np.ones((2, 2), dtype=bool),
+                )
+                rec["mini_raster_affine"] = (0.0, 1.0, 0.0, 0.0, 0.0, -1.0)
+                rec["mini_raster_nodata"] = -999.0
+            records.append(rec)
+        return records
+
+    return zonal_stats_path
+
+
+def test_batch_stats_receive_csr_chunks(fake_rs):
+    fake_rs.respond["zonal_stats_path"] = _engine(600)
+    seen = []
+
+    def sizes(values, offsets):
+        seen.append((values.dtype, len(offsets) - 1))
+        return _zone_size(values, offsets)
+
+    got = zonal_stats(
+        DATA / "polygons.shp",
+        DATA / "slope.tif",
+        stats="count",
+        prefix="b_",
+        batch_stats={"zsum": _zone_sum, "size": sizes},
+    )
+
+    (call,) = fake_rs.kwargs()
+    assert call["zone_values"] is True
+    assert call["raster_out"] is False
+    assert seen == [(np.int16, 256), (np.int16, 256), (np.int16, 88)]
+    assert got[:4] == [
+        {"b_count": 0, "b_zsum": 0, "b_size": 0},
+        {"b_count": 1, "b_zsum": 1, "b_size": 1},
+        {"b_count": 2, "b_zsum": 3, "b_size": 2},
+        {"b_count": 0, "b_zsum": 0, "b_size": 0},
+    ]
+    assert len(got) == 600
+    assert all(type(rec["b_zsum"]) is int for rec in got)
+
+
+def test_batch_stats_see_zone_func_output(fake_rs):
+    fake_rs.respond["zonal_stats_path"] = _engine(2)
+
+    got = zonal_stats(
+        DATA / "polygons.shp",
+        DATA / "slope.tif",
+        stats="count",
+        zone_func=lambda masked: masked * 10,
+        batch_stats={"zsum": _zone_sum},
+    )
+
+    assert fake_rs.kwargs()[0]["zone_values"] is False
+    assert [rec["zsum"] for rec in got] == [60, 60]
+
+
+def test_batch_stats_length_is_checked(fake_rs):
+    fake_rs.respond["zonal_stats_path"] = _engine(3)
+
+    with pytest.raises(ValueError, match="returned 1 results for 3 features"):
+        zonal_stats(
+            DATA / "polygons.shp",
+            DATA / "slope.tif",
+            batch_stats={"bad": lambda values, offsets: np.zeros(1)},
+        )
+
+
+def test_batch_stats_skip_non_finite_values_on_every_path(fake_rs):
+    data = np.array([[1.0, np.inf], [-np.inf, 4.0]], dtype=np.float32)
+    fake_rs.respond["zonal_stats_path"] = lambda *args, **kwargs: [
+        {
+            "count": 2,
+            "mini_raster_array": (data, np.zeros((2, 2), bool), np.ones((2, 2), bool)),
+            "mini_raster_affine": (0.0, 1.0, 0.0, 0.0, 0.0, -1.0),
+            "mini_raster_nodata": -999.0,
+        }
+    ]
+    batch = {"zsum": _zone_sum, "size": _zone_size}
+
+    # With a zone_func the batch values are taken from its output in Python.
+    (rust,) = zonal_stats(
+        DATA / "polygons.shp",
+        DATA / "slope.tif",
+        stats="count",
+        zone_func=lambda masked: masked,
+        batch_stats=batch,
+    )
+    fallback = _batch_as_add_stats(batch)
+    masked = np.ma.MaskedArray(data, mask=np.zeros((2, 2), bool))
+
+    assert (rust["zsum"], rust["size"]) == (5.0, 2)
+    assert (fallback["zsum"](masked), fallback["size"](masked)) == (5.0, 2)
+
+
+def test_batch_stats_with_inf_cells_match_python_path(monkeypatch):
+    pytest.importorskip("rasterstats._rs")
+    monkeypatch.delenv("OXRS_DISABLE_RUST", raising=False)
+    arr = np.arange(60 * 80, dtype=np.float32).reshape(60, 80) % 7
+    arr[::5, ::3] = np.inf
+    kwargs = {
+        "affine": AFFINE,
+        "stats": "count",
+        "batch_stats": {"zsum": _zone_sum, "size": _zone_size},
+    }
+
+    got = zonal_stats(DATA / "polygons.shp", arr, **kwargs)
+    monkeypatch.setenv("OXRS_DISABLE_RUST", "1")
+    expected = zonal_stats(DATA / "polygons.shp", arr, **kwargs)
+
+    assert [(r["zsum"], r["size"]) for r in got] == [
+        (r["zsum"], r["size"]) for r in expected
+    ]
+
+
+def test_batch_stats_python_fallback_runs_one_zone_per_call():
+    stats = _batch_as_add_stats({"zsum": _zone_sum, "size": _zone_size})
+    masked = np.ma.MaskedArray(
+        np.arange(6, dtype=np.uint8).reshape(2, 3),
+        mask=[[True, False, False], [False, True, False]],
+    )
+
+    assert stats["zsum"](masked) == 1 + 2 + 3 + 5
+    assert stats["size"](masked) == 4
+    assert type(stats["zsum"](masked)) is int
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+from rasterstats import zonal_stats
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+SMALL = Path(__file__).resolve().parents[1] / "fixtures" / "weppcloud" / "small"
+
+
+class _CachedRecords:
+    def __init__(self, records):
+        self._records = iter(records)
+
+    def __iter__(self):
+        return self._records
+
+    def cache_info(self):
+        return {"hits": 7, "misses": 3, "evictions": 0}
+
+
+def test_cache_bytes_is_forwarded_and_counters_logged(fake_rs, caplog):
+    fake_rs.respond["zonal_stats_path"] = lambda *a, **k: _CachedRecords([{"count": 1}])
+
+    with caplog.at_level(logging.DEBUG, logger="rasterstats._dispatch"):
+        zonal_stats(DATA / "polygons.shp", DATA / "slope.tif", cache_bytes=0)
+        zonal_stats(DATA / "polygons.shp", DATA / "slope.tif")
+
+    assert [call["cache_bytes"] for call in fake_rs.kwargs()] == [0, None]
+    assert any("'hits': 7" in record.getMessage() for record in caplog.records)
+
+
+def test_block_cache_does_not_change_results():
+    vectors = SMALL / "dem/wbt/subcatchments.geojson"
+    raster = SMALL / "dem/wbt/relief.tif"
+
+    uncached = zonal_stats(vectors, raster, stats="*", cache_bytes=0)
+    tiny = zonal_stats(vectors, raster, stats="*", cache_bytes=1 << 20)
+    default = zonal_stats(vectors, raster, stats="*", n_jobs=4)
+
+    assert tiny == uncached
+    assert default == uncached
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from rasterstats import zonal_stats
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+SMALL = Path(__file__).resolve().parents[1] / "fixtures" / "weppcloud" / "small"
+
+
+def test_categorical_is_forwarded_to_rust(fake_rs):
+    fake_rs.respond["zonal_stats_path"] = lambda *a, **k: [{1: 10, 2: 5, "count": 15}]
+    cmap = {1: "grass", 2: "forest"}
+
+    got = zonal_stats(
+        DATA / "polygons.shp",
+        DATA / "slope_classes.tif",
+        categorical=True,
+        category_map=cmap,
+        prefix="lc_",
+    )
+    zonal_stats(DATA / "polygons.shp", DATA / "slope.tif", category_map=cmap)
+
+    categorical, plain = fake_rs.kwargs()
+    assert got == [{"lc_1": 10, "lc_2": 5, "lc_count": 15}]
+    assert categorical["categorical"] is True
+    assert categorical["category_map"] is cmap
+    assert categorical["stats"] == []
+    # Upstream ignores category_map unless categorical is set.
+    assert plain["categorical"] is False
+    assert plain["category_map"] is None
+
+
+@pytest.mark.parametrize(
+    "vectors,raster,kwargs",
+    [
+        (DATA / "polygons.shp", DATA / "slope_classes.tif", {}),
+        (
+            DATA / "polygons.shp",
+            DATA / "slope_classes.tif",
+            {"category_map": {1.0: "low", 2.0: "mid"}, "stats": "count majority"},
+        ),
+        (
+            SMALL / "dem/wbt/subcatchments.geojson",
+            SMALL / "landuse/nlcd.tif",
+            {"n_jobs": 4},
+        ),
+    ],
+)
+def test_categorical_matches_python_path(monkeypatch, vectors, raster, kwargs):
+    got = zonal_stats(vectors, raster, categorical=True, **kwargs)
+    monkeypatch.setenv("OXRS_DISABLE_RUST", "1")
+    expected = zonal_stats(vectors, raster, categorical=True, **kwargs)
+
+    assert got == expected
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from rasterstats import point_query, zonal_stats
+from rasterstats.io import read_features
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+
+
+def _zonal_stats_path(vector_path, raster_path, **kwargs):
+    n = len(list(read_features(vector_path, layer=kwargs["layer"])))
+    return [{"count": i, "mean": float(i) / 2} for i in range(n)]
+
+
+@pytest.fixture
+def fake(fake_rs):
+    fake_rs.respond["zonal_stats_path"] = _zonal_stats_path
+    fake_rs.respond["point_query_path"] = lambda raster_path, coords, **kwargs: [
+        float(i) for i in range(len(coords))
+    ]
+    return fake_rs
+
+
+def test_zonal_geojson_out_uses_rust_and_keeps_features(fake):
+    vectors = DATA / "polygons.shp"
+
+    got = zonal_stats(vectors, DATA / "slope.tif", geojson_out=True, prefix="s_")
+    expected = list(read_features(str(vectors)))
+
+    assert len(fake.calls["zonal_stats_path"]) == 1
+    assert [f["geometry"] for f in got] == [f["geometry"] for f in expected]
+    assert [f["id"] for f in got] == [f["id"] for f in expected]
+    for i, (feat, src) in enumerate(zip(got, expected)):
+        assert feat["properties"] == {
+            **src["properties"],
+            "s_count": i,
+            "s_mean": float(i) / 2,
+        }
+
+
+def test_zonal_geojson_out_attaches_to_in_memory_features(fake):
+    geom = {
+        "type": "Polygon",
+        "coordinates": [[(0, 0), (1, 0), (1, 1), (0, 0)]],
+    }
+
+    got = zonal_stats([geom, geom], DATA / "slope.tif", geojson_out=True)
+
+    assert len(fake.calls["zonal_stats_path"]) == 1
+    assert [f["properties"] for f in got] == [
+        {"count": 0, "mean": 0.0},
+        {"count": 1, "mean": 0.5},
+    ]
+    assert got[0]["geometry"] == geom
+
+
+def test_point_geojson_out_uses_rust(fake):
+    vectors = DATA / "points.shp"
+
+    got = point_query(vectors, DATA / "slope.tif", geojson_out=True, property_name="z")
+
+    assert len(fake.calls["point_query_path"]) == 1
+    assert [f["properties"]["z"] for f in got] == [0.0, 1.0, 2.0]
+    assert [f["geometry"] for f in got] == [
+        f["geometry"] for f in read_features(str(vectors))
+    ]
+
+
+@pytest.mark.parametrize("vectors", ["polygons.shp", "multipolygons.shp"])
+def test_zonal_geojson_out_matches_python_path(monkeypatch, vectors):
+    got = zonal_stats(DATA / vectors, DATA / "slope.tif", geojson_out=True, prefix="p_")
+    monkeypatch.setenv("OXRS_DISABLE_RUST", "1")
+    expected = zonal_stats(
+        DATA / vectors, DATA / "slope.tif", geojson_out=True, prefix="p_"
+    )
+
+    assert got == expected
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+import shapely
+from shapely.geometry import Point
+
+from rasterstats import gen_zonal_stats, zonal_stats
+from rasterstats import _dispatch
+
+gpd = pytest.importorskip("geopandas")
+pa = pytest.importorskip("pyarrow")
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+
+POINTS = [Point(245000.0 + 10 * i, 1000100.0) for i in range(5)]
+
+
+def _engine(opens_parquet):
+    """Rust built against a GDAL with or without the Parquet driver."""
+
+    def zonal_stats_path(vectors, raster, **kwargs):
+        if isinstance(vectors, str):
+            if not opens_parquet:
+                raise RuntimeError("GDAL error: not recognized as a supported format")
+            return [{"count": -1}]
+        xs = shapely.get_x(shapely.from_wkb(pa.array(vectors).to_numpy(False)))
+        return [{"x": float(x)} for x in xs]
+
+    return zonal_stats_path
+
+
+def _vectors(fake_rs):
+    return [args[0] for args, _ in fake_rs.calls["zonal_stats_path"]]
+
+
+@pytest.fixture
+def geoparquet(tmp_path):
+    path = tmp_path / "hillslopes.parquet"
+    gdf = gpd.GeoDataFrame(
+        {"topaz_id": range(5), "note": ["x" * 100] * 5}, geometry=POINTS
+    )
+    gdf.to_parquet(path)
+    return path
+
+
+def test_geoparquet_streams_geometry_batches_when_gdal_cannot(
+    monkeypatch, fake_rs, geoparquet
+):
+    fake_rs.respond["zonal_stats_path"] = _engine(opens_parquet=False)
+    monkeypatch.setattr(_dispatch, "_PARQUET_BATCH", 2)
+
+    stream = gen_zonal_stats(geoparquet, DATA / "slope.tif")
+    first = next(stream)
+
+    assert _vectors(fake_rs)[0] == str(geoparquet)
+    assert len(_vectors(fake_rs)) == 2
+    assert first == {"x": 245000.0}
+    assert [rec["x"] for rec in stream] == [245010.0, 245020.0, 245030.0, 245040.0]
+    batches = _vectors(fake_rs)[1:]
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert all(pa.types.is_binary(batch.type) for batch in batches)
+
+
+def test_geoparquet_opened_by_gdal_is_not_read_with_pyarrow(fake_rs, geoparquet):
+    fake_rs.respond["zonal_stats_path"] = _engine(opens_parquet=True)
+
+    assert zonal_stats(geoparquet, DATA / "slope.tif") == [{"count": -1}]
+    assert _vectors(fake_rs) == [str(geoparquet)]
+
+
+def test_plain_parquet_falls_back(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "table.parquet"
+    pq.write_table(pa.table({"topaz_id": [1, 2]}), path)
+
+    assert _dispatch._zonal_geoparquet(str(path), "r.tif", {}) is None
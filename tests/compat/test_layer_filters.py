@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from shapely.geometry import Point, mapping
+
+from rasterstats import main, zonal_stats
+from rasterstats._dispatch import layer_where, read_layer_features
+
+fiona = pytest.importorskip("fiona")
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+
+
+@pytest.fixture
+def gpkg(tmp_path):
+    path = tmp_path / "hillslopes.gpkg"
+    schema = {"geometry": "Point", "properties": {"landuse": "str"}}
+    for name, n in [("channels", 2), ("hillslopes", 6)]:
+        with fiona.open(path, "w", driver="GPKG", layer=name, schema=schema) as dst:
+            dst.writerecords(
+                {
+                    "geometry": mapping(Point(float(i), float(i))),
+                    "properties": {"landuse": "forest" if i % 2 else "grass"},
+                }
+                for i in range(n)
+            )
+    return path
+
+
+def _zonal_stats_path(vector_path, raster, **kwargs):
+    feats = read_layer_features(
+        vector_path,
+        kwargs["layer"],
+        bbox=kwargs["bbox"],
+        where_clause=kwargs["where_clause"],
+    )
+    return [{"fid": int(feat["id"])} for feat in feats]
+
+
+@pytest.fixture
+def fake(fake_rs):
+    fake_rs.respond["zonal_stats_path"] = _zonal_stats_path
+    return fake_rs
+
+
+def test_layer_where_combines_where_and_fids():
+    assert layer_where(None, None) is None
+    assert layer_where("a = 1", None) == "(a = 1)"
+    assert layer_where("a = 1", [3, 1]) == "(a = 1) AND FID IN (3, 1)"
+
+
+def test_named_layer_and_filters_are_pushed_to_rust(fake, gpkg):
+    got = zonal_stats(
+        gpkg,
+        DATA / "slope.tif",
+        layer="hillslopes",
+        bbox=[0.5, 0.5, 4.5, 4.5],
+        fids=(5, 2, 3, 4),
+        where="landuse = 'forest'",
+    )
+
+    (call,) = fake.kwargs()
+    assert call["layer"] == "hillslopes"
+    assert call["bbox"] == (0.5, 0.5, 4.5, 4.5)
+    assert call["where_clause"] == "(landuse = 'forest') AND FID IN (5, 2, 3, 4)"
+    # GeoPackage FIDs start at 1: features 1 and 3 are forest inside the box.
+    assert got == [{"fid": 2}, {"fid": 4}]
+
+
+def test_geojson_out_pairs_filtered_features(fake, gpkg):
+    got = zonal_stats(
+        gpkg, DATA / "slope.tif", layer="hillslopes", fids=[6, 1], geojson_out=True
+    )
+
+    assert [(f["id"], f["properties"]["fid"]) for f in got] == [("1", 1), ("6", 6)]
+
+
+def test_python_fallback_reads_only_filtered_features(monkeypatch, gpkg):
+    seen = {}
+
+    def fallback(vectors, raster, **kwargs):
+        seen["vectors"] = vectors
+        return iter([])
+
+    monkeypatch.setenv("OXRS_DISABLE_RUST", "1")
+    monkeypatch.setattr(main, "fallback_gen_zonal_stats", fallback)
+
+    zonal_stats(gpkg, DATA / "slope.tif", layer="channels", where="landuse = 'grass'")
+
+    assert [f["geometry"]["coordinates"] for f in seen["vectors"]] == [(0.0, 0.0)]
+
+
+def test_filters_need_a_vector_path(fake):
+    with pytest.raises(ValueError, match="only apply to vector paths"):
+        zonal_stats([Point(0, 0)], DATA / "slope.tif", bbox=(0, 0, 1, 1))
+    with pytest.raises(ValueError, match="only apply to vector paths"):
+        zonal_stats([Point(0, 0)], DATA / "slope.tif", fids=[])
+    assert zonal_stats(DATA / "polygons.shp", DATA / "slope.tif", fids=[]) == []
+    assert fake.kwargs() == []
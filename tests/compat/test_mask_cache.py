@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from rasterstats import zonal_stats
+from rasterstats.main import zonal_stats_rasters
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+SMALL = Path(__file__).resolve().parents[1] / "fixtures" / "weppcloud" / "small"
+
+
+def test_mask_cache_options_reach_rust(fake_rs, tmp_path):
+    cache = tmp_path / "masks"
+
+    zonal_stats(DATA / "polygons.shp", DATA / "slope.tif", mask_cache=cache)
+    zonal_stats_rasters(
+        DATA / "polygons.shp",
+        {"slope": DATA / "slope.tif"},
+        mask_cache=cache,
+        mask_cache_bytes=1 << 20,
+    )
+
+    calls = fake_rs.kwargs() + fake_rs.kwargs("zonal_stats_rasters")
+    assert [(c["mask_cache"], c["mask_cache_bytes"]) for c in calls] == [
+        (str(cache), None),
+        (str(cache), 1 << 20),
+    ]
+
+
+def test_second_run_loads_masks_from_the_cache(tmp_path):
+    rs = pytest.importorskip("rasterstats._rs")
+    vectors = str(SMALL / "dem/wbt/subcatchments.geojson")
+    raster = str(SMALL / "dem/wbt/relief.tif")
+    stats = ["count", "min", "max", "mean", "median"]
+
+    def run(**kwargs):
+        records = rs.zonal_stats_path(vectors, raster, stats=stats, **kwargs)
+        return list(records), records.cache_info()
+
+    uncached, _ = run()
+    first, first_info = run(mask_cache=tmp_path)
+    second, second_info = run(mask_cache=tmp_path)
+
+    assert first_info["mask_hits"] == 0
+    assert second_info["mask_hits"] == first_info["mask_misses"] > 0
+    assert second_info["mask_misses"] == 0
+    assert first == second == uncached
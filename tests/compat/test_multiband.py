@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import rasterio
+from affine import Affine
+from shapely.geometry import box, mapping
+
+from rasterstats import main, zonal_stats
+
+FEATURES = [
+    {"type": "Feature", "properties": {"id": 1}, "geometry": mapping(box(0, 6, 4, 10))},
+    {"type": "Feature", "properties": {"id": 2}, "geometry": mapping(box(4, 0, 10, 6))},
+]
+
+
+@pytest.fixture
+def rgb(tmp_path):
+    path = tmp_path / "rgb.tif"
+    data = np.stack([np.arange(100, dtype=np.int16).reshape(10, 10) * k for k in (1, 2, 3)])
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        width=10,
+        height=10,
+        count=3,
+        dtype="int16",
+        transform=Affine(1, 0, 0, 0, -1, 10),
+        nodata=-1,
+    ) as dst:
+        dst.write(data)
+    return path
+
+
+@pytest.fixture
+def rgb_nodata(rgb, tmp_path):
+    """``rgb`` through a VRT that gives each band its own nodata."""
+    bands = "".join(
+        f"""
+  <VRTRasterBand dataType="Int16" band="{b}">
+    <NoDataValue>{nodata}</NoDataValue>
+    <SimpleSource>
+      <SourceFilename relativeToVRT="0">{rgb}</SourceFilename>
+      <SourceBand>{b}</SourceBand>
+    </SimpleSource>
+  </VRTRasterBand>"""
+        for b, nodata in [(1, 0), (2, -1), (3, 6)]
+    )
+    path = tmp_path / "rgb_nodata.vrt"
+    path.write_text(
+        f"""<VRTDataset rasterXSize="10" rasterYSize="10">
+  <GeoTransform>0, 1, 0, 10, 0, -1</GeoTransform>{bands}
+</VRTDataset>"""
+    )
+    return path
+
+
+def test_band_lists_reach_rust(fake_rs, rgb):
+    fake_rs.respond["zonal_stats_path"] = lambda *args, **kwargs: [
+        {"count_b1": 16, "count_b3": 16},
+        {"count_b1": 36, "count_b3": 36},
+    ]
+
+    got = zonal_stats(FEATURES, rgb, band=(1, 3), stats="count", prefix="p_")
+
+    assert fake_rs.kwargs()[0]["band"] == [1, 3]
+    assert got[0] == {"p_count_b1": 16, "p_count_b3": 16}
+
+
+def test_python_fallback_merges_band_suffixed_keys(monkeypatch, rgb):
+    monkeypatch.setenv("OXRS_DISABLE_RUST", "1")
+
+    got = zonal_stats(FEATURES, rgb, band="all", stats="count max")
+    single = [zonal_stats(FEATURES, rgb, band=b, stats="count max") for b in (1, 2, 3)]
+
+    for i, record in enumerate(got):
+        assert record == {
+            f"{key}_b{b}": value
+            for b, band_stats in zip((1, 2, 3), single)
+            for key, value in band_stats[i].items()
+        }
+    assert got[1]["max_b3"] == 3 * 99
+
+    (feat, _) = zonal_stats(FEATURES, rgb, band=[2], stats="max", geojson_out=True)
+    assert feat["properties"] == {"id": 1, "max_b2": 2 * 33}
+
+
+def test_band_lists_reject_single_band_options(rgb):
+    with pytest.raises(ValueError, match="band lists do not support"):
+        zonal_stats(FEATURES, rgb, band=[1, 2], categorical=True)
+    with pytest.raises(ValueError, match="need a raster path"):
+        zonal_stats(FEATURES, np.zeros((10, 10)), affine=Affine.identity(), band="all")
+
+
+def test_band_strings_other_than_all_are_rejected(rgb):
+    with pytest.raises(ValueError, match="band must be"):
+        zonal_stats(FEATURES, rgb, band="12")
+
+
+def test_fallback_reads_features_once(monkeypatch, rgb):
+    monkeypatch.setenv("OXRS_DISABLE_RUST", "1")
+    seen = []
+
+    def fallback(vectors, raster, band, **kwargs):
+        seen.append((band, vectors))
+        return iter([{"count": band}] * len(vectors))
+
+    monkeypatch.setattr(main, "fallback_gen_zonal_stats", fallback)
+
+    got = zonal_stats(iter(FEATURES), rgb, band=[3, 1])
+
+    assert got == [{"count_b3": 3, "count_b1": 1}] * 2
+    assert [b for b, _ in seen] == [3, 1]
+    assert seen[0][1] is seen[1][1]
+
+
+def test_fallback_uses_each_bands_nodata(monkeypatch, rgb_nodata):
+    monkeypatch.setenv("OXRS_DISABLE_RUST", "1")
+    seen = {}
+
+    def fallback(vectors, raster, band, nodata, **kwargs):
+        seen[band] = nodata
+        return iter([{}] * len(vectors))
+
+    monkeypatch.setattr(main, "fallback_gen_zonal_stats", fallback)
+
+    zonal_stats(FEATURES, rgb_nodata, band="all")
+    assert seen == {1: 0, 2: -1, 3: 6}
+    zonal_stats(FEATURES, rgb_nodata, band=[3, 1], nodata=-5)
+    assert seen == {1: -5, 2: -1, 3: -5}
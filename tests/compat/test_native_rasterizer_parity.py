@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from rasterstats import zonal_stats
+
+# The Python fallback ignores `rasterizer`, so both runs need the engine.
+pytest.importorskip("rasterstats._rs")
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+SMALL = Path(__file__).resolve().parents[1] / "fixtures" / "weppcloud" / "small"
+
+STATS = "count sum min max nodata"
+
+
+@pytest.mark.parametrize("all_touched", [False, True])
+@pytest.mark.parametrize(
+    "vectors,raster",
+    [
+        (DATA / "polygons.shp", DATA / "slope.tif"),
+        (DATA / "multipolygons.shp", DATA / "slope.tif"),
+        (DATA / "polygons_partial_overlap.shp", DATA / "slope_nodata.tif"),
+        (SMALL / "dem/wbt/subcatchments.geojson", SMALL / "dem/wbt/relief.tif"),
+    ],
+)
+def test_native_rasterizer_matches_gdal(monkeypatch, vectors, raster, all_touched):
+    monkeypatch.delenv("OXRS_DISABLE_RUST", raising=False)
+    native = zonal_stats(
+        vectors, raster, stats=STATS, all_touched=all_touched, rasterizer="native"
+    )
+    gdal = zonal_stats(
+        vectors, raster, stats=STATS, all_touched=all_touched, rasterizer="gdal"
+    )
+
+    assert native == gdal
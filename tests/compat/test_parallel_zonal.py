@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from rasterstats import zonal_stats
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+SMALL = Path(__file__).resolve().parents[1] / "fixtures" / "weppcloud" / "small"
+
+
+def test_n_jobs_is_forwarded_to_rust(fake_rs):
+    zonal_stats(DATA / "polygons.shp", DATA / "slope.tif", stats="count", n_jobs=4)
+    zonal_stats(DATA / "polygons.shp", DATA / "slope.tif", stats="count")
+
+    assert [call["n_jobs"] for call in fake_rs.kwargs()] == [4, 1]
+
+
+def test_parallel_output_matches_serial_order():
+    vectors = SMALL / "dem/wbt/subcatchments.geojson"
+    raster = SMALL / "dem/wbt/relief.tif"
+
+    serial = zonal_stats(vectors, raster, stats="*", n_jobs=1)
+    parallel = zonal_stats(vectors, raster, stats="*", n_jobs=4)
+    all_cores = zonal_stats(vectors, raster, stats="*", n_jobs=-1)
+
+    assert parallel == serial
+    assert all_cores == serial
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+from affine import Affine
+
+from rasterstats import zonal_stats
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+
+
+def test_raster_out_wraps_rust_buffers(fake_rs):
+    data = np.array([[1, 2], [3, 255]], dtype=np.uint8)
+    mask = np.array([[False, True], [False, True]])
+    zone = np.array([[True, True], [True, False]])
+    fake_rs.respond["zonal_stats_path"] = lambda *args, **kwargs: [
+        {
+            "count": 2,
+            "mini_raster_array": (data, mask, zone),
+            "mini_raster_affine": (100.0, 5.0, 0.0, 200.0, 0.0, -5.0),
+            "mini_raster_nodata": 255.0,
+        }
+    ]
+
+    (rec,) = zonal_stats(
+        DATA / "polygons.shp", DATA / "slope.tif", raster_out=True, prefix="z_"
+    )
+
+    assert fake_rs.kwargs()[0]["raster_out"] is True
+    arr = rec["z_mini_raster_array"]
+    assert isinstance(arr, np.ma.MaskedArray)
+    assert arr.dtype == np.uint8
+    assert np.shares_memory(arr.data, data)
+    assert arr.compressed().tolist() == [1, 3]
+    assert rec["z_mini_raster_affine"] == Affine(5.0, 0.0, 100.0, 0.0, -5.0, 200.0)
+    assert rec["z_mini_raster_nodata"] == 255.0
+    assert rec["z_count"] == 2
+
+
+@pytest.mark.parametrize("vectors", ["polygons.shp", "polygons_partial_overlap.shp"])
+def test_raster_out_matches_python_path(monkeypatch, vectors):
+    raster = DATA / "slope_nodata.tif"
+    got = zonal_stats(DATA / vectors, raster, raster_out=True)
+    monkeypatch.setenv("OXRS_DISABLE_RUST", "1")
+    expected = zonal_stats(DATA / vectors, raster, raster_out=True)
+
+    assert len(got) == len(expected)
+    for rec, ref in zip(got, expected):
+        arr, ref_arr = rec.pop("mini_raster_array"), ref.pop("mini_raster_array")
+        assert arr.dtype == ref_arr.dtype
+        assert np.array_equal(arr.mask, ref_arr.mask)
+        assert np.array_equal(arr.compressed(), ref_arr.compressed())
+        assert rec == ref
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from rasterstats import zonal_stats
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+SMALL = Path(__file__).resolve().parents[1] / "fixtures" / "weppcloud" / "small"
+
+
+def test_spatial_order_is_forwarded_to_rust(fake_rs):
+    zonal_stats(DATA / "polygons.shp", DATA / "slope.tif", spatial_order="hilbert")
+    zonal_stats(DATA / "polygons.shp", DATA / "slope.tif")
+
+    assert [call["spatial_order"] for call in fake_rs.kwargs()] == ["hilbert", None]
+
+
+@pytest.mark.parametrize("n_records, problem", [(1, "fewer"), (3, "more")])
+def test_record_count_must_match_features(fake_rs, n_records, problem):
+    fake_rs.respond["zonal_stats_path"] = lambda *args, **kwargs: [{"count": 1}] * n_records
+
+    with pytest.raises(RuntimeError, match=f"returned {problem} records than features"):
+        zonal_stats(DATA / "polygons.shp", DATA / "slope.tif", geojson_out=True)
+
+
+@pytest.mark.parametrize("order", ["hilbert", "morton"])
+@pytest.mark.parametrize("n_jobs", [1, 4])
+def test_spatial_order_preserves_output_order(order, n_jobs):
+    vectors = SMALL / "dem/wbt/subcatchments.geojson"
+    raster = SMALL / "dem/wbt/relief.tif"
+
+    expected = zonal_stats(vectors, raster, stats="*")
+    got = zonal_stats(vectors, raster, stats="*", spatial_order=order, n_jobs=n_jobs)
+
+    assert got == expected
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from shapely.geometry import Point
+
+from rasterstats import gen_zonal_stats
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+
+
+class _LazyRecords:
+    def __init__(self, total):
+        self.total = total
+        self.produced = 0
+
+    def __call__(self, vector_path, *args, **kwargs):
+        for i in range(self.total):
+            self.produced += 1
+            yield {"count": i, "mean": float("inf")}
+
+
+def test_gen_zonal_stats_yields_before_rust_is_exhausted(fake_rs):
+    records = fake_rs.respond["zonal_stats_path"] = _LazyRecords(total=1000)
+
+    stream = gen_zonal_stats(DATA / "polygons.shp", DATA / "slope.tif", prefix="z_")
+    first = next(stream)
+
+    assert first == {"z_count": 0, "z_mean": None}
+    assert records.produced == 1
+
+
+def test_in_memory_features_stream_without_a_temp_file(fake_rs):
+    fake_rs.respond["zonal_stats_path"] = _LazyRecords(total=3)
+
+    feature = {
+        "type": "Feature",
+        "properties": {},
+        "geometry": {"type": "Point", "coordinates": [245309.0, 1000064.0]},
+    }
+    stream = gen_zonal_stats([feature], DATA / "slope.tif")
+    next(stream)
+    (((wkbs, _), _),) = fake_rs.calls["zonal_stats_path"]
+    assert wkbs == [Point(245309.0, 1000064.0).wkb]
+
+    assert len(list(stream)) == 2
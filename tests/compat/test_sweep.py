@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from rasterstats import zonal_stats
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+
+
+def test_sweep_reaches_rust(fake_rs):
+
+    zonal_stats(DATA / "polygons.shp", DATA / "slope.tif", sweep=True)
+    zonal_stats(DATA / "polygons.shp", DATA / "slope.tif")
+
+    assert [c["sweep"] for c in fake_rs.kwargs()] == [True, False]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"raster_out": True},
+        {"zone_func": lambda zone: zone},
+        {"batch_stats": {"total": lambda values, offsets: []}},
+        {"band": [1, 2]},
+    ],
+)
+def test_sweep_rejects_per_zone_options(kwargs):
+    with pytest.raises(ValueError, match="sweep does not support"):
+        zonal_stats(DATA / "polygons.shp", DATA / "slope.tif", sweep=True, **kwargs)
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import Point, box
+
+from rasterstats import zonal_stats
+from rasterstats.io import read_features
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+
+GEOMS = [box(244700, 1000100, 245200, 1000400), Point(245309.0, 1000064.0)]
+
+
+@pytest.fixture
+def fake(fake_rs):
+    fake_rs.respond["zonal_stats_path"] = lambda vectors, raster, **kwargs: [
+        {"count": i} for i in range(len(vectors))
+    ]
+    return fake_rs
+
+
+def _vectors(fake):
+    return [args[0] for args, _ in fake.calls["zonal_stats_path"]]
+
+
+@pytest.mark.parametrize(
+    "vectors",
+    [
+        GEOMS,
+        np.array(GEOMS, dtype=object),
+        [geom.wkb for geom in GEOMS],
+        [geom.__geo_interface__ for geom in GEOMS],
+        {"type": "FeatureCollection", "features": list(read_features(GEOMS))},
+        (geom.wkt.encode() for geom in GEOMS),
+    ],
+    ids=["shapely", "ndarray", "wkb", "dicts", "collection", "wkt-bytes"],
+)
+def test_in_memory_vectors_reach_rust_as_wkb(fake, vectors):
+    got = zonal_stats(vectors, DATA / "slope.tif", stats="count")
+
+    assert got == [{"count": 0}, {"count": 1}]
+    (wkbs,) = _vectors(fake)
+    assert shapely.from_wkb(wkbs).tolist() == GEOMS
+
+
+def test_single_geometry_and_null_geometries(fake):
+    zonal_stats(GEOMS[0], DATA / "slope.tif")
+    zonal_stats(
+        [{"type": "Feature", "properties": {}, "geometry": None}],
+        DATA / "slope.tif",
+    )
+
+    assert _vectors(fake) == [[GEOMS[0].wkb], [None]]
+
+
+def test_geojson_out_keeps_in_memory_features(fake):
+    got = zonal_stats(GEOMS, DATA / "slope.tif", geojson_out=True)
+
+    assert [f["geometry"] for f in got] == [g.__geo_interface__ for g in GEOMS]
+    assert [f["properties"] for f in got] == [{"count": 0}, {"count": 1}]
+
+
+def test_wkb_vectors_match_python_path(monkeypatch):
+    got = zonal_stats(GEOMS, DATA / "slope.tif")
+    monkeypatch.setenv("OXRS_DISABLE_RUST", "1")
+    expected = zonal_stats(GEOMS, DATA / "slope.tif")
+
+    assert got == expected
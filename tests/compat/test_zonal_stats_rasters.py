@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from shapely.geometry import box, mapping
+
+from rasterstats import main
+from rasterstats.main import zonal_stats_rasters
+
+SMALL = Path(__file__).resolve().parents[1] / "fixtures" / "weppcloud" / "small"
+RASTERS = {
+    "relief": SMALL / "dem/wbt/relief.tif",
+    "nlcd": SMALL / "landuse/nlcd.tif",
+}
+FEATURES = [
+    {"type": "Feature", "properties": {"TopazID": 22}, "geometry": mapping(box(0, 0, 1, 1))},
+    {"type": "Feature", "properties": {"TopazID": 23}, "geometry": mapping(box(1, 0, 2, 1))},
+]
+
+
+@pytest.fixture
+def fake(fake_rs):
+    fake_rs.respond["zonal_stats_rasters"] = lambda vectors, rasters, **kwargs: [
+        {f"{name}_{stat}": i for name, _, stats, _, _ in rasters for stat in stats}
+        for i in range(2)
+    ]
+    return fake_rs
+
+
+def test_rasters_and_per_raster_stats_reach_rust(fake):
+    got = zonal_stats_rasters(
+        FEATURES,
+        RASTERS,
+        stats={"relief": "mean max", "nlcd": ["majority"]},
+        prefix="z_",
+        n_jobs=2,
+    )
+
+    ((_, rasters), kwargs) = fake.calls["zonal_stats_rasters"][0]
+    assert rasters == [
+        ("relief", str(RASTERS["relief"]), ["mean", "max"], 1, None),
+        ("nlcd", str(RASTERS["nlcd"]), ["majority"], 1, None),
+    ]
+    assert kwargs["n_jobs"] == 2
+    assert got[1] == {"z_relief_mean": 1, "z_relief_max": 1, "z_nlcd_majority": 1}
+
+
+def test_geojson_out_keeps_feature_properties(fake):
+    got = zonal_stats_rasters(FEATURES, RASTERS, stats="count", geojson_out=True)
+
+    assert [f["properties"] for f in got] == [
+        {"TopazID": 22, "relief_count": 0, "nlcd_count": 0},
+        {"TopazID": 23, "relief_count": 1, "nlcd_count": 1},
+    ]
+
+
+def test_python_fallback_merges_one_pass_per_raster(monkeypatch):
+    seen = []
+
+    def fallback(vectors, raster, stats=None, **kwargs):
+        seen.append((raster, vectors))
+        return iter([{stats: str(raster)}] * len(vectors))
+
+    monkeypatch.setenv("OXRS_DISABLE_RUST", "1")
+    monkeypatch.setattr(main, "fallback_gen_zonal_stats", fallback)
+
+    got = zonal_stats_rasters(
+        iter(FEATURES), RASTERS, stats={"relief": "mean", "nlcd": "majority"}
+    )
+
+    assert got == [
+        {"relief_mean": str(RASTERS["relief"]), "nlcd_majority": str(RASTERS["nlcd"])}
+    ] * 2
+    assert [raster for raster, _ in seen] == list(RASTERS.values())
+    assert seen[0][1] is seen[1][1]
+
+
+def test_stats_for_unknown_rasters_are_rejected(fake):
+    with pytest.raises(ValueError, match="unknown rasters"):
+        zonal_stats_rasters(FEATURES, RASTERS, stats={"slope": "mean"})
+    with pytest.raises(ValueError, match="at least one raster"):
+        zonal_stats_rasters(FEATURES, {})
+    assert fake.calls["zonal_stats_rasters"] == []
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rasterstats import zonal_stats
+
+DATA = Path(__file__).resolve().parents[1] / "upstream" / "data"
+
+
+def _zonal_stats_path(*args, **kwargs):
+    """Two features over the same 2x2 window, like the Rust engine returns."""
+    data = np.array([[1.0, 2.0], [3.0, -999.0]], dtype=np.float32)
+    mask = np.array([[False, False], [False, True]])
+    zone = np.array([[True, True], [True, True]])
+    return [
+        {
+            "count": 3,
+            "sum": 6.0,
+            "nodata": 1.0,
+            "mini_raster_array": (data.copy(), mask, zone),
+            "mini_raster_affine": (0.0, 1.0, 0.0, 2.0, 0.0, -1.0),
+            "mini_raster_nodata": -999.0,
+        }
+        for _ in range(2)
+    ]
+
+
+@pytest.fixture
+def fake(fake_rs):
+    fake_rs.respond["zonal_stats_path"] = _zonal_stats_path
+    fake_rs.respond["masked_stats"] = lambda values, **kwargs: {
+        "count": int(values.size),
+        "sum": float(values.sum()),
+    }
+    return fake_rs
+
+
+def _restats(fake):
+    calls = fake.calls["masked_stats"]
+    return [(args[0].dtype, kwargs["stats"]) for args, kwargs in calls]
+
+
+def test_add_stats_run_on_rust_zones(fake):
+    seen = {}
+
+    def one(masked):
+        return float(masked.max())
+
+    def two(masked, props):
+        return props["id"]
+
+    def three(masked, props, rv_array):
+        seen["rv"] = rv_array
+        return int(rv_array.sum())
+
+    got = zonal_stats(
+        DATA / "polygons.shp",
+        DATA / "slope.tif",
+        stats="count sum nodata",
+        add_stats={"one": one, "two": two, "three": three},
+    )
+
+    assert fake.kwargs()[0]["raster_out"] is True
+    assert _restats(fake) == []
+    assert got == [
+        {"count": 3, "sum": 6.0, "nodata": 1.0, "one": 3.0, "two": 1, "three": 4},
+        {"count": 3, "sum": 6.0, "nodata": 1.0, "one": 3.0, "two": 2, "three": 4},
+    ]
+    assert seen["rv"].dtype == np.bool_
+
+
+def test_zone_func_rewrites_stats_in_rust(fake):
+    def drop_small(masked):
+        return np.ma.masked_less(masked, 2)
+
+    got = zonal_stats(
+        DATA / "polygons.shp",
+        DATA / "slope.tif",
+        stats="count sum nodata",
+        zone_func=drop_small,
+        raster_out=True,
+    )
+
+    assert _restats(fake) == [(np.float32, ["count", "sum"])] * 2
+    rec = got[0]
+    assert (rec["count"], rec["sum"], rec["nodata"]) == (2, 5.0, 1.0)
+    assert rec["mini_raster_array"].compressed().tolist() == [2.0, 3.0]
+
+
+def test_zone_func_in_place_edit_sees_rust_buffer(fake):
+    def double(masked):
+        masked *= 2
+
+    got = zonal_stats(
+        DATA / "polygons.shp", DATA / "slope.tif", stats="sum", zone_func=double
+    )
+
+    assert [rec["sum"] for rec in got] == [12.0, 12.0]
+
+
+def test_non_callable_zone_func_raises(fake):
+    with pytest.raises(TypeError, match="zone_func must be a callable"):
+        zonal_stats(DATA / "polygons.shp", DATA / "slope.tif", zone_func="nope")
+
+
+@pytest.mark.parametrize("all_touched", [False, True])
+def test_callbacks_match_python_path(monkeypatch, all_touched):
+    kwargs = {
+        "stats": "count mean nodata",
+        "all_touched": all_touched,
+        "zone_func": lambda masked: masked * 2,
+        "add_stats": {
+            "mymax": lambda masked: float(masked.max()),
+            "inside": lambda masked, props, rv: int(rv.sum()),
+        },
+    }
+    vectors, raster = DATA / "polygons.shp", DATA / "slope.tif"
+
+    got = zonal_stats(vectors, raster, **kwargs)
+    monkeypatch.setenv("OXRS_DISABLE_RUST", "1")
+    expected = zonal_stats(vectors, raster, **kwargs)
+
+    assert got == expected
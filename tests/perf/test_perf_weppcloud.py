@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from pathlib import Path
 
@@ -14,6 +16,8 @@ from rasterstats._fallback_py import fallback_point_query, fallback_zonal_stats
 FIXTURE_ROOT = Path(__file__).resolve().parents[1] / "fixtures" / "weppcloud"
 BENCHMARK_ROUNDS = max(5, int(os.environ.get("OXRS_BENCHMARK_ROUNDS", "5")))
 BENCHMARK_ITERATIONS = max(1, int(os.environ.get("OXRS_BENCHMARK_ITERATIONS", "1")))
+# Minimum threaded speedup per worker; 0 reports the speedup without checking it.
+MIN_THREAD_SPEEDUP = float(os.environ.get("OXRS_MIN_THREAD_SPEEDUP", "0"))
 
 
 @contextmanager
@@ -109,6 +113,50 @@ def test_perf_small_point_upstream(benchmark):
     assert len(out) > 0
 
 
+def _timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+@pytest.mark.perf_small
+@pytest.mark.benchmark(group="small_threads")
+def test_perf_small_rust_threads_scale(benchmark):
+    """Concurrent Python threads must not serialize on the GIL in Rust calls."""
+    _skip_if_missing("small")
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    workers = min(4, cores or 1)
+    if workers < 2:
+        pytest.skip("thread scaling needs at least two cores")
+    vectors, raster, points = _paths("small")
+    calls = workers * 2
+
+    def one(i):
+        if i % 2:
+            return point_query(points, raster, interpolate="bilinear")
+        return zonal_stats(vectors, raster, stats="count mean")
+
+    def serial():
+        return [one(i) for i in range(calls)]
+
+    def threaded():
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(one, range(calls)))
+
+    with unset_var("OXRS_DISABLE_RUST"):
+        assert _rust_available_default_on()
+        one(0)
+        one(1)
+        serial_out, serial_elapsed = _timed(serial)
+        threaded_out, threaded_elapsed = _timed(threaded)
+        _run_benchmark(benchmark, threaded)
+
+    assert threaded_out == serial_out
+    speedup = serial_elapsed / threaded_elapsed
+    benchmark.extra_info["thread_speedup"] = speedup
+    assert speedup >= MIN_THREAD_SPEEDUP * workers, f"{workers} threads gave only {speedup:.2f}x"
+
+
 @pytest.mark.perf_large
 @pytest.mark.benchmark(group="large_zonal")
 def test_perf_large_zonal_rust(benchmark):